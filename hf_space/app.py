@@ -3,25 +3,279 @@ app.py — Gradio interface for A2 Deutsch Grammar Tutor (HF Space).
 
 Loads a standard BartForConditionalGeneration from a HF model repo.
 No custom model code needed — pure HF transformers inference.
+Repeated sentences are answered from an in-process LRU/TTL cache.
+Sentence tab: decoding stops after the "✅ Correct:" line; "Show explanation"
+resumes it from the saved decoder state (same as src/inference.py lazy path).
+API clients keep /check_grammar, which returns the full response in one call.
+Paragraph tab: sentences are split (same rules as src/paragraph.py), deduplicated
+and checked in one batched generate() call.
+Stats tab: latency / encoder vs decoder time / token / batch-size histograms and
+the verdict mix (same metric names as src/metrics.py), also as Prometheus text.
+
+Cold start (offline-first):
+  1. local snapshot dir — $MODEL_DIR, ./model or ../hf_export (src/export_hf.py layout)
+  2. HF cache of MODEL_ID without network (local_files_only)
+  3. MODEL_ID from the Hub
+then warm-up generations over the example sentences (single + batched).
+The server only starts listening after warm-up, so a replica is never
+reported ready while its first requests would still be slow.
 """
 
+import bisect
+import hashlib
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+
 import gradio as gr
 import torch
 from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
 
 # ── 1. Load Model & Tokenizer (standard HF pipeline) ──
 MODEL_ID = "kengurukleo/deutsch_a2_transformer"
+APP_DIR = Path(__file__).resolve().parent
+SNAPSHOT_DIRS = [os.environ.get("MODEL_DIR", ""), APP_DIR / "model", APP_DIR.parent / "hf_export"]
+SNAPSHOT_FILES = ("config.json", "model.safetensors", "tokenizer.json")
+
+EXAMPLES = [
+    "Ich habe den Auto.",
+    "Wo du wohnst?",
+    "Ich habe nach Berlin gefahren.",
+]
+
+
+def find_snapshot() -> Path | None:
+    """First local directory with a complete exported model (config, weights, tokenizer)."""
+    for candidate in SNAPSHOT_DIRS:
+        if candidate and all((Path(candidate) / name).exists() for name in SNAPSHOT_FILES):
+            return Path(candidate)
+    return None
+
 
-print(f"📥 Loading model from {MODEL_ID}...")
-tokenizer = AutoTokenizer.from_pretrained(MODEL_ID)
-model = AutoModelForSeq2SeqLM.from_pretrained(MODEL_ID)
+def snapshot_version(path: Path) -> str:
+    """Content hash of config + weights (same as src/cache.py: model_version)."""
+    h = hashlib.sha256()
+    for name in ("config.json", "model.safetensors"):
+        with open(path / name, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    return h.hexdigest()[:16]
+
+
+def load_model():
+    """(tokenizer, model, source, version) — local snapshot → offline HF cache → Hub."""
+    snapshot = find_snapshot()
+    if snapshot is not None:
+        tokenizer = AutoTokenizer.from_pretrained(str(snapshot))
+        model = AutoModelForSeq2SeqLM.from_pretrained(str(snapshot))
+        return tokenizer, model, f"local snapshot {snapshot}", snapshot_version(snapshot)
+    try:
+        tokenizer = AutoTokenizer.from_pretrained(MODEL_ID, local_files_only=True)
+        model = AutoModelForSeq2SeqLM.from_pretrained(MODEL_ID, local_files_only=True)
+        source = f"{MODEL_ID} (HF cache, offline)"
+    except OSError:
+        tokenizer = AutoTokenizer.from_pretrained(MODEL_ID)
+        model = AutoModelForSeq2SeqLM.from_pretrained(MODEL_ID)
+        source = f"{MODEL_ID} (Hub)"
+    # Model version for cache keys: Hub commit of the loaded snapshot (if known)
+    return tokenizer, model, source, getattr(model.config, "_commit_hash", None) or MODEL_ID
+
+
+def warm_up(sentences: list[str]) -> None:
+    """First calls pay for allocator growth and kernel selection — do them before serving."""
+    with torch.no_grad():
+        for sentence in sentences:
+            inputs = tokenizer(sentence, return_tensors="pt")
+            model.generate(**inputs, max_length=64, num_beams=1, do_sample=False)
+        inputs = tokenizer(sentences, return_tensors="pt", padding=True, truncation=True, max_length=64)
+        model.generate(**inputs, max_length=64, num_beams=1, do_sample=False)
+
+
+STARTUP: dict[str, float | str] = {}
+_t0 = time.perf_counter()
+print("📥 Loading model (local snapshot → HF cache → Hub)...")
+tokenizer, model, STARTUP["source"], MODEL_VERSION = load_model()
 model.eval()
-print("✅ Model loaded successfully")
+STARTUP["load_s"] = time.perf_counter() - _t0
+print(f"✅ Model loaded from {STARTUP['source']} in {STARTUP['load_s']:.2f}s")
+
+_t1 = time.perf_counter()
+warm_up(EXAMPLES)
+STARTUP["warmup_s"] = time.perf_counter() - _t1
+STARTUP["total_s"] = time.perf_counter() - _t0
+print(f"🔥 Warm-up: {len(EXAMPLES)} examples in {STARTUP['warmup_s']:.2f}s "
+      f"(startup total {STARTUP['total_s']:.2f}s)")
+
+
+# ── 1b. Result cache (same normalization as src/cache.py) ──
+_WS = re.compile(r"\s+")
+_TRAILING_PUNCT = re.compile(r"\s*([.!?])[\s.!?]*$")
+
+
+def normalize_text(text: str) -> str:
+    """NFC, collapsed whitespace, single trailing punctuation mark."""
+    text = unicodedata.normalize("NFC", text)
+    text = _WS.sub(" ", text).strip()
+    return _TRAILING_PUNCT.sub(r"\1", text)
+
+
+class ResultCache:
+    """Thread-safe LRU + TTL cache with hit / miss / eviction counters."""
+
+    def __init__(self, max_size: int = 4096, ttl: float = 3600.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or (self.ttl and time.monotonic() - entry[0] > self.ttl):
+                self._data.pop(key, None)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, value: str) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+
+cache = ResultCache()
+
+
+# ── 1c. Metrics (same names / buckets as src/metrics.py, Prometheus text on the Stats tab) ──
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (2, 4, 8, 12, 16, 24, 32, 48, 64, 128)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class Histogram:
+    """Fixed-bucket histogram per `path` label ("" = unlabelled)."""
+
+    def __init__(self, name: str, help: str, buckets: tuple, labelled: bool = True):
+        self.name, self.help, self.buckets, self.labelled = name, help, buckets, labelled
+        self._series: dict[str, list] = {}      # path → [bucket counts (+Inf last), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, path: str = "") -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.setdefault(path, [[0] * (len(self.buckets) + 1), 0.0])
+            series[0][i] += 1
+            series[1] += value
+
+    def summary(self, path: str = "") -> dict:
+        with self._lock:
+            counts, total = self._series.get(path, [[0], 0.0])
+            counts = list(counts)
+        count, seen, p50, p95 = sum(counts), 0, 0.0, 0.0
+        if not count:
+            return {"count": 0, "mean": 0.0, "p50": 0.0, "p95": 0.0}
+        for bound, n in zip(self.buckets + (self.buckets[-1],), counts):
+            seen += n
+            p50 = p50 or (bound if seen >= 0.5 * count else 0.0)
+            p95 = p95 or (bound if seen >= 0.95 * count else 0.0)
+        return {"count": count, "mean": total / count if count else 0.0, "p50": p50, "p95": p95}
+
+    def samples(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(p, list(c), t) for p, (c, t) in sorted(self._series.items())]
+        for path, counts, total in series:
+            label = f'path="{path}",' if self.labelled else ""
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f'{self.name}_bucket{{{label}le="{le}"}} {cumulative}')
+            plain = f"{{{label[:-1]}}}" if label else ""
+            lines += [f"{self.name}_sum{plain} {total:.6g}", f"{self.name}_count{plain} {sum(counts)}"]
+        return lines
+
+
+REQUEST_SECONDS = Histogram("a2_request_seconds", "End-to-end latency of one check call.", LATENCY_BUCKETS)
+ENCODER_SECONDS = Histogram("a2_encoder_seconds", "Encoder pass time per call.", LATENCY_BUCKETS)
+DECODER_SECONDS = Histogram("a2_decoder_seconds", "Greedy decoding time per call.", LATENCY_BUCKETS)
+INPUT_TOKENS = Histogram("a2_input_tokens", "Source tokens per sentence sent to the model.", TOKEN_BUCKETS, False)
+OUTPUT_TOKENS = Histogram("a2_output_tokens", "Generated tokens per sentence (including <EOS>).",
+                          TOKEN_BUCKETS, False)
+DECODE_STEPS = Histogram("a2_decode_steps", "Decoder steps per generate() call.", TOKEN_BUCKETS)
+BATCH_SIZE = Histogram("a2_batch_size", "Sentences per generate() call.", BATCH_BUCKETS)
+HISTOGRAMS = (REQUEST_SECONDS, ENCODER_SECONDS, DECODER_SECONDS, INPUT_TOKENS, OUTPUT_TOKENS, DECODE_STEPS,
+              BATCH_SIZE)
+RESPONSES: dict[tuple[str, str], int] = {}     # (source, verdict) → count
+_responses_lock = threading.Lock()
+
+
+def record_response(response: str, source: str) -> None:
+    verdict = "incorrect" if response.startswith("❌") else "correct" if response.startswith("✅ Correct.") \
+        else "unknown"
+    with _responses_lock:
+        RESPONSES[(source, verdict)] = RESPONSES.get((source, verdict), 0) + 1
+
+
+def generate(inputs, path: str) -> torch.Tensor:
+    """model.generate() with the encoder pass timed on its own; records the per-call metrics."""
+    with torch.no_grad():
+        t0 = time.perf_counter()
+        encoder_outputs = model.get_encoder()(input_ids=inputs["input_ids"], attention_mask=inputs["attention_mask"])
+        t1 = time.perf_counter()
+        output_ids = model.generate(encoder_outputs=encoder_outputs, attention_mask=inputs["attention_mask"],
+                                    max_length=64, num_beams=1, do_sample=False)
+    ENCODER_SECONDS.observe(t1 - t0, path)
+    DECODER_SECONDS.observe(time.perf_counter() - t1, path)
+    BATCH_SIZE.observe(output_ids.shape[0], path)
+    DECODE_STEPS.observe(output_ids.shape[1] - 1, path)
+    for n in inputs["attention_mask"].sum(dim=1).tolist():
+        INPUT_TOKENS.observe(n)
+    for n in (output_ids[:, 1:] != tokenizer.pad_token_id).sum(dim=1).tolist():
+        OUTPUT_TOKENS.observe(n)
+    return output_ids
+
+
+def metrics_text() -> str:
+    """Prometheus text exposition format."""
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines += histogram.samples()
+    lines += ["# HELP a2_responses_total Responses by where they came from and their verdict.",
+              "# TYPE a2_responses_total counter"]
+    with _responses_lock:
+        lines += [f'a2_responses_total{{source="{s}",verdict="{v}"}} {n}' for (s, v), n in sorted(RESPONSES.items())]
+    return "\n".join(lines) + "\n"
+
+
+def stats_markdown() -> str:
+    rows = ["| | calls | mean | p50 | p95 |", "|---|---|---|---|---|"]
+    for histogram, path in ((REQUEST_SECONDS, "single"), (REQUEST_SECONDS, "lazy"), (REQUEST_SECONDS, "batch"),
+                            (ENCODER_SECONDS, "single"), (ENCODER_SECONDS, "lazy"), (DECODER_SECONDS, "single"),
+                            (DECODER_SECONDS, "lazy"), (DECODER_SECONDS, "explain"), (INPUT_TOKENS, ""),
+                            (OUTPUT_TOKENS, ""), (BATCH_SIZE, "batch")):
+        s = histogram.summary(path)
+        scale, unit = (1000, " ms") if histogram.name.endswith("seconds") else (1, "")
+        rows.append(f"| `{histogram.name}` {path} | {s['count']} | {s['mean'] * scale:.1f}{unit} | "
+                    f"≤ {s['p50'] * scale:g}{unit} | ≤ {s['p95'] * scale:g}{unit} |")
+    with _responses_lock:
+        mix = ", ".join(f"{s}/{v}: {n}" for (s, v), n in sorted(RESPONSES.items())) or "—"
+    return "\n".join(rows) + f"\n\n**Responses:** {mix}  \n**Cache:** {cache.hits} hits / {cache.misses} misses"
 
 
 def check_grammar(text: str) -> str:
     """
-    Check grammar of a German sentence.
+    Check grammar of a German sentence — full response in one call (the /check_grammar API).
 
     Pipeline:
       text → tokenizer() → input_ids [1, T]
@@ -32,19 +286,193 @@ def check_grammar(text: str) -> str:
     if not text.strip():
         return "Будь ласка, введіть німецьке речення."
 
+    start = time.perf_counter()
+    text = normalize_text(text)
+    key = f"{MODEL_VERSION}\x00{text}"
+    cached = cache.get(key)
+    if cached is not None:
+        record_response(cached, "cache")
+        REQUEST_SECONDS.observe(time.perf_counter() - start, "single")
+        return cached
+
     # AutoTokenizer adds BOS/EOS automatically via tokenizer.json post_processor
     inputs = tokenizer(text, return_tensors="pt")
+    output_ids = generate(inputs, "single")
+
+    result = tokenizer.decode(output_ids[0], skip_special_tokens=True).strip()
+    cache.put(key, result)
+    record_response(result, "model")
+    REQUEST_SECONDS.observe(time.perf_counter() - start, "single")
+    return result
+
+
+# ── 1c'. Sentence check with lazy explanation (same as src/inference.py generate_response_lazy) ──
+EXPLANATION_MARKER = "\n📝 Пояснення:"
 
+
+def _greedy_continue(state: dict, stop=None) -> None:
+    """Greedy decode with the KV cache from state["tokens"][-1] until <EOS>, the length limit or stop(tokens)."""
+    tokens, max_new = state["tokens"], 64 - 1 - (model.generation_config.forced_eos_token_id is not None)
     with torch.no_grad():
-        output_ids = model.generate(
-            **inputs,
-            max_length=64,
-            num_beams=1,
-            do_sample=False,
-        )
+        while len(tokens) - 1 < max_new and tokens[-1] != model.config.eos_token_id:
+            out = model(encoder_outputs=state["encoder_outputs"], attention_mask=state["attention_mask"],
+                        decoder_input_ids=torch.tensor([[tokens[-1]]]), past_key_values=state["past_key_values"],
+                        use_cache=True)
+            state["past_key_values"] = out.past_key_values
+            tokens.append(int(out.logits[0, -1].argmax()))
+            if stop is not None and stop(tokens):
+                break
+    state["done"] = len(tokens) - 1 >= max_new or tokens[-1] == model.config.eos_token_id
+
 
-    result = tokenizer.decode(output_ids[0], skip_special_tokens=True)
-    return result.strip()
+def _correction_line_done(tokens: list[int]) -> bool:
+    return "\n" in tokenizer.decode(tokens[-1:], skip_special_tokens=True) and \
+        "✅ Correct:" in tokenizer.decode(tokens, skip_special_tokens=True)
+
+
+def check_grammar_lazy(text: str):
+    """
+    Check grammar of a German sentence — verdict + correction first.
+
+    Pipeline:
+      text → tokenizer() → input_ids [1, T]
+           → Encoder → memory [1, T, 256]
+           → Decoder (greedy, KV cache) → "❌ Incorrect.\n✅ Correct: …\n"  ⏸
+           → decode → result string
+
+    Decoding stops after the "✅ Correct:" line and the
+    decoder state (encoder output, KV cache, tokens) is kept in a gr.State, so
+    show_explanation() resumes exactly where it stopped.
+
+    Returns (markdown, state or None, "Show explanation" button update).
+    """
+    hidden = gr.update(visible=False)
+    if not text.strip():
+        return "Будь ласка, введіть німецьке речення.", None, hidden
+
+    start = time.perf_counter()
+    text = normalize_text(text)
+    key = f"{MODEL_VERSION}\x00{text}"
+    cached = cache.get(key)
+    if cached is not None:
+        record_response(cached, "cache")
+        REQUEST_SECONDS.observe(time.perf_counter() - start, "lazy")
+        return cached, None, hidden
+
+    inputs = tokenizer(text, return_tensors="pt")
+    with torch.no_grad():
+        t0 = time.perf_counter()
+        encoder_outputs = model.get_encoder()(input_ids=inputs["input_ids"], attention_mask=inputs["attention_mask"])
+        t1 = time.perf_counter()
+    state = {"key": key, "encoder_outputs": encoder_outputs, "attention_mask": inputs["attention_mask"],
+             "past_key_values": None, "tokens": [model.config.decoder_start_token_id]}
+    _greedy_continue(state, _correction_line_done)
+    ENCODER_SECONDS.observe(t1 - t0, "lazy")
+    DECODER_SECONDS.observe(time.perf_counter() - t1, "lazy")
+    DECODE_STEPS.observe(len(state["tokens"]) - 1, "lazy")
+    INPUT_TOKENS.observe(inputs["input_ids"].shape[1])
+
+    result = tokenizer.decode(state["tokens"], skip_special_tokens=True).strip()
+    record_response(result, "model")
+    REQUEST_SECONDS.observe(time.perf_counter() - start, "lazy")
+    if state["done"]:
+        cache.put(key, result)
+        return result, None, hidden
+    return result, state, gr.update(visible=True)
+
+
+def show_explanation(state: dict | None):
+    """Resume the decode saved by check_grammar_lazy() → full response, written to the result cache."""
+    hidden = gr.update(visible=False)
+    if state is None:
+        return gr.update(), None, hidden
+    t0, steps = time.perf_counter(), len(state["tokens"])
+    _greedy_continue(state)
+    DECODER_SECONDS.observe(time.perf_counter() - t0, "explain")
+    DECODE_STEPS.observe(len(state["tokens"]) - steps, "explain")
+    result = tokenizer.decode(state["tokens"], skip_special_tokens=True).strip()
+    cache.put(state["key"], result)
+    return result, None, hidden
+
+
+# ── 1d. Paragraph mode (same segmentation as src/paragraph.py) ──
+ABBREVIATIONS = {
+    "z.b.", "d.h.", "u.a.", "z.t.", "o.ä.", "u.u.", "usw.", "bzw.", "etc.", "ca.", "vgl.", "ggf.",
+    "evtl.", "inkl.", "bspw.", "sog.", "dr.", "prof.", "hr.", "fr.", "nr.", "str.", "tel.", "mio.",
+    "mrd.", "jh.", "st.", "abs.", "bzgl.", "min.", "max.", "geb.",
+}
+_SENTENCE_END = re.compile(r"[.!?…]+[\"'»«“”‚‘’)\]]*")
+_BLANK_LINE = re.compile(r"\n\s*\n")
+_OPENERS = "\"'„‚»«“‘(["
+
+
+def _is_boundary(text: str, start: int, end: int) -> bool:
+    rest = text[end:]
+    if not rest.strip():
+        return True
+    if not rest[0].isspace():
+        return False
+    nxt = rest.lstrip()[0]
+    if not (nxt.isupper() or nxt.isdigit() or nxt in _OPENERS):
+        return False
+    if text[start:end] != ".":
+        return True
+    token = text[:end].split()[-1].lower()
+    if token in ABBREVIATIONS:
+        return False
+    word = token[:-1].lstrip(_OPENERS)
+    return not (word.isdigit() or (len(word) == 1 and word.isalpha()))
+
+
+def split_sentences(text: str) -> list[tuple[int, int]]:
+    """Character spans (start, end) of the sentences in text."""
+    cuts = [m.end() for m in _SENTENCE_END.finditer(text) if _is_boundary(text, m.start(), m.end())]
+    cuts += [m.start() for m in _BLANK_LINE.finditer(text)]
+    spans, start = [], 0
+    for cut in sorted(set(cuts)) + [len(text)]:
+        chunk = text[start:cut]
+        if chunk.strip():
+            lead = len(chunk) - len(chunk.lstrip())
+            spans.append((start + lead, start + len(chunk.rstrip())))
+        start = cut
+    return spans
+
+
+def check_paragraph(text: str) -> str:
+    """Split → dedupe → one batched generate() → per-sentence Markdown with offsets."""
+    spans = split_sentences(text)
+    if not spans:
+        return "Будь ласка, введіть німецький текст."
+
+    start = time.perf_counter()
+    sentences = [normalize_text(text[s:e]) for s, e in spans]
+    responses: dict[str, str] = {}
+    for sentence in sentences:
+        cached = cache.get(f"{MODEL_VERSION}\x00{sentence}")
+        if cached is not None:
+            responses[sentence] = cached
+            record_response(cached, "cache")
+    pending = list(dict.fromkeys(s for s in sentences if s not in responses))
+
+    if pending:
+        inputs = tokenizer(pending, return_tensors="pt", padding=True, truncation=True, max_length=64)
+        output_ids = generate(inputs, "batch")
+        for sentence, ids in zip(pending, output_ids):
+            result = tokenizer.decode(ids, skip_special_tokens=True).strip()
+            cache.put(f"{MODEL_VERSION}\x00{sentence}", result)
+            responses[sentence] = result
+            record_response(result, "model")
+    REQUEST_SECONDS.observe(time.perf_counter() - start, "batch")
+
+    lines = []
+    for (start, end), sentence in zip(spans, sentences):
+        result = responses[sentence]
+        mark = "❌" if result.startswith("❌") else "✅"
+        lines.append(f"{mark} **{text[start:end]}**  `[{start}:{end}]`")
+        if mark == "❌":
+            lines.append("> " + result.replace("\n", "  \n> "))
+        lines.append("")
+    return "\n".join(lines)
 
 
 # ── 2. Premium UI ──
@@ -63,27 +491,50 @@ with gr.Blocks(title="Deutsch A2 Grammar Tutor", theme=theme) as demo:
     *Powered by a standard HF BART Encoder-Decoder Transformer.*
     """)
 
-    with gr.Row():
-        with gr.Column(scale=1):
-            input_text = gr.Textbox(
-                label="Your sentence",
-                placeholder="e.g., Ich habe nach Berlin gefahren.",
-                lines=3,
-            )
-            check_btn = gr.Button("Check Grammar", variant="primary")
+    with gr.Tab("Sentence"):
+        with gr.Row():
+            with gr.Column(scale=1):
+                input_text = gr.Textbox(
+                    label="Your sentence",
+                    placeholder="e.g., Ich habe nach Berlin gefahren.",
+                    lines=3,
+                )
+                check_btn = gr.Button("Check Grammar", variant="primary")
+                explain_btn = gr.Button("📝 Show explanation", visible=False)
+
+            with gr.Column(scale=1):
+                output_text = gr.Markdown(label="Result and Explanation")
+
+        gr.Examples(examples=[[e] for e in EXAMPLES], inputs=input_text)
+
+        decode_state = gr.State(None)
+        check_btn.click(fn=check_grammar_lazy, inputs=input_text, outputs=[output_text, decode_state, explain_btn])
+        explain_btn.click(fn=show_explanation, inputs=decode_state, outputs=[output_text, decode_state, explain_btn])
+        # API only: full response in one call, as before the lazy UI path (never clicked in the page)
+        api_btn = gr.Button(visible=False)
+        api_btn.click(fn=check_grammar, inputs=input_text, outputs=output_text, api_name="check_grammar")
 
-        with gr.Column(scale=1):
-            output_text = gr.Markdown(label="Result and Explanation")
+    with gr.Tab("Paragraph"):
+        with gr.Row():
+            with gr.Column(scale=1):
+                paragraph_text = gr.Textbox(
+                    label="Your text",
+                    placeholder="e.g., Heute ich spiele Fußball. Am 3. Mai war ich in Berlin. Ich habe den Auto.",
+                    lines=8,
+                )
+                paragraph_btn = gr.Button("Check Text", variant="primary")
 
-    examples = [
-        ["Ich habe den Auto."],
-        ["Wo du wohnst?"],
-        ["Ich habe nach Berlin gefahren."],
-    ]
+            with gr.Column(scale=1):
+                paragraph_output = gr.Markdown(label="Per-sentence results")
 
-    gr.Examples(examples=examples, inputs=input_text)
+        paragraph_btn.click(fn=check_paragraph, inputs=paragraph_text, outputs=paragraph_output)
 
-    check_btn.click(fn=check_grammar, inputs=input_text, outputs=output_text)
+    with gr.Tab("Stats"):
+        stats_btn = gr.Button("Refresh")
+        stats_output = gr.Markdown(label="Inference metrics")
+        prometheus_output = gr.Code(label="Prometheus text format", language=None)
+        stats_btn.click(fn=lambda: (stats_markdown(), metrics_text()), outputs=[stats_output, prometheus_output],
+                        api_name="metrics")
 
     gr.Markdown("""
     ---
@@ -92,6 +543,10 @@ with gr.Blocks(title="Deutsch A2 Grammar Tutor", theme=theme) as demo:
     2. The model will analyze the structure.
     3. If there's an error, you'll get a **Correction** and a detailed **Explanation in Ukrainian**.
     """)
+    gr.Markdown(f"<sub>Model: {STARTUP['source']} · load {STARTUP['load_s']:.1f}s · "
+                f"warm-up {STARTUP['warmup_s']:.1f}s</sub>")
 
 if __name__ == "__main__":
+    # Model load + warm-up already ran above: the port opens only once we are ready
+    print(f"🚀 Ready — serving (startup {STARTUP['total_s']:.2f}s)")
     demo.launch()
@@ -0,0 +1,141 @@
+"""
+scripts/bench_attention.py — Attention backend benchmark: "sdpa" vs "eager" (model.attn_implementation).
+
+Both backends get the same weights; per backend:
+
+  training step   → forward + backward + AdamW on a [training.batch_size × T] batch,
+                    T ∈ --seq-lens (random tokens, dropout on — like src/train.py)
+  greedy decode   → generate_response() per sentence of tests/test_data.json (ms/sentence)
+  parity          → max |Δ logits| against the first backend on one teacher-forced batch
+
+The median of --runs timed repeats is reported (after one warm-up).
+
+Usage:
+    python scripts/bench_attention.py
+    python scripts/bench_attention.py --model model_final --runs 5 --seq-lens 16 32 64
+    python scripts/bench_attention.py --json /tmp/attention.json
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import torch
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.config import load_config  # noqa: E402
+from src.inference import generate_response, load_hf_model  # noqa: E402
+from src.model.model import ATTN_IMPLEMENTATIONS, create_model  # noqa: E402
+from src.tokenizer.tokenizer import Tokenizer  # noqa: E402
+
+
+def median_seconds(fn, runs: int) -> float:
+    fn()                                        # warm-up
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def build_model(backend: str, model_dir: Path, config, tokenizer):
+    if (model_dir / "model.safetensors").exists():
+        return load_hf_model(model_dir, "cpu", backend)
+    torch.manual_seed(0)
+    config.model.attn_implementation = backend
+    return create_model(config, tokenizer).eval()
+
+
+def training_step_ms(model, config, seq_len: int, runs: int) -> float:
+    model.train()
+    optimizer = torch.optim.AdamW(model.parameters(), lr=0.0)     # lr 0: timing only, weights unchanged
+    generator = torch.Generator().manual_seed(0)
+    shape = (config.training.batch_size, seq_len)
+    src = torch.randint(4, model.config.vocab_size, shape, generator=generator)
+    tgt = torch.randint(4, model.config.vocab_size, shape, generator=generator)
+
+    def step():
+        loss = model(input_ids=src, decoder_input_ids=tgt, labels=tgt).loss
+        loss.backward()
+        optimizer.step()
+        optimizer.zero_grad(set_to_none=True)
+
+    ms = median_seconds(step, runs) * 1000
+    model.eval()
+    return ms
+
+
+def decode_ms(model, tokenizer, config, texts: list[str], runs: int) -> float:
+    def run():
+        for text in texts:
+            generate_response(text, model, tokenizer, config, "cpu", config.model.max_seq_len)
+
+    return median_seconds(run, runs) * 1000 / len(texts)
+
+
+@torch.no_grad()
+def logits(model, tokenizer, texts: list[str]) -> torch.Tensor:
+    ids = [tokenizer.encode(t, add_bos=True, add_eos=True) for t in texts]
+    width = max(len(i) for i in ids)
+    input_ids = torch.tensor([i + [tokenizer.pad_id] * (width - len(i)) for i in ids])
+    mask = (input_ids != tokenizer.pad_id).long()
+    return model(input_ids=input_ids, attention_mask=mask, decoder_input_ids=input_ids,
+                 decoder_attention_mask=mask).logits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare attention backends: training step + greedy decode")
+    parser.add_argument("--model", type=str, default="model_final", help="HF model dir (random weights if missing)")
+    parser.add_argument("--backends", type=str, nargs="+", default=list(ATTN_IMPLEMENTATIONS))
+    parser.add_argument("--seq-lens", type=int, nargs="+", default=[16, 32, 64])
+    parser.add_argument("--sentences", type=int, default=20, help="Test sentences timed for decoding")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--json", type=str, default=None, help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    config = load_config()
+    tokenizer = Tokenizer(PROJECT_ROOT / "src/tokenizer/tokenizer.json")
+    model_dir = PROJECT_ROOT / args.model
+    if not (model_dir / "model.safetensors").exists():
+        print(f"⚠️  No weights in {model_dir} — timing a randomly initialised model of the configured size")
+    with open(PROJECT_ROOT / "tests/test_data.json", "r", encoding="utf-8") as f:
+        texts = list(dict.fromkeys(item["input"] for item in json.load(f)))[:args.sentences]
+
+    print(f"\n⏱️  Attention backends {args.backends}: batch {config.training.batch_size}, "
+          f"T {args.seq_lens}, {len(texts)} sentences, {torch.get_num_threads()} threads, median of {args.runs}")
+    results, reference = {}, None
+    for backend in args.backends:
+        model = build_model(backend, model_dir, config, tokenizer)
+        out = logits(model, tokenizer, texts)
+        reference = out if reference is None else reference
+        results[backend] = {
+            "train_ms": {t: training_step_ms(model, config, t, args.runs) for t in args.seq_lens},
+            "decode_ms_per_sentence": decode_ms(model, tokenizer, config, texts, args.runs),
+            "max_abs_logit_diff": (out - reference).abs().max().item(),
+        }
+
+    print(f"\n  {'backend':<8} " + " ".join(f"{'train T=' + str(t):>12}" for t in args.seq_lens)
+          + f" {'decode/sent':>12} {'max Δlogit':>11}")
+    for backend, r in results.items():
+        print(f"  {backend:<8} " + " ".join(f"{r['train_ms'][t]:>9.1f} ms" for t in args.seq_lens)
+              + f" {r['decode_ms_per_sentence']:>9.2f} ms {r['max_abs_logit_diff']:>11.2e}")
+    if len(results) > 1:
+        first, *others = args.backends
+        for backend in others:
+            speedups = ", ".join(f"T={t} ×{results[backend]['train_ms'][t] / results[first]['train_ms'][t]:.2f}"
+                                 for t in args.seq_lens)
+            decode = results[backend]["decode_ms_per_sentence"] / results[first]["decode_ms_per_sentence"]
+            print(f"\n  {backend} / {first}: training {speedups}; decode ×{decode:.2f}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
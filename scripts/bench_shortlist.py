@@ -0,0 +1,118 @@
+"""
+scripts/bench_shortlist.py — Output-vocabulary shortlist benchmark (src/shortlist.py).
+
+Greedy decode time per sentence of tests/test_data.json for:
+
+  generate        → generate_response() (HF model.generate, full LM head)
+  full vocab      → ShortlistDecoder with S = whole vocabulary, no parity check
+                    (same decode loop, isolates the LM-head saving)
+  shortlist @ r   → ShortlistDecoder over output_vocab.json, parity check on a
+                    fraction r of calls (--verify-rates); fallbacks re-decode
+                    with generate_response()
+
+The output vocabulary is read from <model>/output_vocab.json, else mined from
+data.train_path / data.val_path like `python -m src.shortlist`, else from the
+test-set corrections. The median of --runs timed repeats is
+reported (after one warm-up).
+
+Usage:
+    python scripts/bench_shortlist.py
+    python scripts/bench_shortlist.py --model model_final --verify-rates 1.0 0.05 0
+    python scripts/bench_shortlist.py --json /tmp/shortlist.json
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import torch
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.config import load_config  # noqa: E402
+from src.inference import generate_response, load_hf_model  # noqa: E402
+from src.model.model import create_model  # noqa: E402
+from src.shortlist import ShortlistDecoder, build_output_vocab, load_output_vocab  # noqa: E402
+from src.tokenizer.tokenizer import Tokenizer  # noqa: E402
+
+SCAFFOLD = "❌ Incorrect. ✅ Correct: 📝 Пояснення:"
+
+
+def median_seconds(fn, runs: int) -> float:
+    fn()                                        # warm-up
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time greedy decoding with and without the output shortlist")
+    parser.add_argument("--model", type=str, default="model_final", help="HF model dir (random weights if missing)")
+    parser.add_argument("--verify-rates", type=float, nargs="+", default=[1.0, 0.05, 0.0])
+    parser.add_argument("--sentences", type=int, default=20, help="Test sentences timed for decoding")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--json", type=str, default=None, help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    config = load_config()
+    tokenizer = Tokenizer(PROJECT_ROOT / "src/tokenizer/tokenizer.json")
+    model_dir = PROJECT_ROOT / args.model
+    if (model_dir / "model.safetensors").exists():
+        model = load_hf_model(model_dir, "cpu", config.model.attn_implementation)
+    else:
+        print(f"⚠️  No weights in {model_dir} — timing a randomly initialised model of the configured size")
+        torch.manual_seed(0)
+        model = create_model(config, tokenizer).eval()
+    with open(PROJECT_ROOT / "tests/test_data.json", "r", encoding="utf-8") as f:
+        items = json.load(f)
+    texts = list(dict.fromkeys(item["input"] for item in items))[:args.sentences]
+    output_vocab = load_output_vocab(model_dir)
+    data_paths = [config.data.train_path, config.data.val_path]
+    if output_vocab is None and all((PROJECT_ROOT / p).exists() for p in data_paths):
+        output_vocab = build_output_vocab([PROJECT_ROOT / p for p in data_paths], tokenizer)
+    elif output_vocab is None:
+        # No training data either: the verdict scaffold plus the test-set corrections
+        ids = {tokenizer.eos_id}
+        for line in [SCAFFOLD] + [item["expected_correction"] or "" for item in items]:
+            ids.update(tokenizer.encode(line, add_bos=False, add_eos=False))
+        output_vocab = sorted(ids)
+    max_len = config.model.max_seq_len
+
+    def per_sentence_ms(decode) -> float:
+        return median_seconds(lambda: [decode(text) for text in texts], args.runs) * 1000 / len(texts)
+
+    print(f"\n⏱️  Shortlist: |S| = {len(output_vocab)}/{tokenizer.vocab_size}, {len(texts)} sentences, "
+          f"{torch.get_num_threads()} threads, median of {args.runs}")
+    results = {"generate": {"ms_per_sentence": per_sentence_ms(
+        lambda text: generate_response(text, model, tokenizer, config, "cpu", max_len))}}
+    full = ShortlistDecoder(model, tokenizer, list(range(tokenizer.vocab_size)), verify_rate=0.0)
+    results["full vocab"] = {"ms_per_sentence": per_sentence_ms(
+        lambda text: full.generate(text, config, "cpu", max_len))}
+    for rate in args.verify_rates:
+        decoder = ShortlistDecoder(model, tokenizer, output_vocab, verify_rate=rate)
+        ms = per_sentence_ms(lambda text: decoder.generate(text, config, "cpu", max_len))
+        results[f"shortlist @ {rate:g}"] = {
+            "ms_per_sentence": ms,
+            "verified": decoder.verified / decoder.calls,
+            "fallbacks": decoder.fallbacks / decoder.calls,
+        }
+
+    base = results["generate"]["ms_per_sentence"]
+    print(f"\n  {'path':<18} {'decode/sent':>12} {'vs generate':>12} {'verified':>9} {'fallbacks':>10}")
+    for name, r in results.items():
+        checked = f"{r['verified']:>8.0%} {r['fallbacks']:>10.0%}" if "verified" in r else f"{'':>8} {'':>10}"
+        print(f"  {name:<18} {r['ms_per_sentence']:>9.2f} ms {base / r['ms_per_sentence']:>11.2f}× {checked}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
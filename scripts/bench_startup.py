@@ -0,0 +1,157 @@
+"""
+scripts/bench_startup.py — Cold-start benchmark: import time, --help, model load, first token.
+
+Every measurement runs in a fresh interpreter (nothing cached in sys.modules),
+repeated --runs times; the median is reported.
+
+  import src.X          → seconds, and whether torch / transformers got imported
+  generate --help       → wall time of the whole CLI process
+  model load            → from_pretrained() vs load_hf_model() (meta + mmap safetensors)
+  first token           → process start → tokenizer + model loaded → first decoder token
+  first response        → same, full greedy response
+
+With --check the script exits 1 when the CLI entry point imports torch /
+transformers again or --help exceeds --max-help-ms (use in CI).
+
+Usage:
+    python scripts/bench_startup.py
+    python scripts/bench_startup.py --model model_final --runs 5
+    python scripts/bench_startup.py --check --max-help-ms 1500
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+IMPORT_PROBE = """
+import json, sys, time
+t = time.perf_counter()
+import {module}
+print(json.dumps({{"seconds": time.perf_counter() - t,
+       "torch": "torch" in sys.modules, "transformers": "transformers" in sys.modules}}))
+"""
+
+LOAD_PROBE = """
+import json, time
+import torch
+from transformers import BartForConditionalGeneration
+from src.inference import load_hf_model
+t = time.perf_counter()
+{call}
+print(json.dumps({{"seconds": time.perf_counter() - t}}))
+"""
+
+FIRST_TOKEN_PROBE = """
+import time
+t0 = time.perf_counter()
+import json
+import torch
+from src.inference import load_hf_model
+from src.tokenizer.tokenizer import Tokenizer
+tokenizer = Tokenizer()
+model = load_hf_model({model_dir!r})
+t_loaded = time.perf_counter()
+input_ids = torch.tensor([tokenizer.encode({text!r}, add_bos=True, add_eos=True)])
+with torch.no_grad():
+    model.generate(input_ids=input_ids, max_new_tokens=1, num_beams=1, do_sample=False)
+    t_first = time.perf_counter()
+    model.generate(input_ids=input_ids, max_length=64, num_beams=1, do_sample=False)
+t_full = time.perf_counter()
+print(json.dumps({{"loaded": t_loaded - t0, "first_token": t_first - t0, "first_response": t_full - t0}}))
+"""
+
+
+def run_probe(code: str) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def median_of(runs: int, fn) -> dict:
+    samples = [fn() for _ in range(runs)]
+    merged = dict(samples[0])
+    for key, value in samples[0].items():
+        if isinstance(value, float):
+            merged[key] = statistics.median(s[key] for s in samples)
+    return merged
+
+
+def wall_time(cmd: list[str]) -> dict:
+    start = time.perf_counter()
+    subprocess.run(cmd, cwd=PROJECT_ROOT, capture_output=True, text=True)
+    return {"seconds": time.perf_counter() - start}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure CLI import time, model load and first-token latency")
+    parser.add_argument("--model", type=str, default="model_final", help="HF model directory (skipped if missing)")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--text", type=str, default="Ich habe den Auto.")
+    parser.add_argument("--check", action="store_true", help="Exit 1 on a startup regression")
+    parser.add_argument("--max-help-ms", type=float, default=1500.0)
+    parser.add_argument("--json", type=str, default=None, help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    results: dict = {"imports": {}}
+    print(f"\n⏱️  Cold-start benchmark (median of {args.runs} fresh processes)\n")
+
+    print(f"  {'import':<28} {'seconds':>8}  torch  transformers")
+    for module in ("src.config", "src.tokenizer.tokenizer", "src.cache", "src.generate", "src.inference"):
+        r = median_of(args.runs, lambda: run_probe(IMPORT_PROBE.format(module=module)))
+        results["imports"][module] = r
+        print(f"  {module:<28} {r['seconds']:>8.3f}  {'yes' if r['torch'] else 'no':>5}  "
+              f"{'yes' if r['transformers'] else 'no':>12}")
+
+    help_r = median_of(args.runs, lambda: wall_time([sys.executable, "-m", "src.generate", "--help"]))
+    results["help_seconds"] = help_r["seconds"]
+    print(f"\n  python -m src.generate --help   {help_r['seconds'] * 1000:8.0f} ms")
+
+    model_dir = Path(args.model)
+    if not model_dir.is_absolute():
+        model_dir = PROJECT_ROOT / model_dir
+    if model_dir.exists():
+        print(f"\n  model load ({model_dir.name})")
+        for name, call in (
+            ("from_pretrained", f"BartForConditionalGeneration.from_pretrained({str(model_dir)!r}).eval()"),
+            ("load_hf_model", f"load_hf_model({str(model_dir)!r})"),
+        ):
+            r = median_of(args.runs, lambda: run_probe(LOAD_PROBE.format(call=call)))
+            results[f"load_{name}_seconds"] = r["seconds"]
+            print(f"    {name:<26} {r['seconds'] * 1000:8.1f} ms")
+
+        r = median_of(args.runs, lambda: run_probe(FIRST_TOKEN_PROBE.format(model_dir=str(model_dir), text=args.text)))
+        results.update(first_token=r)
+        print(f"\n  process start → model loaded   {r['loaded'] * 1000:8.0f} ms")
+        print(f"  process start → first token    {r['first_token'] * 1000:8.0f} ms")
+        print(f"  process start → full response  {r['first_response'] * 1000:8.0f} ms")
+    else:
+        print(f"\n  ⚠️  {model_dir} not found — skipping model load / first-token latency")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.check:
+        cli = results["imports"]["src.generate"]
+        failures = []
+        if cli["torch"] or cli["transformers"]:
+            failures.append("import src.generate pulls in torch/transformers")
+        if results["help_seconds"] * 1000 > args.max_help_ms:
+            failures.append(f"--help took {results['help_seconds'] * 1000:.0f} ms > {args.max_help_ms:.0f} ms")
+        for failure in failures:
+            print(f"❌ {failure}")
+        if failures:
+            sys.exit(1)
+        print("\n✅ Startup within budget")
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,8 @@
-"""Upload hf_space/ to Hugging Face Space. Uses env TOKEN (HF_TOKEN or HG_TOKEN)."""
+"""Upload hf_space/ to Hugging Face Space. Uses env TOKEN (HF_TOKEN or HG_TOKEN).
+
+BUNDLE_MODEL=1 also uploads hf_export/ as the Space's model/ snapshot, so the
+app cold-starts from local files instead of downloading MODEL_ID.
+"""
 import os
 from pathlib import Path
 
@@ -21,3 +25,15 @@ api.upload_folder(
     token=token,
 )
 print("Uploaded hf_space/ to kengurukleo/deutsch-a2-tutor (Space)")
+
+if os.environ.get("BUNDLE_MODEL", "").strip() and (repo_root / "hf_export" / "model.safetensors").exists():
+    api.upload_folder(
+        folder_path=str(repo_root / "hf_export"),
+        path_in_repo="model",
+        repo_id="kengurukleo/deutsch-a2-tutor",
+        repo_type="space",
+        token=token,
+        allow_patterns=["config.json", "generation_config.json", "model.safetensors",
+                        "tokenizer.json", "tokenizer_config.json"],
+    )
+    print("Uploaded hf_export/ as model/ snapshot (offline cold start)")
@@ -0,0 +1,228 @@
+"""
+autotune.py — Thread-count / CPU-affinity / batch-size sweep for this machine.
+
+torch's defaults (one intra-op thread per core, no pinning) are tuned for
+large matrices. A 256-dim model does tiny GEMMs per decoder step, so on a
+many-core box the OpenMP fan-out/join costs more than the math and
+batch-size-1 latency gets *worse* with more threads. The sweep measures
+instead of guessing:
+
+    inference:  threads × {unpinned, pinned to the first N cores} × batch sizes
+                → generate_responses() latency (ms/sentence) and throughput (sent/s)
+    training:   threads → one forward + backward + AdamW step (training.batch_size)
+
+Picks (the fewest threads within TOLERANCE of the best, so noise never buys
+oversubscription):
+    num_threads           best batch-size-1 latency   (interactive checks)
+    pin_cpus              whether pinning helped at that point
+    batch_size            best throughput at num_threads (generate.py --input)
+    training_num_threads  fastest training step
+
+and writes them to tune_profile.json next to config.yaml. load_config()
+fills its `runtime` section from that file (explicit config.yaml values win)
+and applies it; a profile measured on a different machine is ignored.
+
+Usage:
+    python -m src.autotune                              # sweep, print curves, save profile
+    python -m src.autotune --threads 1 2 4 --batch-sizes 1 16 --no-training
+    python -m src.autotune --dry-run --json /tmp/curves.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import time
+
+import torch
+
+from src.config import (
+    Config, TUNE_PROFILE_FILE, USABLE_CPUS, get_project_root, load_config, machine_fingerprint,
+)
+from src.inference import generate_responses, load_hf_model
+from src.model.model import create_model
+from src.tokenizer.tokenizer import Tokenizer
+
+TOLERANCE = 0.05
+
+
+def default_thread_counts() -> list[int]:
+    """1, 2, 4, … up to the usable CPUs, plus the usable CPU count itself."""
+    usable = len(USABLE_CPUS) or os.cpu_count() or 1
+    counts = {usable}
+    n = 1
+    while n < usable:
+        counts.add(n)
+        n *= 2
+    return sorted(counts)
+
+
+def _set_threads(threads: int, pin: bool) -> None:
+    torch.set_num_threads(threads)
+    if USABLE_CPUS:
+        os.sched_setaffinity(0, USABLE_CPUS[:threads] if pin else USABLE_CPUS)
+
+
+def _median_seconds(fn, runs: int) -> float:
+    fn()                                        # warm-up (allocator, OpenMP pool)
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def _pick(times: dict, tolerance: float = TOLERANCE):
+    """Key with the fewest threads whose time is within tolerance of the best (keys sort by threads)."""
+    best = min(times.values())
+    return min((k for k, t in times.items() if t <= best * (1 + tolerance)), key=lambda k: k[0])
+
+
+def sweep_inference(
+    model,
+    tokenizer: Tokenizer,
+    config: Config,
+    texts: list[str],
+    threads: list[int],
+    batch_sizes: list[int],
+    pin_options: list[bool],
+    runs: int = 3,
+) -> list[dict]:
+    """One row per (pin, threads, batch size): seconds per call, ms/sentence, sentences/s."""
+    rows = []
+    for pin in pin_options:
+        for n in threads:
+            _set_threads(n, pin)
+            for bs in batch_sizes:
+                batch = texts[:bs]
+                seconds = _median_seconds(
+                    lambda: generate_responses(batch, model, tokenizer, config, "cpu", config.model.max_seq_len,
+                                               batch_size=bs),
+                    runs,
+                )
+                rows.append({"pin": pin, "threads": n, "batch_size": bs, "seconds": seconds,
+                             "ms_per_sentence": seconds / len(batch) * 1000,
+                             "sentences_per_s": len(batch) / seconds})
+    return rows
+
+
+def sweep_training(
+    tokenizer: Tokenizer,
+    config: Config,
+    threads: list[int],
+    pin: bool,
+    runs: int = 3,
+) -> list[dict]:
+    """One row per thread count: ms per forward + backward + optimizer step on a full-length batch."""
+    torch.manual_seed(0)
+    model = create_model(config, tokenizer)     # private copy: the step changes the weights
+    model.train()
+    optimizer = torch.optim.AdamW(model.parameters(), lr=float(config.training.learning_rate))
+    shape = (config.training.batch_size, config.model.max_seq_len)
+    src = torch.randint(4, model.config.vocab_size, shape)
+    tgt = torch.randint(4, model.config.vocab_size, shape)
+
+    def step():
+        loss = model(input_ids=src, decoder_input_ids=tgt, labels=tgt).loss
+        loss.backward()
+        optimizer.step()
+        optimizer.zero_grad(set_to_none=True)
+
+    rows = []
+    for n in threads:
+        _set_threads(n, pin)
+        rows.append({"threads": n, "ms_per_step": _median_seconds(step, runs) * 1000})
+    return rows
+
+
+def choose_runtime(inference: list[dict], training: list[dict]) -> dict:
+    """Profile `runtime` section from the measured curves."""
+    smallest = min(r["batch_size"] for r in inference)
+    latency = {(r["threads"], r["pin"]): r["ms_per_sentence"] for r in inference if r["batch_size"] == smallest}
+    threads, pin = _pick(latency)
+    throughput = {r["batch_size"]: r["sentences_per_s"] for r in inference
+                  if r["threads"] == threads and r["pin"] == pin}
+    runtime = {
+        "num_threads": threads,
+        "pin_cpus": pin,
+        "batch_size": max(throughput, key=lambda b: throughput[b]),
+    }
+    if training:
+        runtime["training_num_threads"] = _pick({(r["threads"],): r["ms_per_step"] for r in training})[0]
+    return runtime
+
+
+def print_curves(inference: list[dict], training: list[dict]) -> None:
+    batch_sizes = sorted({r["batch_size"] for r in inference})
+    for pin in sorted({r["pin"] for r in inference}):
+        print(f"\n  inference ({'pinned' if pin else 'unpinned'}) — ms/sentence | sentences/s")
+        print(f"  {'threads':>7} " + " ".join(f"{'bs=' + str(bs):>17}" for bs in batch_sizes))
+        for n in sorted({r["threads"] for r in inference}):
+            cells = {r["batch_size"]: r for r in inference if r["pin"] == pin and r["threads"] == n}
+            print(f"  {n:>7} " + " ".join(
+                f"{cells[bs]['ms_per_sentence']:>8.1f} |{cells[bs]['sentences_per_s']:>7.1f}" for bs in batch_sizes))
+    if training:
+        print("\n  training step — ms/step")
+        for r in training:
+            print(f"  {r['threads']:>7} {r['ms_per_step']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep threads / pinning / batch size and save a tuning profile")
+    parser.add_argument("--model", type=str, default="model_final", help="HF model dir (random weights if missing)")
+    parser.add_argument("--threads", type=int, nargs="+", default=None, help="Default: 1, 2, 4, … usable CPUs")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--runs", type=int, default=3, help="Timed repeats per point (median)")
+    parser.add_argument("--no-pin", action="store_true", help="Skip the pinned-affinity sweep")
+    parser.add_argument("--no-training", action="store_true", help="Skip the training-step sweep")
+    parser.add_argument("--dry-run", action="store_true", help=f"Do not write {TUNE_PROFILE_FILE}")
+    parser.add_argument("--json", type=str, default=None, help="Also write the curves to this JSON file")
+    args = parser.parse_args()
+
+    config = load_config(apply=False)           # measure from torch defaults, not a previous profile
+    project_root = get_project_root()
+    tokenizer = Tokenizer(project_root / "src/tokenizer/tokenizer.json")
+    model_dir = project_root / args.model
+    if (model_dir / "model.safetensors").exists():
+        model = load_hf_model(model_dir, "cpu", config.model.attn_implementation)
+    else:
+        print(f"⚠️  No weights in {model_dir} — timing a randomly initialised model of the configured size")
+        torch.manual_seed(0)
+        model = create_model(config, tokenizer).eval()
+
+    with open(project_root / "tests/test_data.json", "r", encoding="utf-8") as f:
+        texts = list(dict.fromkeys(item["input"] for item in json.load(f)))
+    threads = args.threads or default_thread_counts()
+    pin_options = [False] + ([True] if USABLE_CPUS and len(USABLE_CPUS) > 1 and not args.no_pin else [])
+    print(f"\n🔧 Autotune: threads {threads}, batch sizes {args.batch_sizes}, "
+          f"{len(USABLE_CPUS) or os.cpu_count()} usable CPUs, median of {args.runs}")
+
+    inference = sweep_inference(model, tokenizer, config, texts, threads, args.batch_sizes, pin_options, args.runs)
+    runtime = choose_runtime(inference, [])
+    training = [] if args.no_training else sweep_training(tokenizer, config, threads, runtime["pin_cpus"], args.runs)
+    runtime = choose_runtime(inference, training)
+    _set_threads(max(threads), False)
+    print_curves(inference, training)
+
+    profile = {
+        "machine": machine_fingerprint(),
+        "torch": torch.__version__,
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "runtime": runtime,
+        "curves": {"inference": inference, "training": training},
+    }
+    print(f"\n✅ Best: {json.dumps(runtime)}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(profile, f, indent=2)
+    if not args.dry_run:
+        path = project_root / TUNE_PROFILE_FILE
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(profile, f, indent=2)
+        print(f"💾 Saved {path} — load_config() applies it from now on")
+    print()
+
+
+if __name__ == "__main__":
+    main()
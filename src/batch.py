@@ -0,0 +1,186 @@
+"""
+batch.py — Streaming batch mode for src/generate.py (--input / --output).
+
+Reads sentences line by line from a file or stdin, checks them in batches
+with generate_responses() and writes one result per input line, in input
+order, as soon as its batch is done:
+
+    reader thread ──► Queue(maxsize=window) ──► batches of ≤ batch_size ──► writer
+                       (bounded in-flight)       (one generate() each)
+
+Only `window` lines are ever buffered, so arbitrarily large files (or an
+endless stdin pipe) run in constant memory, and reading/parsing overlaps
+with model compute.
+
+With a WorkerPool (src/pool.py, --workers N) up to N batches are in flight
+at once — one per worker — and results are still written in input order.
+
+Input lines:   {"input": "...", ...}  JSONL (extra fields are passed through)
+               plain text             one sentence per line
+Output lines:  jsonl → {..., "input": ..., "output": ...}
+               text  → the response with newlines shown as " | "
+
+Usage:
+    python -m src.generate --input data/val.jsonl --output /tmp/val_out.jsonl
+    python -m src.generate --input data/val.jsonl --output /tmp/val_out.jsonl --workers 8
+    cat sentences.txt | python -m src.generate --input - --output - --output-format text
+"""
+
+from __future__ import annotations
+
+import json
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, TextIO
+
+from src.cache import ResultCache, SQLiteResultCache
+from src.config import Config
+from src.inference import generate_responses
+from src.pool import WorkerPool
+from src.tokenizer.tokenizer import Tokenizer
+
+if TYPE_CHECKING:
+    from transformers import BartForConditionalGeneration
+
+_EOF = object()
+
+
+def parse_line(line: str) -> dict | None:
+    """JSONL record with "input" (or "text"), or a plain-text sentence; None for blank lines."""
+    line = line.strip()
+    if not line:
+        return None
+    if line.startswith("{"):
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            return {"input": line}
+        if "input" not in record and "text" in record:
+            record["input"] = record["text"]
+        if isinstance(record.get("input"), str):
+            return record
+    return {"input": line}
+
+
+def format_result(record: dict, output_format: str) -> str:
+    if output_format == "text":
+        return record["output"].replace("\n", " | ")
+    return json.dumps(record, ensure_ascii=False)
+
+
+def stream_check(
+    in_stream: TextIO,
+    out_stream: TextIO,
+    model: BartForConditionalGeneration,
+    tokenizer: Tokenizer,
+    config: Config,
+    device: str,
+    batch_size: int = 32,
+    window: int = 256,
+    output_format: str = "jsonl",
+    cache: ResultCache | SQLiteResultCache | None = None,
+    pool: WorkerPool | None = None,
+) -> dict:
+    """
+    Check every line of in_stream and write results to out_stream.
+
+    With a pool, batches go to its workers and up to pool.n_workers batches
+    are decoded concurrently; the result cache then belongs to the pool
+    (WorkerPool(cache=...)), so passing both is an error.
+
+    An error while reading in_stream is re-raised here once the sentences
+    read before it have been checked and written.
+
+    Returns:
+        {"sentences", "batches", "seconds", "sentences_per_sec", "model_seconds"}
+    """
+    if pool is not None and cache is not None:
+        raise ValueError("stream_check: give the cache to WorkerPool(cache=...), not to stream_check()")
+    pending: queue.Queue = queue.Queue(maxsize=max(window, batch_size))
+
+    errors: list[BaseException] = []
+
+    def reader():
+        # Always end with _EOF: a failing input (e.g. UnicodeDecodeError) must not leave the main loop waiting
+        try:
+            for line in in_stream:
+                record = parse_line(line)
+                if record is not None:
+                    pending.put(record)
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            pending.put(_EOF)
+
+    threading.Thread(target=reader, daemon=True).start()
+
+    start = time.perf_counter()
+    model_seconds = 0.0
+    n_sentences = n_batches = 0
+    inflight: deque = deque()           # (batch, pool Future) in submission order
+
+    def write(batch: list[dict], responses: list[str]) -> None:
+        for record, response in zip(batch, responses):
+            out_stream.write(format_result({**record, "output": response}, output_format) + "\n")
+        out_stream.flush()
+
+    done = False
+    while not done:
+        # Block for the first record, then take whatever is already queued (≤ batch_size)
+        batch = []
+        item = pending.get()
+        while item is not _EOF:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                break
+            try:
+                item = pending.get_nowait()
+            except queue.Empty:
+                break
+        done = item is _EOF
+        if batch:
+            n_sentences += len(batch)
+            n_batches += 1
+        if pool is not None:
+            if batch:
+                inflight.append((batch, pool.submit([r["input"] for r in batch])))
+            # Keep every worker busy; write the oldest batch once its result is in
+            while inflight and (len(inflight) > pool.n_workers or done or inflight[0][1].done()):
+                t0 = time.perf_counter()
+                oldest, future = inflight.popleft()
+                responses = future.result()
+                model_seconds += time.perf_counter() - t0
+                write(oldest, responses)
+            continue
+        if not batch:
+            continue
+
+        t0 = time.perf_counter()
+        responses = generate_responses(
+            [r["input"] for r in batch], model, tokenizer, config, device,
+            max_len=config.model.max_seq_len, batch_size=batch_size, cache=cache,
+        )
+        model_seconds += time.perf_counter() - t0
+        write(batch, responses)
+
+    if errors:
+        raise errors[0]             # sentences read before the error have been written
+    seconds = time.perf_counter() - start
+    return {
+        "sentences": n_sentences,
+        "batches": n_batches,
+        "seconds": seconds,
+        "sentences_per_sec": n_sentences / seconds if seconds else 0.0,
+        "model_seconds": model_seconds,
+    }
+
+
+def print_summary(stats: dict, file: TextIO = sys.stderr) -> None:
+    avg = stats["sentences"] / max(stats["batches"], 1)
+    print(f"📊 {stats['sentences']} sentences in {stats['seconds']:.2f}s "
+          f"→ {stats['sentences_per_sec']:.1f} sentences/s "
+          f"({stats['batches']} batches, avg size {avg:.1f}, model time {stats['model_seconds']:.2f}s)",
+          file=file)
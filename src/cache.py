@@ -0,0 +1,288 @@
+"""
+cache.py — LRU/TTL result cache for grammar checks (in-process or shared SQLite).
+
+Learners resubmit the same sentences constantly (UI examples, shared homework),
+so a repeated sentence should cost one dictionary lookup instead of a full
+encode → decode.
+
+Key   = model version  +  normalize_text(input)
+Value = model response string
+
+normalize_text():
+  - Unicode NFC (composed ü vs u + ◌̈ are the same sentence)
+  - whitespace runs → one space, stripped
+  - no space before, and no repeats of, the trailing punctuation ("Zeit . " → "Zeit.", "??" → "?")
+
+The model is always run on the normalized text, so a cached answer is exactly
+what the model would return for every input that maps to the same key.
+
+Two backends with the same get() / put() / stats() interface:
+  - ResultCache        in-process OrderedDict (dies with the process)
+  - SQLiteResultCache  one SQLite file (WAL) shared by all worker processes,
+                       survives restarts and deploys; size-bounded LRU eviction
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+
+from src.config import Config
+
+_WS = re.compile(r"\s+")
+_TRAILING_PUNCT = re.compile(r"\s*([.!?])[\s.!?]*$")
+
+
+def normalize_text(text: str) -> str:
+    text = unicodedata.normalize("NFC", text)
+    text = _WS.sub(" ", text).strip()
+    return _TRAILING_PUNCT.sub(r"\1", text)
+
+
+def model_version(model_path: str | Path) -> str:
+    """
+    Short content hash of a model directory's weights (+ config).
+
+    Two directories with identical weights share cache entries; any retrain
+    or re-export changes the version and invalidates them.
+    """
+    model_path = Path(model_path)
+    h = hashlib.sha256()
+    for name in ("config.json", "model.safetensors"):
+        path = model_path / name
+        if not path.exists():
+            continue
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    return h.hexdigest()[:16]
+
+
+class ResultCache:
+    """
+    Thread-safe bounded LRU cache with optional TTL.
+
+    Counters: hits, misses, evictions (LRU capacity), expirations (TTL).
+    """
+
+    def __init__(self, max_size: int = 4096, ttl: float = 0.0, version: str = ""):
+        self.max_size = max_size
+        self.ttl = ttl            # seconds; 0 = entries never expire
+        self.version = version
+        self._data: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def key(self, text: str) -> str:
+        return f"{self.version}\x00{normalize_text(text)}"
+
+    def get(self, text: str) -> str | None:
+        key = self.key(text)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, value = entry
+            if self.ttl and time.monotonic() - stored_at > self.ttl:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, text: str, value: str) -> None:
+        key = self.key(text)
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class SQLiteResultCache:
+    """
+    Persistent result cache in a single SQLite file.
+
+    Safe for concurrent use by many processes (WAL journal + busy timeout)
+    and threads (one connection per process, guarded by a lock; reopened
+    after fork). Eviction is approximate LRU on the `accessed` column and
+    runs every `evict_every` writes. TTL uses wall-clock time so it is
+    consistent across processes and restarts.
+
+    Counters (hits / misses / evictions / expirations) are per process.
+    """
+
+    # Don't turn every hit into a write: refresh `accessed` at most this often
+    TOUCH_INTERVAL = 60.0
+
+    def __init__(
+        self,
+        path: str | Path,
+        max_size: int = 100_000,
+        ttl: float = 0.0,
+        version: str = "",
+        evict_every: int = 256,
+    ):
+        self.path = Path(path)
+        self.max_size = max_size
+        self.ttl = ttl
+        self.version = version
+        self.evict_every = evict_every
+        self._lock = threading.Lock()
+        self._conn_obj: sqlite3.Connection | None = None
+        self._pid = -1
+        self._puts = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # A connection must never cross a fork()
+        if self._conn_obj is None or self._pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results(accessed)")
+            self._conn_obj = conn
+            self._pid = os.getpid()
+        return self._conn_obj
+
+    def __getstate__(self) -> dict:
+        # Pickled (e.g. into src/pool.py workers) as its settings; the copy opens its own connection
+        return {"path": self.path, "max_size": self.max_size, "ttl": self.ttl,
+                "version": self.version, "evict_every": self.evict_every}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(**state)
+
+    def key(self, text: str) -> str:
+        return f"{self.version}\x00{normalize_text(text)}"
+
+    def get(self, text: str) -> str | None:
+        key = self.key(text)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created, accessed FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, created, accessed = row
+            if self.ttl and now - created > self.ttl:
+                self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                self.expirations += 1
+                self.misses += 1
+                return None
+            if now - accessed > self.TOUCH_INTERVAL:
+                self._conn.execute("UPDATE results SET accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return value
+
+    def put(self, text: str, value: str) -> None:
+        key = self.key(text)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._puts += 1
+            if self._puts % self.evict_every == 0:
+                self._evict()
+
+    def _evict(self) -> None:
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()
+        excess = count - self.max_size
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY accessed, rowid LIMIT ?)",
+                (excess,),
+            )
+            self.evictions += excess
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM results")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def create_cache(
+    config: Config,
+    model_path: str | Path,
+    mode: str = "",
+) -> ResultCache | SQLiteResultCache:
+    """
+    Result cache configured from config.inference, versioned by the model's weights.
+
+    inference.cache_path set → persistent SQLiteResultCache, else in-process ResultCache.
+    `mode` separates entries produced by different decoding paths
+    (e.g. "tagger" answers differ from plain generate()).
+    """
+    version = model_version(model_path) + (f":{mode}" if mode else "")
+    if config.inference.cache_path:
+        return SQLiteResultCache(
+            path=config.inference.cache_path,
+            max_size=config.inference.cache_db_size,
+            ttl=config.inference.cache_db_ttl,
+            version=version,
+        )
+    return ResultCache(
+        max_size=config.inference.cache_size,
+        ttl=config.inference.cache_ttl,
+        version=version,
+    )
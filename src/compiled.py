@@ -0,0 +1,372 @@
+"""
+compiled.py — Static-shape compiled inference: bucketed encoder + single decoder step.
+
+model.generate() sees a new (batch, source length, cache length) on every
+call and every step, so torch.compile would recompile forever and eager mode
+pays Python + dispatcher overhead per op (~ 40 small ops per decoder layer).
+Here every shape is fixed per bucket:
+
+    request texts ─► encode ─► group by source length ─► smallest bucket (B, T) that fits
+                                                          B ∈ compiled.batch_buckets   (1 / 8 / 32)
+                                                          T ∈ compiled.src_buckets     (16 / 32 / 64)
+      rows padded to B (dummy <BOS><EOS> rows), tokens padded to T
+                       │
+      encoder[B, T]   input_ids [B, T] → cross K/V [L, B, H, T, d_h] + source mask      (one compiled graph)
+      step[B, T]      tokens [B], pos [1] → logits [B, V]                              (one compiled graph,
+                      self K/V written in place into a static [L, B, H, max_len, d_h]     reused every step)
+                      cache; attention over all max_len slots masked to ≤ pos
+                       │
+      greedy loop in Python: argmax, stop each row at <EOS> / max length (as generate())
+
+The layers are spelled out with the model's own submodules (like
+src/scheduler.py's SlotDecoder), so the graphs contain no HF control flow
+and the weights stay shared with the loaded model. All buckets are compiled
+and run once at construction (warm-up), so no request ever pays for
+compilation. Responses match generate_responses() token for token.
+
+Backends (compiled.backend): "inductor" (torch.compile → fused C++ kernels),
+"eager" (torch.compile graph capture only, no codegen — for tests/debugging),
+"none" (the same static-shape code uncompiled).
+
+Usage:
+    from src.compiled import CompiledEngine
+    model, tokenizer, device = load_model()
+    engine = CompiledEngine(model, tokenizer, config)         # compiles + warms up every bucket
+    engine.check(["Ich habe den Auto.", "Wo du wohnst?"])
+
+    python -m src.compiled                                    # compile time + latency vs generate_responses()
+    python -m src.compiled --backend none --batch-buckets 1 8
+    python -m src.server --compiled
+"""
+
+import argparse
+import json
+import statistics
+import threading
+import time
+
+import torch
+import torch.nn.functional as F
+from torch import nn
+from transformers import BartForConditionalGeneration
+
+from src.cache import ResultCache, SQLiteResultCache, normalize_text
+from src.config import Config, get_project_root, load_config
+from src.inference import generate_responses, load_model
+from src.model.model import decoder_layers, decoder_start_id, encoder_layers, head_dims
+from src.metrics import (
+    BATCH_SIZE, DECODE_STEPS, DECODER_SECONDS, ENCODER_SECONDS, INPUT_TOKENS, OUTPUT_TOKENS, REQUEST_SECONDS,
+    record_response,
+)
+from src.tokenizer.tokenizer import Tokenizer
+
+BACKENDS = ("inductor", "eager", "none")
+
+
+def _heads(x: torch.Tensor, n_heads: int) -> torch.Tensor:
+    """[B, T, d] → [B, H, T, d_h]"""
+    b, t, d = x.shape
+    return x.view(b, t, n_heads, d // n_heads).transpose(1, 2)
+
+
+class StaticEncoder(nn.Module):
+    """input_ids / attention_mask [B, T] → stacked cross-attention K/V [L, B, H, T, d_h] and key mask [B, 1, 1, T]."""
+
+    def __init__(self, model: BartForConditionalGeneration):
+        super().__init__()
+        self.encoder = model.model.encoder
+        self.layers = encoder_layers(model)                    # typed handles; registered through self.encoder
+        self.cross = [layer.encoder_attn for layer in decoder_layers(model)]
+        self.n_heads, _ = head_dims(model.config, decoder=False)
+
+    def forward(self, input_ids: torch.Tensor, attention_mask: torch.Tensor):
+        enc = self.encoder
+        positions = torch.arange(input_ids.shape[1], device=input_ids.device) + enc.embed_positions.offset
+        h = enc.layernorm_embedding(enc.embed_tokens(input_ids) + enc.embed_positions.weight[positions])
+        mask = attention_mask.bool()[:, None, None, :]                           # [B, 1, 1, T]
+        for layer in self.layers:
+            attn = layer.self_attn
+            q = _heads(attn.q_proj(h), self.n_heads)
+            k = _heads(attn.k_proj(h), self.n_heads)
+            v = _heads(attn.v_proj(h), self.n_heads)
+            out = F.scaled_dot_product_attention(q, k, v, attn_mask=mask, scale=attn.scaling)
+            h = layer.self_attn_layer_norm(h + attn.out_proj(out.transpose(1, 2).reshape(h.shape)))
+            h = layer.final_layer_norm(h + layer.fc2(layer.activation_fn(layer.fc1(h))))
+        cross_k = torch.stack([_heads(attn.k_proj(h), self.n_heads) for attn in self.cross])
+        cross_v = torch.stack([_heads(attn.v_proj(h), self.n_heads) for attn in self.cross])
+        return cross_k, cross_v, mask
+
+
+class StaticDecoderStep(nn.Module):
+    """
+    One greedy step for a whole bucket: tokens [B] at position pos [1] → logits [B, V].
+
+    self_k / self_v [L, B, H, max_len, d_h] are updated in place at `pos`;
+    all rows of a bucket advance together, so one position serves the batch.
+    """
+
+    def __init__(self, model: BartForConditionalGeneration, max_len: int):
+        super().__init__()
+        self.decoder = model.model.decoder
+        self.layers = decoder_layers(model)                    # typed handles; registered through self.decoder
+        self.lm_head = model.lm_head
+        self.final_logits_bias = model.final_logits_bias
+        self.n_heads, _ = head_dims(model.config)
+        self.register_buffer("arange", torch.arange(max_len, device=model.lm_head.weight.device), persistent=False)
+
+    def forward(self, tokens, pos, self_k, self_v, cross_k, cross_v, cross_mask):
+        dec = self.decoder
+        h = dec.embed_tokens(tokens[:, None]) + dec.embed_positions.weight[pos + dec.embed_positions.offset]
+        h = dec.layernorm_embedding(h)                                             # [B, 1, d]
+        self_mask = (self.arange <= pos)[None, None, None, :]                      # [1, 1, 1, max_len]
+        for i, layer in enumerate(self.layers):
+            attn = layer.self_attn
+            q = _heads(attn.q_proj(h), self.n_heads)                               # [B, H, 1, d_h]
+            self_k[i].index_copy_(2, pos, _heads(attn.k_proj(h), self.n_heads))
+            self_v[i].index_copy_(2, pos, _heads(attn.v_proj(h), self.n_heads))
+            out = F.scaled_dot_product_attention(q, self_k[i], self_v[i], attn_mask=self_mask, scale=attn.scaling)
+            h = layer.self_attn_layer_norm(h + attn.out_proj(out.transpose(1, 2).reshape(h.shape)))
+
+            attn = layer.encoder_attn
+            q = _heads(attn.q_proj(h), self.n_heads)
+            out = F.scaled_dot_product_attention(q, cross_k[i], cross_v[i], attn_mask=cross_mask, scale=attn.scaling)
+            h = layer.encoder_attn_layer_norm(h + attn.out_proj(out.transpose(1, 2).reshape(h.shape)))
+
+            h = layer.final_layer_norm(h + layer.fc2(layer.activation_fn(layer.fc1(h))))
+        return self.lm_head(h[:, 0]) + self.final_logits_bias[0]
+
+
+class CompiledEngine:
+    """
+    Greedy grammar check through per-bucket compiled graphs (thread-safe; calls are serialized).
+
+    Counters: calls, rows (real sentences decoded), padded_rows (dummy rows),
+    bucket_hits per (B, T); compile_seconds from construction.
+    """
+
+    def __init__(
+        self,
+        model: BartForConditionalGeneration,
+        tokenizer: Tokenizer,
+        config: Config,
+        device: str = "cpu",
+        backend: str | None = None,
+        src_buckets: list[int] | None = None,
+        batch_buckets: list[int] | None = None,
+        warmup: bool = True,
+    ):
+        opts = config.compiled
+        self.backend = backend or opts.backend
+        if self.backend not in BACKENDS:
+            raise ValueError(f"compiled.backend must be one of {BACKENDS}, got {self.backend!r}")
+        model.eval()
+        self.model, self.tokenizer, self.device = model, tokenizer, device
+        self.max_len = config.model.max_seq_len
+        # Every source fits: tokenizer.encode(max_len=…) truncates to max_len
+        self.src_buckets = sorted({min(t, self.max_len) for t in (src_buckets or opts.src_buckets)} | {self.max_len})
+        self.batch_buckets = sorted(set(batch_buckets or opts.batch_buckets))
+
+        gen = model.generation_config
+        self.start_id = decoder_start_id(model.config)
+        self.eos_id = tokenizer.eos_id
+        self.max_new = self.max_len - 1 - (1 if gen.forced_eos_token_id is not None else 0)
+
+        n_layers = len(model.model.decoder.layers)
+        n_heads, head_dim = head_dims(model.config)
+        dtype = model.lm_head.weight.dtype
+        self._positions = [torch.tensor([i], device=device) for i in range(self.max_len)]
+        self._self_kv = {                        # one static self-attention K / V cache per batch bucket
+            b: tuple(torch.zeros(n_layers, b, n_heads, self.max_len, head_dim, dtype=dtype, device=device)
+                     for _ in range(2))
+            for b in self.batch_buckets
+        }
+        encoder, step = StaticEncoder(model), StaticDecoderStep(model, self.max_len)
+        if self.backend != "none":
+            import torch._dynamo as dynamo
+
+            # One graph per bucket and module; the default limit would fall back to eager past 8 shapes
+            buckets = len(self.src_buckets) * len(self.batch_buckets)
+            dynamo.config.recompile_limit = max(dynamo.config.recompile_limit, buckets + 1)
+            encoder = torch.compile(encoder, backend=self.backend, dynamic=False, fullgraph=True)
+            step = torch.compile(step, backend=self.backend, dynamic=False, fullgraph=True)
+        self._encoder, self._step = encoder, step
+        self._lock = threading.Lock()
+
+        self.calls = self.rows = self.padded_rows = 0
+        self.bucket_hits: dict[tuple[int, int], int] = {}
+        self.compile_seconds = 0.0
+        if warmup:
+            self.warmup()
+
+    # ── Buckets ──────────────────────────────────────────────────────────────
+
+    def bucket_for(self, rows: int, width: int) -> tuple[int, int]:
+        """Smallest (B, T) bucket holding `rows` sentences of up to `width` tokens."""
+        b = next((b for b in self.batch_buckets if b >= rows), None)
+        t = next((t for t in self.src_buckets if t >= width), None)
+        if b is None or t is None:
+            raise ValueError(f"{rows} × {width} exceeds the largest bucket "
+                             f"{self.batch_buckets[-1]} × {self.src_buckets[-1]}")
+        return b, t
+
+    def warmup(self) -> None:
+        """Compile and run every bucket once (encoder + two decoder steps)."""
+        start = time.perf_counter()
+        dummy = [self.tokenizer.bos_id, self.tokenizer.eos_id]
+        with self._lock, torch.no_grad():
+            for b in self.batch_buckets:
+                for t in self.src_buckets:
+                    self._decode_bucket([dummy] * b, b, t, max_steps=2)
+        self.compile_seconds = time.perf_counter() - start
+
+    # ── Decoding ─────────────────────────────────────────────────────────────
+
+    def _decode_bucket(self, sources: list[list[int]], b: int, t: int, max_steps: int | None = None):
+        """Greedy-decode up to b sources in bucket (b, t); returns (token lists, encoder s, decoder s, steps)."""
+        tok = self.tokenizer
+        rows = sources + [[tok.bos_id, tok.eos_id]] * (b - len(sources))
+        input_ids = torch.tensor([tok.pad_sequence(r, t) for r in rows], dtype=torch.long, device=self.device)
+        encode_start = time.perf_counter()
+        cross_k, cross_v, cross_mask = self._encoder(input_ids, (input_ids != tok.pad_id).long())
+        encode_end = time.perf_counter()
+
+        self_k, self_v = self._self_kv[b]
+        tokens = torch.full((b,), self.start_id, dtype=torch.long, device=self.device)
+        outputs: list[list[int]] = [[] for _ in sources]
+        running = set(range(len(sources)))
+        steps = 0
+        for pos in self._positions[:max_steps or self.max_new]:
+            logits = self._step(tokens, pos, self_k, self_v, cross_k, cross_v, cross_mask)
+            tokens = logits.argmax(dim=-1)
+            steps += 1
+            next_ids = tokens.tolist()
+            for i in list(running):
+                outputs[i].append(next_ids[i])
+                if next_ids[i] == self.eos_id or len(outputs[i]) >= self.max_new:
+                    running.discard(i)
+            if not running:
+                break
+        return outputs, encode_end - encode_start, time.perf_counter() - encode_end, steps
+
+    @torch.no_grad()
+    def check(
+        self,
+        texts: list[str],
+        cache: ResultCache | SQLiteResultCache | None = None,
+    ) -> list[str]:
+        """One response per text, in input order (deduplicated and cached like generate_responses())."""
+        start = time.perf_counter()
+        results = [""] * len(texts)                      # every slot is filled below
+        pending: dict[str, list[int]] = {}
+        for i, text in enumerate(texts):
+            key = normalize_text(text)
+            cached = cache.get(key) if cache is not None else None
+            if cached is not None:
+                results[i] = cached
+                record_response(cached, "cache")
+            else:
+                pending.setdefault(key, []).append(i)
+
+        encoded = {key: self.tokenizer.encode(key, add_bos=True, add_eos=True, max_len=self.max_len)
+                   for key in pending}
+        groups: dict[int, list[str]] = {}                # source bucket → sentences
+        for key in pending:
+            groups.setdefault(self.bucket_for(1, len(encoded[key]))[1], []).append(key)
+        largest = self.batch_buckets[-1]
+        with self._lock:
+            self.calls += 1
+            for t, keys in sorted(groups.items()):
+                for offset in range(0, len(keys), largest):
+                    chunk = keys[offset:offset + largest]
+                    b, _ = self.bucket_for(len(chunk), t)
+                    outputs, enc_s, dec_s, steps = self._decode_bucket([encoded[k] for k in chunk], b, t)
+                    self.rows += len(chunk)
+                    self.padded_rows += b - len(chunk)
+                    self.bucket_hits[(b, t)] = self.bucket_hits.get((b, t), 0) + 1
+                    ENCODER_SECONDS.observe(enc_s, path="compiled")
+                    DECODER_SECONDS.observe(dec_s, path="compiled")
+                    DECODE_STEPS.observe(steps, path="compiled")
+                    BATCH_SIZE.observe(len(chunk), path="compiled")
+                    for key, ids in zip(chunk, outputs):
+                        INPUT_TOKENS.observe(len(encoded[key]))
+                        OUTPUT_TOKENS.observe(len(ids))
+                        result = self.tokenizer.decode(ids, skip_special=True).strip()
+                        if cache is not None:
+                            cache.put(key, result)
+                        for n, i in enumerate(pending[key]):
+                            results[i] = result
+                            record_response(result, "model" if n == 0 else "dedup")
+        REQUEST_SECONDS.observe(time.perf_counter() - start, path="compiled")
+        return results
+
+    def check_one(self, text: str, cache: ResultCache | SQLiteResultCache | None = None) -> str:
+        return self.check([text], cache)[0]
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend,
+            "compile_seconds": self.compile_seconds,
+            "calls": self.calls,
+            "rows": self.rows,
+            "padded_rows": self.padded_rows,
+            "bucket_hits": {f"{b}x{t}": n for (b, t), n in sorted(self.bucket_hits.items())},
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the bucketed encoder / decoder step and compare latency")
+    parser.add_argument("--model", type=str, default="model_final", help="HF model dir (random weights if missing)")
+    parser.add_argument("--backend", choices=BACKENDS, default=None, help="Default: compiled.backend")
+    parser.add_argument("--src-buckets", type=int, nargs="+", default=None, help="Default: compiled.src_buckets")
+    parser.add_argument("--batch-buckets", type=int, nargs="+", default=None, help="Default: compiled.batch_buckets")
+    parser.add_argument("--sentences", type=int, default=32, help="Test sentences per timed run")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    config = load_config()
+    project_root = get_project_root()
+    model_dir = project_root / args.model
+    if (model_dir / "model.safetensors").exists():
+        model, tokenizer, device = load_model(model_dir, config)
+    else:
+        print(f"⚠️  No weights in {model_dir} — timing a randomly initialised model of the configured size")
+        from src.model.model import create_model
+
+        tokenizer, device = Tokenizer(project_root / "src/tokenizer/tokenizer.json"), "cpu"
+        torch.manual_seed(0)
+        model = create_model(config, tokenizer).eval()
+    with open(project_root / "tests/test_data.json", "r", encoding="utf-8") as f:
+        texts = list(dict.fromkeys(item["input"] for item in json.load(f)))[:args.sentences]
+
+    engine = CompiledEngine(model, tokenizer, config, device, backend=args.backend,
+                            src_buckets=args.src_buckets, batch_buckets=args.batch_buckets)
+    print(f"\n🔧 {engine.backend}: {len(engine.batch_buckets)} × {len(engine.src_buckets)} buckets "
+          f"compiled + warmed up in {engine.compile_seconds:.1f} s")
+
+    def median_ms(fn) -> float:
+        fn()
+        samples = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1000)
+        return statistics.median(samples)
+
+    rows = [
+        ("generate_responses, one at a time", lambda: [generate_responses([t], model, tokenizer, config, device,
+                                                                          engine.max_len) for t in texts]),
+        ("compiled, one at a time", lambda: [engine.check([t]) for t in texts]),
+        ("generate_responses, batched", lambda: generate_responses(texts, model, tokenizer, config, device,
+                                                                   engine.max_len)),
+        ("compiled, batched", lambda: engine.check(texts)),
+    ]
+    print(f"\n  {'path':<36} {'ms/sentence':>12}")
+    for name, fn in rows:
+        print(f"  {name:<36} {median_ms(fn) / len(texts):>12.2f}")
+    same = engine.check(texts) == generate_responses(texts, model, tokenizer, config, device, engine.max_len)
+    print(f"\n  responses identical to generate_responses(): {'✅' if same else '❌'}")
+    print(f"  {engine.stats()['bucket_hits']}")
+
+
+if __name__ == "__main__":
+    main()
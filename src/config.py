@@ -1,11 +1,19 @@
+import json
+import os
+import platform
+import sys
 import yaml
-import torch
-from dataclasses import dataclass
+from dataclasses import dataclass, field, fields
 from pathlib import Path
 
+# Machine-specific threading profile written by `python -m src.autotune`, next to config.yaml
+TUNE_PROFILE_FILE = "tune_profile.json"
+
 
 def _xpu_available() -> bool:
     """Intel XPU may be missing in some PyTorch builds."""
+    import torch
+
     xpu = getattr(torch, "xpu", None)
     return xpu is not None and xpu.is_available()
 
@@ -18,6 +26,13 @@ def get_device(device_preference: str | None = None) -> str:
 
     Supported devices: "cuda" (NVIDIA), "xpu" (Intel), "mps" (Apple Silicon), "cpu".
     """
+    import torch  # deferred: loading config.yaml alone must not pay for torch
+
+    global _pending_runtime
+    if _pending_runtime is not None:
+        runtime, _pending_runtime = _pending_runtime, None
+        apply_runtime(runtime)
+
     if device_preference and device_preference != "auto":
         # Explicit choice: validate availability
         if device_preference == "cuda" and torch.cuda.is_available():
@@ -51,6 +66,7 @@ class ModelConfig:
     d_ff: int
     weight_tying: bool = True
     pos_type: str = "sinusoidal"
+    attn_implementation: str = "sdpa"
 
 
 @dataclass
@@ -60,6 +76,7 @@ class TrainingConfig:
     epochs: int
     early_stopping_patience: int = 0
     decision_token_weight: float = 1.0
+    verdict_loss_weight: float = 0.0
     device: str = "auto"
 
 
@@ -75,6 +92,70 @@ class GenerationConfig:
     top_k: int
 
 
+@dataclass
+class InferenceConfig:
+    """Serving-time options (all optional in config.yaml)."""
+    verdict_threshold: float = 0.95
+    cache_size: int = 4096
+    cache_ttl: float = 3600.0
+    cache_path: str = ""
+    cache_db_size: int = 200_000
+    cache_db_ttl: float = 0.0
+    lookup_path: str = ""
+    knn_threshold: float = 0.97
+    knn_k: int = 5
+    knn_n_probe: int = 4
+    registry_path: str = "models"
+
+
+@dataclass
+class RuntimeConfig:
+    """
+    CPU threading (0 / false = torch defaults). Unset fields are filled from
+    tune_profile.json (python -m src.autotune) when it was measured on this machine.
+    """
+    num_threads: int = 0
+    num_interop_threads: int = 0
+    training_num_threads: int = 0
+    pin_cpus: bool = False
+    batch_size: int = 0
+
+
+@dataclass
+class ServerConfig:
+    """HTTP/JSON inference server (src/server.py)."""
+    host: str = "127.0.0.1"
+    port: int = 8080
+    max_workers: int = 2
+    max_pending: int = 64
+    request_timeout: float = 30.0
+    max_batch: int = 64
+    continuous: bool = False
+    max_slots: int = 32
+    compiled: bool = False
+
+
+@dataclass
+class CompiledConfig:
+    """Static-shape compiled inference (src/compiled.py): one graph per (batch, source length) bucket."""
+    backend: str = "inductor"
+    src_buckets: list[int] = field(default_factory=lambda: [16, 32, 64])
+    batch_buckets: list[int] = field(default_factory=lambda: [1, 8, 32])
+
+
+@dataclass
+class DistillationConfig:
+    """Student architecture + loss mix for src/distill.py (teacher = model_final)."""
+    d_model: int = 128
+    n_enc_layers: int = 2
+    n_dec_layers: int = 2
+    n_heads: int = 4
+    d_ff: int = 256
+    alpha: float = 0.5
+    temperature: float = 2.0
+    epochs: int = 10
+
+
 @dataclass
 class Config:
     """Typed config matching config.yaml structure."""
@@ -82,6 +163,11 @@ class Config:
     training: TrainingConfig
     data: DataConfig
     generation: GenerationConfig
+    inference: InferenceConfig = field(default_factory=InferenceConfig)
+    distillation: DistillationConfig = field(default_factory=DistillationConfig)
+    runtime: RuntimeConfig = field(default_factory=RuntimeConfig)
+    server: ServerConfig = field(default_factory=ServerConfig)
+    compiled: CompiledConfig = field(default_factory=CompiledConfig)
 
 # Project root is two levels up from this file (src/config.py → src/ → project root)
 _PROJECT_ROOT = Path(__file__).parent.parent
@@ -92,10 +178,71 @@ def get_project_root() -> Path:
     return _PROJECT_ROOT
 
 
-def load_config(path: str | Path | None = None) -> Config:
+# CPUs this process may use before any pinning (pinning only ever narrows the set)
+USABLE_CPUS = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+
+
+def machine_fingerprint() -> dict:
+    """What a tuning profile depends on; a profile from another machine is ignored."""
+    return {"cpu_count": os.cpu_count(), "usable_cpus": len(USABLE_CPUS) or os.cpu_count(),
+            "machine": platform.machine()}
+
+
+def load_tune_profile(path: str | Path) -> dict | None:
+    """The "runtime" settings of a tuning profile, or None if absent or measured elsewhere."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        profile = json.load(f)
+    if profile.get("machine") != machine_fingerprint():
+        print(f"⚠️  {path.name} was tuned on another machine — ignored (re-run python -m src.autotune)",
+              file=sys.stderr)
+        return None
+    return profile.get("runtime", {})
+
+
+_pending_runtime: RuntimeConfig | None = None
+
+
+def apply_runtime(runtime: RuntimeConfig, training: bool = False) -> None:
+    """
+    Apply thread counts / CPU pinning to this process.
+
+    Before torch is imported only OMP_NUM_THREADS / MKL_NUM_THREADS are set
+    (an explicit environment wins); the torch calls follow on the first
+    get_device(), so config loading alone still never imports torch.
+    """
+    global _pending_runtime
+    threads = (runtime.training_num_threads if training else 0) or runtime.num_threads
+    if runtime.pin_cpus and threads and USABLE_CPUS:
+        os.sched_setaffinity(0, USABLE_CPUS[:threads])
+    if "torch" not in sys.modules:
+        if threads:
+            os.environ.setdefault("OMP_NUM_THREADS", str(threads))
+            os.environ.setdefault("MKL_NUM_THREADS", str(threads))
+        _pending_runtime = RuntimeConfig(
+            num_threads=threads, num_interop_threads=runtime.num_interop_threads,
+        )
+        return
+
+    import torch
+
+    if threads:
+        torch.set_num_threads(threads)
+    if runtime.num_interop_threads and torch.get_num_interop_threads() != runtime.num_interop_threads:
+        try:
+            torch.set_num_interop_threads(runtime.num_interop_threads)
+        except RuntimeError:
+            pass  # only settable before the first inter-op parallel work
+
+
+def load_config(path: str | Path | None = None, apply: bool = True) -> Config:
     """Loads YAML config and returns a typed Config object.
 
     If path is not provided, looks for config.yaml in the project root.
+    A tune_profile.json next to it fills the runtime section, which is then
+    applied to this process (apply=False: load only).
     """
     if path is None:
         config_path = _PROJECT_ROOT / "config.yaml"
@@ -107,9 +254,22 @@ def load_config(path: str | Path | None = None) -> Config:
     with open(config_path, "r", encoding="utf-8") as f:
         data = yaml.safe_load(f)
 
-    return Config(
+    # Explicit config.yaml values win over the measured profile
+    runtime = {k: v for k, v in (load_tune_profile(config_path.parent / TUNE_PROFILE_FILE) or {}).items()
+               if k in {f.name for f in fields(RuntimeConfig)}}
+    runtime.update({k: v for k, v in (data.get("runtime") or {}).items() if v})
+
+    config = Config(
         model=ModelConfig(**data["model"]),
         training=TrainingConfig(**data["training"]),
         data=DataConfig(**data["data"]),
         generation=GenerationConfig(**data["generation"]),
+        inference=InferenceConfig(**data.get("inference", {})),
+        distillation=DistillationConfig(**data.get("distillation", {})),
+        runtime=RuntimeConfig(**runtime),
+        server=ServerConfig(**data.get("server", {})),
+        compiled=CompiledConfig(**data.get("compiled", {})),
     )
+    if apply:
+        apply_runtime(config.runtime)
+    return config
@@ -3,14 +3,36 @@ from .base import BaseGenerator
 
 class VerbGenerator(BaseGenerator):
     """Generates examples for Verb topics: Conjugation, Perfekt, Präteritum, Modal Verbs."""
-    
+
+    # Verb lexicons (also compiled by src/rules.py)
+    praesens_verbs = [
+        ("spiel", "Fußball"), ("lern", "Deutsch"),
+        ("koch", "Suppe"), ("trink", "Kaffee"),
+        ("kauf", "Brot"), ("ess", "Apfel")
+    ]
+    perfekt_sein_verbs = [
+        ("gehen", "gegangen"), ("fahren", "gefahren"), ("kommen", "gekommen"),
+        ("bleiben", "geblieben"),
+    ]
+    perfekt_haben_verbs = [
+        ("essen", "gegessen"), ("machen", "gemacht"), ("kaufen", "gekauft"),
+        ("trinken", "getrunken"), ("kochen", "gekocht"),
+    ]
+    # (infinitive, stem, prefix, extra)
+    separable_verbs = [
+        ("aufstehen", "steh", "auf", "um 7 Uhr"),
+        ("einkaufen", "kauf", "ein", "im Supermarkt"),
+        ("anrufen", "ruf", "an", "meine Mutter")
+    ]
+    # (inf, (ich, du, er, sie, wir, ihr), (wrong_du, wrong_er))
+    strong_verbs = [
+        ("schlafen", ("schlafe", "schläfst", "schläft", "schläft", "schlafen", "schlaft"), ("schlafst", "schlaft")),
+        ("fahren", ("fahre", "fährst", "fährt", "fährt", "fahren", "fahrt"), ("fahrst", "fahrt")),
+    ]
+
     def generate_praesens(self, count=1000):
         """A1: Standard present tense conjugation. Includes Sie (formal) + plural verb (Sie trinken Kaffee)."""
-        verbs = [
-            ("spiel", "Fußball"), ("lern", "Deutsch"),
-            ("koch", "Suppe"), ("trink", "Kaffee"),
-            ("kauf", "Brot"), ("ess", "Apfel")
-        ]
+        verbs = self.praesens_verbs
         data = []
         for _ in range(count):
             # 15% correct examples with formal Sie (sie_plural) so model learns "Sie trinken" is correct
@@ -126,14 +148,8 @@ class VerbGenerator(BaseGenerator):
 
     def generate_perfekt_aux(self, count=1000):
         """A2: Haben vs Sein in Perfekt. Includes wrong conjugation of aux (Ich ist gegangen → Ich bin gegangen)."""
-        verbs_sein = [
-            ("gehen", "gegangen"), ("fahren", "gefahren"), ("kommen", "gekommen"),
-            ("bleiben", "geblieben"),
-        ]
-        verbs_haben = [
-            ("essen", "gegessen"), ("machen", "gemacht"), ("kaufen", "gekauft"),
-            ("trinken", "getrunken"), ("kochen", "gekocht"),
-        ]
+        verbs_sein = self.perfekt_sein_verbs
+        verbs_haben = self.perfekt_haben_verbs
         verbs_sein_no_obj = [("kommen", "gekommen"), ("bleiben", "geblieben")]
         other_subjects = list(self.subjects.keys())
         data = []
@@ -221,11 +237,7 @@ class VerbGenerator(BaseGenerator):
 
     def generate_strong_verbs_praesens(self, count=500):
         """A1: Strong verbs — vowel change in 2nd/3rd person (schlafen->schläfst/schläft, fahren->fährst/fährt)."""
-        # (inf, (ich, du, er, sie, wir, ihr), (wrong_du, wrong_er))
-        verbs = [
-            ("schlafen", ("schlafe", "schläfst", "schläft", "schläft", "schlafen", "schlaft"), ("schlafst", "schlaft")),
-            ("fahren", ("fahre", "fährst", "fährt", "fährt", "fahren", "fahrt"), ("fahrst", "fahrt")),
-        ]
+        verbs = self.strong_verbs
         subs = ["ich", "du", "er", "sie", "wir", "ihr"]
         extras = ["nach Berlin", "nach Hause", "gut"]
         data = []
@@ -298,11 +310,7 @@ class VerbGenerator(BaseGenerator):
 
     def generate_separable_verbs(self, count=1000):
         """A2: Separable verbs."""
-        verbs = [
-            ("aufstehen", "steh", "auf", "um 7 Uhr"),
-            ("einkaufen", "kauf", "ein", "im Supermarkt"),
-            ("anrufen", "ruf", "an", "meine Mutter")
-        ]
+        verbs = self.separable_verbs
         data = []
         for _ in range(count):
             sub_key = random.choice(list(self.subjects.keys()))
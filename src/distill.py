@@ -0,0 +1,213 @@
+"""
+distill.py — Knowledge distillation for A2 Deutsch Grammar Tutor (HF BART).
+
+Trains a smaller student BartForConditionalGeneration on the logits of the
+trained teacher (model_final/) plus the synthetic labels.
+
+Loss per batch (only on non-ignored label positions):
+  L = α · T² · KL( softmax(z_teacher / T) ‖ softmax(z_student / T) )
+    + (1 − α) · CrossEntropy(z_student, labels)
+
+Student size comes from the `distillation:` section of config.yaml
+(default d=128, 2+2 layers, d_ff=256). The data pipeline is the same
+Seq2SeqDataset used by train.py, so teacher and student see identical batches.
+
+Usage:
+    python -m src.distill
+    python -m src.distill --teacher model_final --out model_student --epochs 5
+"""
+
+import argparse
+import dataclasses
+
+import torch
+import torch.nn.functional as F
+from torch.utils.data import DataLoader
+from tqdm import tqdm
+from transformers import BartForConditionalGeneration
+
+from src.config import Config, apply_runtime, load_config, get_device, get_project_root
+from src.evaluation import evaluate_quality, load_test_data, print_report
+from src.model.model import create_model
+from src.tokenizer.tokenizer import Tokenizer
+from src.train import Seq2SeqDataset
+
+
+def student_config(config: Config) -> Config:
+    """Return a copy of config whose model section describes the student."""
+    d = config.distillation
+    student_model = dataclasses.replace(
+        config.model,
+        d_model=d.d_model,
+        n_enc_layers=d.n_enc_layers,
+        n_dec_layers=d.n_dec_layers,
+        n_heads=d.n_heads,
+        d_ff=d.d_ff,
+    )
+    return dataclasses.replace(config, model=student_model)
+
+
+def distillation_loss(
+    student_logits: torch.Tensor,
+    teacher_logits: torch.Tensor,
+    labels: torch.Tensor,
+    alpha: float,
+    temperature: float,
+) -> torch.Tensor:
+    """
+    Mix of soft-target KL and hard-label cross-entropy.
+
+    Args:
+        student_logits: [B, T, V]
+        teacher_logits: [B, T, V]
+        labels:         [B, T] with -100 on ignored positions.
+    """
+    mask = labels.reshape(-1) != -100
+    s = student_logits.reshape(-1, student_logits.size(-1))[mask]
+    t = teacher_logits.reshape(-1, teacher_logits.size(-1))[mask]
+
+    kd = F.kl_div(
+        F.log_softmax(s / temperature, dim=-1),
+        F.log_softmax(t / temperature, dim=-1),
+        reduction="batchmean",
+        log_target=True,
+    ) * temperature ** 2
+    ce = F.cross_entropy(s, labels.reshape(-1)[mask])
+    return alpha * kd + (1 - alpha) * ce
+
+
+def distill():
+    # ── 0. Parse CLI Arguments ──
+    parser = argparse.ArgumentParser(description="Distill model_final into a smaller student (HF BART)")
+    parser.add_argument("--teacher", type=str, default="model_final", help="Teacher model directory")
+    parser.add_argument("--out", type=str, default="model_student", help="Where to save the student")
+    parser.add_argument("--epochs", type=int, help="Override distillation.epochs from config")
+    parser.add_argument("--skip-eval", action="store_true", help="Skip the final latency/accuracy report")
+    args = parser.parse_args()
+
+    # ── 1. Load Config & Device ──
+    config = load_config()
+    apply_runtime(config.runtime, training=True)  # training_num_threads from tune_profile.json
+    s_config = student_config(config)
+    device = get_device(config.training.device)
+    d = config.distillation
+    print(f"🎓 Distillation on device: {device}")
+
+    # ── 2. Tokenizer, Teacher, Student ──
+    project_root = get_project_root()
+    tokenizer = Tokenizer(project_root / "src/tokenizer/tokenizer.json")
+
+    teacher_dir = project_root / args.teacher
+    if not teacher_dir.exists():
+        print(f"❌ Teacher not found at {teacher_dir}. Train the model first.")
+        return
+    teacher = BartForConditionalGeneration.from_pretrained(
+        str(teacher_dir), attn_implementation=config.model.attn_implementation).to(device)  # pyright: ignore[reportArgumentType]
+    teacher.eval()
+    for p in teacher.parameters():
+        p.requires_grad_(False)
+
+    student = create_model(s_config, tokenizer).to(device)  # pyright: ignore[reportArgumentType]
+    n_t = sum(p.numel() for p in teacher.parameters())
+    n_s = sum(p.numel() for p in student.parameters())
+    print(f"   Teacher: {n_t:,} params | Student: {n_s:,} params ({n_t / n_s:.1f}× smaller)")
+    print(f"   Student: d={d.d_model}, enc={d.n_enc_layers}, dec={d.n_dec_layers}, "
+          f"H={d.n_heads}, d_ff={d.d_ff} | α={d.alpha}, T={d.temperature}")
+
+    # ── 3. Data (same pipeline as train.py) ──
+    max_len = config.model.max_seq_len
+    train_ds = Seq2SeqDataset(config.data.train_path, tokenizer, max_len, tokenizer.pad_id)
+    validation_ds = Seq2SeqDataset(config.data.val_path, tokenizer, max_len, tokenizer.pad_id)
+    train_loader = DataLoader(train_ds, batch_size=config.training.batch_size, shuffle=True)
+    validation_loader = DataLoader(validation_ds, batch_size=config.training.batch_size)
+
+    optimizer = torch.optim.AdamW(student.parameters(), lr=float(config.training.learning_rate))
+
+    # ── 4. Training Loop with Early Stopping (on student val CE) ──
+    save_dir = project_root / args.out
+    epochs = args.epochs if args.epochs is not None else d.epochs
+    patience = config.training.early_stopping_patience
+    best_val_loss = float("inf")
+    best_epoch = -1
+    epochs_without_improvement = 0
+
+    for epoch in range(epochs):
+        student.train()
+        total_loss = 0
+        pbar = tqdm(train_loader, desc=f"Epoch {epoch+1}/{epochs}")
+
+        for src_ids, attn_mask, tgt_ids, dec_attn_mask, labels in pbar:
+            src_ids = src_ids.to(device)
+            attn_mask = attn_mask.to(device)
+            tgt_ids = tgt_ids.to(device)
+            dec_attn_mask = dec_attn_mask.to(device)
+            labels = labels.to(device)
+            batch = dict(
+                input_ids=src_ids,
+                attention_mask=attn_mask,
+                decoder_input_ids=tgt_ids,
+                decoder_attention_mask=dec_attn_mask,
+            )
+
+            with torch.no_grad():
+                teacher_logits = teacher(**batch).logits      # [B, T, V]
+            student_logits = student(**batch).logits          # [B, T, V]
+
+            loss = distillation_loss(student_logits, teacher_logits, labels, d.alpha, d.temperature)
+
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+
+            total_loss += loss.item()
+            pbar.set_postfix({"loss": f"{loss.item():.4f}"})
+
+        avg_loss = total_loss / len(train_loader)
+
+        # ── Validation: plain label CE, comparable with train.py ──
+        student.eval()
+        val_loss = 0
+        with torch.no_grad():
+            for src_ids, attn_mask, tgt_ids, dec_attn_mask, labels in validation_loader:
+                outputs = student(
+                    input_ids=src_ids.to(device),
+                    attention_mask=attn_mask.to(device),
+                    decoder_input_ids=tgt_ids.to(device),
+                    decoder_attention_mask=dec_attn_mask.to(device),
+                    labels=labels.to(device),
+                )
+                val_loss += outputs.loss.item()
+
+        avg_val_loss = val_loss / len(validation_loader)
+        print(f"✨ Epoch {epoch+1} finished. Distill Loss: {avg_loss:.4f}, Val CE: {avg_val_loss:.4f}")
+
+        if avg_val_loss < best_val_loss:
+            best_val_loss = avg_val_loss
+            best_epoch = epoch + 1
+            student.save_pretrained(str(save_dir))
+            epochs_without_improvement = 0
+        else:
+            epochs_without_improvement += 1
+
+        if patience and epochs_without_improvement >= patience:
+            print(f"⏹ Early stopping at epoch {epoch+1}")
+            break
+
+    print(f"📦 Best student (epoch {best_epoch}) saved to {save_dir}/")
+
+    # ── 5. Side-by-side Report: latency vs accuracy ──
+    if args.skip_eval or best_epoch < 0:
+        return
+    student = BartForConditionalGeneration.from_pretrained(
+        str(save_dir), attn_implementation=s_config.model.attn_implementation).to(device)  # pyright: ignore[reportArgumentType]
+    test_data = load_test_data()
+    print("🧪 Evaluating teacher and student on tests/test_data.json...")
+    rows = [
+        ("teacher " + args.teacher, evaluate_quality(teacher, tokenizer, config, device, test_data)),
+        ("student " + args.out, evaluate_quality(student, tokenizer, s_config, device, test_data)),
+    ]
+    print_report(rows)
+
+
+if __name__ == "__main__":
+    distill()
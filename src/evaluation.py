@@ -0,0 +1,166 @@
+"""
+evaluation.py — Shared accuracy / latency evaluation for A2 Deutsch Grammar Tutor.
+
+Used by tests/evaluate_model.py and by the model-compression tools
+(distill.py, prune.py) to print side-by-side reports:
+
+  - parse_output()      → (detected_correct, detected_incorrect, correction)
+  - score_response()    → (det_ok, corr_ok) for one test item
+  - evaluate_quality()  → detection/correction accuracy + CPU latency for a model
+  - print_report()      → comparison table of several evaluated models
+"""
+
+import json
+import statistics
+import time
+from pathlib import Path
+
+import torch
+from transformers import BartForConditionalGeneration
+
+from src.config import Config, get_project_root
+from src.inference import generate_response
+from src.tokenizer.tokenizer import Tokenizer
+
+
+def normalize(text):
+    if text is None: return ""
+    return text.strip().rstrip(".").lower().strip()
+
+
+def parse_output(response):
+    detected_correct = "✅ Correct." in response and "❌" not in response
+    detected_incorrect = "❌ Incorrect" in response
+    correction = None
+    if "✅ Correct:" in response:
+        for line in response.split("\n"):
+            if "✅ Correct:" in line:
+                correction = line.split("✅ Correct:")[1].strip()
+                break
+    return detected_correct, detected_incorrect, correction
+
+
+def score_response(test_item: dict, response: str) -> tuple[bool, bool, str | None]:
+    """
+    Score one model response against a tests/test_data.json item.
+
+    Returns:
+        (det_ok, corr_ok, model_correction)
+    """
+    det_c, det_inc, corr = parse_output(response)
+
+    expected = test_item["expected_type"]
+    det_ok = (expected == "correct" and det_c) or (expected == "incorrect" and det_inc)
+
+    corr_ok = False
+    if expected == "incorrect" and test_item.get("expected_correction") and corr:
+        if normalize(corr) == normalize(test_item["expected_correction"]):
+            corr_ok = True
+    elif expected == "correct" and det_ok:
+        corr_ok = True
+
+    return det_ok, corr_ok, corr
+
+
+def load_test_data(path: str | Path | None = None) -> list[dict]:
+    """Load the hand-crafted test set (default: tests/test_data.json)."""
+    if path is None:
+        path = get_project_root() / "tests/test_data.json"
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def count_parameters(model: torch.nn.Module) -> int:
+    """Number of unique parameters (tied E / LM head counted once)."""
+    return sum(p.numel() for p in model.parameters())
+
+
+def evaluate_quality(
+    model: BartForConditionalGeneration,
+    tokenizer: Tokenizer,
+    config: Config,
+    device: str,
+    test_data: list[dict],
+    batch_size: int = 64,
+    latency_samples: int = 50,
+) -> dict:
+    """
+    Measure accuracy on the test set and single-sentence latency.
+
+    Accuracy is computed with batched greedy generate() (same as
+    tests/evaluate_model.py). Latency is the wall time of one
+    batch-size-1 request (encode + generate + decode), measured on the
+    first `latency_samples` test sentences after one warm-up call.
+
+    Returns:
+        dict with det_acc, corr_acc (in %), latency_p50_ms, latency_p90_ms, params.
+    """
+    model.eval()
+    max_len = config.model.max_seq_len
+    total_det = 0
+    total_corr = 0
+
+    with torch.no_grad():
+        for start in range(0, len(test_data), batch_size):
+            batch = test_data[start:start + batch_size]
+            src = [
+                tokenizer.pad_sequence(
+                    tokenizer.encode(item["input"], add_bos=True, add_eos=True, max_len=max_len),
+                    max_len=max_len,
+                )
+                for item in batch
+            ]
+            input_ids = torch.tensor(src, dtype=torch.long, device=device)
+            attention_mask = (input_ids != tokenizer.pad_id).long()
+            generated_ids = model.generate(  # pyright: ignore[reportAttributeAccessIssue]
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                max_length=max_len,
+                num_beams=1,
+                do_sample=False,
+            )
+            for i, item in enumerate(batch):
+                response = tokenizer.decode(generated_ids[i].tolist(), skip_special=True)
+                det_ok, corr_ok, _ = score_response(item, response)
+                total_det += det_ok
+                total_corr += corr_ok
+
+    # ── Latency: batch size 1, the serving case ──
+    samples = test_data[:latency_samples]
+    timings = []
+    if samples:
+        generate_response(samples[0]["input"], model, tokenizer, config, device, max_len)  # warm-up
+    for item in samples:
+        t0 = time.perf_counter()
+        generate_response(item["input"], model, tokenizer, config, device, max_len)
+        timings.append((time.perf_counter() - t0) * 1000)
+
+    n = max(len(test_data), 1)
+    return {
+        "det_acc": total_det / n * 100,
+        "corr_acc": total_corr / n * 100,
+        "latency_p50_ms": statistics.median(timings) if timings else 0.0,
+        "latency_p90_ms": statistics.quantiles(timings, n=10)[-1] if len(timings) >= 2 else 0.0,
+        "params": count_parameters(model),
+    }
+
+
+def print_report(rows: list[tuple[str, dict]]) -> None:
+    """
+    Print a side-by-side table of evaluate_quality() results.
+
+    The first row is treated as the reference for the speed-up / size columns.
+    """
+    if not rows:
+        return
+    ref = rows[0][1]
+    print(f"\n{'='*96}")
+    print(f"  {'Model':<24} {'Params':>10} {'Size×':>6} {'Det.%':>7} {'Corr.%':>7} "
+          f"{'p50 ms':>8} {'p90 ms':>8} {'Speed×':>7}")
+    print(f"  {'-'*24} {'-'*10} {'-'*6} {'-'*7} {'-'*7} {'-'*8} {'-'*8} {'-'*7}")
+    for name, r in rows:
+        size_x = ref["params"] / r["params"] if r["params"] else 0.0
+        speed_x = ref["latency_p50_ms"] / r["latency_p50_ms"] if r["latency_p50_ms"] else 0.0
+        print(f"  {name:<24} {r['params']:>10,} {size_x:>5.2f}× {r['det_acc']:>6.1f}% {r['corr_acc']:>6.1f}% "
+              f"{r['latency_p50_ms']:>8.1f} {r['latency_p90_ms']:>8.1f} {speed_x:>6.2f}×")
+    print(f"{'='*96}\n")
@@ -6,26 +6,33 @@ the model is ALREADY in HF format. This script simply copies it
 to the hf_export/ directory alongside the tokenizer.
 
 No weight mapping, no offset hacks, no identity LayerNorm fixes needed.
+
+Usage:
+    python -m src.export_hf
+    python -m src.export_hf --model model_pruned
 """
 
+import argparse
 import json
+import shutil
 from pathlib import Path
 from transformers import BartForConditionalGeneration, PreTrainedTokenizerFast
 from src.config import load_config, get_project_root
+from src.model.verdict_head import VERDICT_HEAD_FILE
 
 
-def export_to_hf():
+def export_to_hf(model_path: str = "model_final"):
     config = load_config()
     project_root = get_project_root()
 
     # ── 1. Load the trained model (already HF format) ──
-    model_dir = project_root / "model_final"
+    model_dir = project_root / model_path
     if not model_dir.exists():
         print(f"❌ {model_dir} not found! Train the model first.")
         return
 
     print(f"📥 Loading model from {model_dir}...")
-    model = BartForConditionalGeneration.from_pretrained(str(model_dir))
+    model = BartForConditionalGeneration.from_pretrained(str(model_dir), attn_implementation=config.model.attn_implementation)
     model.eval()
 
     # ── 2. Load tokenizer ──
@@ -63,6 +70,11 @@ def export_to_hf():
     model.save_pretrained(str(export_dir))
     hf_tokenizer.save_pretrained(str(export_dir))
 
+    # Auxiliary verdict classifier (optional, see src/model/verdict_head.py)
+    verdict_head_path = model_dir / VERDICT_HEAD_FILE
+    if verdict_head_path.exists():
+        shutil.copy(verdict_head_path, export_dir / VERDICT_HEAD_FILE)
+
     # Patch tokenizer_config.json
     config_path = export_dir / "tokenizer_config.json"
     with open(config_path, "r", encoding="utf-8") as f:
@@ -79,4 +91,7 @@ def export_to_hf():
 
 
 if __name__ == "__main__":
-    export_to_hf()
+    parser = argparse.ArgumentParser(description="Export a trained model to hf_export/")
+    parser.add_argument("--model", type=str, default="model_final", help="Path to model directory")
+    args = parser.parse_args()
+    export_to_hf(args.model)
@@ -7,12 +7,34 @@ No custom autoregressive loop, no manual BOS/EOS handling.
 Usage:
     python -m src.generate --text "Ich habe nach Berlin gefahren."
     python -m src.generate --text "Wo du wohnst?" --model model_final
+    python -m src.generate --text "Wo du wohnst?" --shortlist
+    python -m src.generate --text "Ich spiele Fußball." --verdict-head
+    python -m src.generate --text "Heute ich spiele Fußball." --edit-tagger
+    python -m src.generate --text "Ich spiele Fußball." --knn
+    python -m src.generate --text "Wo du wohnst?" --cache cache/results.sqlite
+    python -m src.generate --text "Ihr habt einen Löffel." --lookup data/lookup_index.json
+    python -m src.generate --text "Du spiele Fußball." --rules
+    python -m src.generate --text "Ich habe den Auto." --lazy-explain
+    python -m src.generate --text "Ich habe den Auto." --n-best 5
+    python -m src.generate --paragraph --text "Ich habe den Auto. Wo du wohnst? Ich bin müde."
+    python -m src.generate --input data/val.jsonl --output /tmp/val_out.jsonl
+    python -m src.generate --input data/val.jsonl --output /tmp/val_out.jsonl --workers 8
+    cat sentences.txt | python -m src.generate --input - --output-format text
+
+Startup: only stdlib + config/cache/lookup/rules are imported at module level,
+so --help, argument errors and lookup / rules / cache hits never import torch
+or transformers. Model-backed paths import them on demand and load weights
+via load_hf_model() (memory-mapped safetensors). Benchmark:
+    python scripts/bench_startup.py
 """
 
 import argparse
-from transformers import BartForConditionalGeneration
+import sys
 from src.tokenizer.tokenizer import Tokenizer
+from src.cache import SQLiteResultCache, create_cache, normalize_text
 from src.config import load_config, get_device, get_project_root
+from src.lookup import LookupIndex
+from src.rules import RuleChecker
 
 
 def generate_response(text: str, model, tokenizer, device, max_len=64) -> str:
@@ -58,15 +80,77 @@ def generate_response(text: str, model, tokenizer, device, max_len=64) -> str:
     return result.strip()
 
 
+def _cache_mode(args, model_dir) -> str:
+    """Persistent-cache key suffix for the decoding path selected by the flags."""
+    if args.edit_tagger:
+        from src.model.edit_tagger import EDIT_TAGGER_FILE
+        if (model_dir / EDIT_TAGGER_FILE).exists():
+            return "tagger-no-explain" if args.no_explain else "tagger"
+    if args.verdict_head:
+        from src.model.verdict_head import VERDICT_HEAD_FILE
+        if (model_dir / VERDICT_HEAD_FILE).exists():
+            return "verdict"
+    if args.knn:
+        from src.knn import KNN_INDEX_FILE
+        if (model_dir / KNN_INDEX_FILE).exists():
+            return "knn"
+    if args.shortlist and args.shortlist_verify_rate < 1.0:
+        from src.shortlist import OUTPUT_VOCAB_FILE
+        if (model_dir / OUTPUT_VOCAB_FILE).exists():
+            return "shortlist"  # unverified calls may differ from generate()
+    return ""  # fully verified shortlist decoding is exact, so it shares entries with generate()
+
+
 def main():
     parser = argparse.ArgumentParser(description="A2 Deutsch Grammar Tutor v2.1 (HF BART)")
-    parser.add_argument("--text", type=str, required=True, help="German sentence to check")
+    parser.add_argument("--text", type=str, default=None, help="German sentence to check")
+    parser.add_argument("--input", type=str, default=None,
+                        help="Batch mode: JSONL or plain-text file, one sentence per line ('-' = stdin)")
+    parser.add_argument("--output", type=str, default="-", help="Batch mode: output file ('-' = stdout)")
+    parser.add_argument("--output-format", choices=["jsonl", "text"], default="jsonl")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="Batch mode: sentences per generate() call (default: tuned runtime.batch_size, else 32)")
+    parser.add_argument("--window", type=int, default=256, help="Batch mode: max sentences read ahead (in flight)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Batch mode: forked CPU worker processes sharing one copy of the weights (see src/pool.py)")
+    parser.add_argument("--threads-per-worker", type=int, default=1, help="Batch mode: torch threads per worker")
+    parser.add_argument("--paragraph", action="store_true",
+                        help="--text is a paragraph: split into sentences and check them in one batched pass")
     parser.add_argument("--model", type=str, default="model_final", help="Path to model directory")
+    parser.add_argument("--shortlist", action="store_true",
+                        help="Restrict the LM head to the model's output_vocab.json (see src/shortlist.py)")
+    parser.add_argument("--shortlist-verify-rate", type=float, default=0.05,
+                        help="With --shortlist: fraction of calls checked against the full vocabulary (1.0 = exact)")
+    parser.add_argument("--verdict-head", action="store_true",
+                        help="Skip the decoder when verdict_head.safetensors is confident the input is correct")
+    parser.add_argument("--edit-tagger", action="store_true",
+                        help="Correct with the one-pass edit tagger (see src/train_edit_tagger.py)")
+    parser.add_argument("--rules", action="store_true",
+                        help="Answer recognized A1 patterns with the deterministic rule checker (see src/rules.py)")
+    parser.add_argument("--knn", action="store_true",
+                        help="Take the verdict from the nearest training inputs when similar enough (see src/knn.py)")
+    parser.add_argument("--no-explain", action="store_true",
+                        help="Return verdict + correction only (--edit-tagger: never run the decoder; "
+                             "otherwise stop decoding after the '✅ Correct:' line)")
+    parser.add_argument("--lazy-explain", action="store_true",
+                        help="Print verdict + correction first, decode the explanation only when asked")
+    parser.add_argument("--n-best", type=int, default=0,
+                        help="Sample N candidates (generation.temperature / top_k) from one encoder pass, "
+                             "ranked by sequence log-prob with a confidence")
+    parser.add_argument("--seed", type=int, default=None, help="With --n-best: random seed for sampling")
+    parser.add_argument("--cache", type=str, default=None,
+                        help="Persistent SQLite result cache shared across runs (default: inference.cache_path)")
+    parser.add_argument("--lookup", type=str, default=None,
+                        help="Exact-match index of corpus sentences (default: inference.lookup_path; build: python -m src.lookup)")
     args = parser.parse_args()
+    if (args.text is None) == (args.input is None):
+        parser.error("exactly one of --text or --input is required")
+    if args.n_best and args.input is not None:
+        parser.error("--n-best works with --text only")
 
     config = load_config()
-    device = get_device("auto")
     project_root = get_project_root()
+    args.batch_size = args.batch_size or config.runtime.batch_size or 32
 
     # Load tokenizer
     tokenizer = Tokenizer(project_root / "src/tokenizer/tokenizer.json")
@@ -77,13 +161,169 @@ def main():
         print(f"❌ Model not found at {model_dir}. Please run training first.")
         return
 
-    model = BartForConditionalGeneration.from_pretrained(str(model_dir))
-    model = model.to(device)
-    model.eval()
+    if args.cache:
+        config.inference.cache_path = args.cache
+
+    # Batch mode: stream --input → --output in bounded batches (src/batch.py)
+    if args.input is not None:
+        from src.batch import print_summary, stream_check
+        from src.inference import load_hf_model
+        from src.pool import WorkerPool
+
+        device = "cpu" if args.workers else get_device("auto")
+        cache = create_cache(config, model_dir) if config.inference.cache_path else None
+        model = load_hf_model(model_dir, device, config.model.attn_implementation)
+        print(f"✅ Loaded HF BART model from {model_dir}", file=sys.stderr)
+        pool = None
+        if args.workers:
+            # Workers reopen the same SQLite cache file, so --cache keeps working with --workers
+            pool = WorkerPool(model, tokenizer, config, n_workers=args.workers,
+                              threads_per_worker=args.threads_per_worker, batch_size=args.batch_size,
+                              cache=cache if isinstance(cache, SQLiteResultCache) else None)
+            cache = None
+            print(f"👷 {pool.n_workers} workers × {pool.threads_per_worker} thread(s)", file=sys.stderr)
+        in_stream = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+        out_stream = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+        try:
+            stats = stream_check(
+                in_stream, out_stream, model, tokenizer, config, device,
+                batch_size=args.batch_size, window=args.window,
+                output_format=args.output_format, cache=cache, pool=pool,
+            )
+        finally:
+            if pool is not None:
+                pool.close()
+            if in_stream is not sys.stdin:
+                in_stream.close()
+            if out_stream is not sys.stdout:
+                out_stream.close()
+        print_summary(stats)
+        return
+
+    # Paragraph mode: segment, dedupe, one batched pass (src/paragraph.py)
+    if args.paragraph:
+        from src.inference import load_hf_model
+        from src.paragraph import check_paragraph
+
+        device = get_device("auto")
+        cache = create_cache(config, model_dir) if config.inference.cache_path else None
+        model = load_hf_model(model_dir, device, config.model.attn_implementation)
+        results = check_paragraph(args.text, model, tokenizer, config, device, cache=cache)
+        print(f"\n📄 {len(results)} sentences")
+        for r in results:
+            mark = {"correct": "✅", "incorrect": "❌"}.get(r["verdict"], "❔")
+            print(f"\n{mark} [{r['start']}:{r['end']}] {r['sentence']}")
+            if r["verdict"] != "correct":
+                print("   " + r["response"].replace("\n", "\n   "))
+        print()
+        return
+
+    # Exact corpus match: answer with the gold output, no model needed
+    lookup_path = args.lookup or config.inference.lookup_path
+    if lookup_path and not args.n_best:
+        lookup = LookupIndex.load(project_root / lookup_path)
+        gold = lookup.get(args.text)
+        if gold is not None:
+            print(f"⚡ Lookup hit ({len(lookup)} indexed inputs)")
+            print(f"\nInput:  {args.text}")
+            print(f"Output: {gold}\n")
+            return
+
+    # Deterministic rules: recognized patterns need no model either
+    if args.rules:
+        answer = RuleChecker().check(args.text)
+        if answer is not None:
+            print("⚡ Rule checker answered")
+            print(f"\nInput:  {args.text}")
+            print(f"Output: {answer}\n")
+            return
+
+    # Persistent cache: a hit answers without loading the model at all (sampling is never cached)
+    cache = None
+    if config.inference.cache_path and not args.n_best:
+        cache = create_cache(config, model_dir, mode=_cache_mode(args, model_dir))
+        cached = cache.get(args.text)
+        if cached is not None:
+            if args.no_explain:
+                cached = cached.split("\n📝")[0]      # src.inference.EXPLANATION_MARKER (not imported: no torch here)
+            print(f"⚡ Cache hit ({config.inference.cache_path})")
+            print(f"\nInput:  {args.text}")
+            print(f"Output: {cached}\n")
+            return
+
+    text = normalize_text(args.text) if cache is not None else args.text
+
+    from src.inference import (
+        generate_n_best, generate_response_lazy, generate_response_with_knn, generate_response_with_tagger,
+        generate_response_with_verdict, load_hf_model,
+    )
+    from src.knn import load_knn_index
+    from src.model.edit_tagger import load_edit_tagger
+    from src.model.model import d_model_of
+    from src.model.verdict_head import load_verdict_head
+    from src.shortlist import ShortlistDecoder, load_output_vocab
+
+    device = get_device("auto")
+    model = load_hf_model(model_dir, device, config.model.attn_implementation)
     print(f"✅ Loaded HF BART model from {model_dir}")
 
+    # n-best sampling: alternatives + confidence, whatever the other decoding flags say
+    if args.n_best:
+        candidates = generate_n_best(text, model, tokenizer, config, device, n=args.n_best,
+                                     max_len=config.model.max_seq_len, seed=args.seed)
+        print(f"\nInput:  {args.text}")
+        print(f"🎲 {args.n_best} samples (temperature {config.generation.temperature}, "
+              f"top_k {config.generation.top_k}) → {len(candidates)} distinct\n")
+        for rank, c in enumerate(candidates, 1):
+            print(f"#{rank}  confidence {c['confidence']:.1%} · log-prob {c['log_prob']:.2f} · "
+                  f"{c['count']}/{args.n_best} samples")
+            print("    " + c["response"].replace("\n", "\n    ") + "\n")
+        return
+
     # Generate
-    response = generate_response(args.text, model, tokenizer, device, config.model.max_seq_len)
+    output_vocab = load_output_vocab(model_dir) if args.shortlist else None
+    if args.shortlist and output_vocab is None:
+        print(f"⚠️  No output_vocab.json in {model_dir} (run: python -m src.shortlist). Using full vocabulary.")
+    verdict_head = load_verdict_head(model_dir, d_model_of(model.config)) if args.verdict_head else None
+    if args.verdict_head and verdict_head is None:
+        print(f"⚠️  No verdict_head.safetensors in {model_dir} (train with training.verdict_loss_weight > 0).")
+    tagger = load_edit_tagger(model_dir, d_model_of(model.config)) if args.edit_tagger else None
+    if args.edit_tagger and tagger is None:
+        print(f"⚠️  No edit_tagger.safetensors in {model_dir} (run: python -m src.train_edit_tagger).")
+    knn = load_knn_index(model_dir) if args.knn else None
+    if args.knn and knn is None:
+        print(f"⚠️  No knn_index.npz in {model_dir} (run: python -m src.knn).")
+    if tagger is not None:
+        response = generate_response_with_tagger(
+            text, model, tokenizer, config, device, tagger.to(device),
+            explain=not args.no_explain, max_len=config.model.max_seq_len,
+        )
+    elif verdict_head is not None:
+        verdict_head = verdict_head.to(device)
+        response = generate_response_with_verdict(
+            text, model, tokenizer, config, device, verdict_head, config.model.max_seq_len
+        )
+    elif knn is not None:
+        response = generate_response_with_knn(
+            text, model, tokenizer, config, device, knn, config.model.max_seq_len
+        )
+    elif output_vocab is not None:
+        decoder = ShortlistDecoder(model, tokenizer, output_vocab, verify_rate=args.shortlist_verify_rate)
+        response = decoder.generate(text, config, device, config.model.max_seq_len)
+    elif args.lazy_explain or args.no_explain:
+        # Stop after the correction line; only complete responses reach the cache
+        lazy = generate_response_lazy(text, model, tokenizer, config, device, config.model.max_seq_len, cache=cache)
+        print(f"\nInput:  {args.text}")
+        print(f"Output: {lazy.text}\n")
+        if lazy.pending and args.lazy_explain and sys.stdin.isatty():
+            if input("📝 Show explanation? [y/N] ").strip().lower() in ("y", "yes"):
+                print(f"\nOutput: {lazy.explain()}\n")
+        return
+    else:
+        response = generate_response(text, model, tokenizer, device, config.model.max_seq_len)
+
+    if cache is not None:
+        cache.put(text, response)
 
     print(f"\nInput:  {args.text}")
     print(f"Output: {response}\n")
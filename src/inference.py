@@ -1,18 +1,96 @@
 """
 inference.py — Shared inference utilities for A2 Deutsch Grammar Tutor v2.1 (HF BART).
 
-Provides two reusable building blocks:
-  - load_model()         → loads tokenizer + HF BART model from directory
-  - generate_response()  → uses model.generate() for Seq2Seq inference
+Provides reusable building blocks:
+  - load_model()                      → loads tokenizer + HF BART model from directory
+  - load_hf_model()                   → fast model load: meta-device skeleton + memory-mapped safetensors
+  - generate_response()               → uses model.generate() for Seq2Seq inference
+  - generate_responses()              → batched generate_response() for many sentences (deduplicated)
+  - generate_response_lazy()          → stops after the "✅ Correct:" line; .explain() resumes decoding
+  - generate_n_best()                 → N sampled candidates from one encoder pass, ranked with a confidence
+  - generate_response_with_verdict()  → encoder-only "✅ Correct." fast path via VerdictHead
+  - generate_response_with_tagger()   → one-pass correction via EditTagger, decoder only for the explanation
+  - generate_response_with_knn()      → verdict from nearest training inputs (src/knn.py), decoder only for novel inputs
+
+`transformers` is imported lazily (≈3 s): importing this module for the
+cache / lookup / rules fast paths only pays for torch.
+
+generate_response() / generate_responses() record latency, encoder vs decoder
+time, token counts, decode steps, batch sizes and the verdict mix in
+src/metrics.py (METRICS).
 """
 
+from __future__ import annotations
+
+import threading
+import time
 import torch
 from pathlib import Path
-from transformers import BartForConditionalGeneration
+from typing import TYPE_CHECKING
 
+from src.cache import ResultCache, SQLiteResultCache, normalize_text
 from src.config import Config, get_device, get_project_root
+from src.knn import KnnIndex, pool_embeddings
+from src.lookup import LookupIndex
+from src.metrics import (
+    BATCH_SIZE, CORRECT_VERDICT, DECODE_STEPS, DECODER_SECONDS, ENCODER_SECONDS, INPUT_TOKENS, OUTPUT_TOKENS,
+    REQUEST_SECONDS, record_response,
+)
+from src.rules import RuleChecker
+from src.model.edit_tagger import EditTagger, apply_edits, join_words
+from src.model.verdict_head import VerdictHead
 from src.tokenizer.tokenizer import Tokenizer
 
+if TYPE_CHECKING:
+    from transformers import BartForConditionalGeneration
+
+
+def load_hf_model(
+    model_path: str | Path,
+    device: str = "cpu",
+    attn_implementation: str = "sdpa",
+) -> BartForConditionalGeneration:
+    """
+    Load a saved HF BART directory without from_pretrained()'s generic machinery.
+
+      config.json             → BartConfig
+      skeleton on "meta"      → no random init, no allocation
+      model.safetensors       → memory-mapped tensors assigned into the skeleton (no copy on CPU)
+      generation_config.json  → model.generation_config (if present)
+
+    Tied embeddings (shared / embed_tokens / lm_head) are re-tied after loading.
+    `attn_implementation` ("sdpa" / "eager", config.model.attn_implementation)
+    is not saved in config.json, so it is applied here.
+    Falls back to from_pretrained() for directories without model.safetensors
+    or whose weights do not cover the architecture.
+
+    Returns:
+        Model on `device` in eval mode.
+    """
+    from safetensors.torch import load_file
+    from transformers import BartConfig, BartForConditionalGeneration, GenerationConfig
+
+    from src.model.model import check_attn_implementation
+
+    attn_implementation = check_attn_implementation(attn_implementation)
+    model_path = Path(model_path)
+    weights = model_path / "model.safetensors"
+    if not weights.exists():
+        return BartForConditionalGeneration.from_pretrained(
+            str(model_path), attn_implementation=attn_implementation).to(device).eval()  # pyright: ignore[reportArgumentType]
+
+    with torch.device("meta"):
+        model = BartForConditionalGeneration(
+            BartConfig.from_pretrained(str(model_path), attn_implementation=attn_implementation))
+    model.load_state_dict(load_file(str(weights)), strict=False, assign=True)
+    model.tie_weights()
+    if any(t.is_meta for t in list(model.parameters()) + list(model.buffers())):
+        return BartForConditionalGeneration.from_pretrained(
+            str(model_path), attn_implementation=attn_implementation).to(device).eval()  # pyright: ignore[reportArgumentType]
+    if (model_path / "generation_config.json").exists():
+        model.generation_config = GenerationConfig.from_pretrained(str(model_path))
+    return model.to(device).eval()  # pyright: ignore[reportArgumentType]
+
 
 def load_model(
     model_path: str | Path | None = None,
@@ -26,7 +104,8 @@ def load_model(
       - model.safetensors    (weights: E, P, W_Q/K/V/O, W₁, W₂, LN per layer)
 
     Args:
-        model_path: Path to model directory (default: project_root/model_final).
+        model_path: Path to model directory (default: the registry's ACTIVE version,
+            else project_root/model_final).
         config: Optional Config for device selection.
 
     Returns:
@@ -39,16 +118,17 @@ def load_model(
 
     project_root = get_project_root()
     if model_path is None:
-        model_path = project_root / "model_final"
+        from src.registry import ModelRegistry
+
+        registry = ModelRegistry(project_root / config.inference.registry_path)
+        active = registry.active()
+        model_path = registry.path(active) if active else project_root / "model_final"
     model_path = Path(model_path)
 
     device = get_device(config.training.device)
     tokenizer = Tokenizer(project_root / "src/tokenizer/tokenizer.json")
 
-    # Load HF model directly — no manual state_dict manipulation needed
-    model = BartForConditionalGeneration.from_pretrained(str(model_path))
-    model = model.to(device)
-    model.eval()
+    model = load_hf_model(model_path, device, config.model.attn_implementation)
 
     return model, tokenizer, device
 
@@ -60,6 +140,9 @@ def generate_response(
     config: Config,
     device: str,
     max_len: int = 64,
+    cache: ResultCache | SQLiteResultCache | None = None,
+    lookup: LookupIndex | None = None,
+    rules: RuleChecker | None = None,
 ) -> str:
     """
     Run grammar check using HF's model.generate().
@@ -77,10 +160,34 @@ def generate_response(
         config: Config for max_seq_len.
         device: Device string.
         max_len: Maximum generation length.
+        cache: Optional ResultCache or SQLiteResultCache (src/cache.py). The model
+            then runs on the normalized text and repeated sentences skip
+            encode/decode entirely (across processes with the SQLite backend).
+        lookup: Optional exact-match LookupIndex (src/lookup.py), consulted
+            first; corpus sentences get their gold output without the model.
+        rules: Optional RuleChecker (src/rules.py), consulted next; recognized
+            A1 patterns are answered deterministically, anything else abstains.
 
     Returns:
         Grammar check result as string.
     """
+    start = time.perf_counter()
+    if lookup is not None:
+        gold = lookup.get(text)
+        if gold is not None:
+            return _served(gold, "lookup", "single", start)
+
+    if rules is not None:
+        answer = rules.check(text)
+        if answer is not None:
+            return _served(answer, "rules", "single", start)
+
+    if cache is not None:
+        cached = cache.get(text)
+        if cached is not None:
+            return _served(cached, "cache", "single", start)
+        text = normalize_text(text)
+
     model.eval()
 
     # Encode source: <BOS> + [tokens] + <EOS>
@@ -88,16 +195,531 @@ def generate_response(
     input_ids = torch.tensor([src_ids], dtype=torch.long, device=device)
     attention_mask = (input_ids != tokenizer.pad_id).long()
 
-    # Generate using HF standard pipeline
+    from transformers.modeling_outputs import BaseModelOutput
+
+    # Generate using HF standard pipeline (encoder run separately so its time is measured on its own)
     with torch.no_grad():
-        output_ids = model.generate(
-            input_ids=input_ids,
+        encode_start = time.perf_counter()
+        memory = model.get_encoder()(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+        encode_end = time.perf_counter()
+        output_ids = model.generate(  # pyright: ignore[reportAttributeAccessIssue]
+            encoder_outputs=BaseModelOutput(last_hidden_state=memory),
             attention_mask=attention_mask,
             max_length=max_len,
             num_beams=1,
             do_sample=False,
         )
+    _record_generate("single", attention_mask, output_ids, tokenizer.pad_id,
+                     encode_end - encode_start, time.perf_counter() - encode_end)
 
     # Decode result (skip <BOS>, <EOS>, <PAD>)
+    result = tokenizer.decode(output_ids[0].tolist(), skip_special=True).strip()
+    if cache is not None:
+        cache.put(text, result)
+    return _served(result, "model", "single", start)
+
+
+def _served(response: str, source: str, path: str, start: float) -> str:
+    record_response(response, source)
+    REQUEST_SECONDS.observe(time.perf_counter() - start, path=path)
+    return response
+
+
+def _record_generate(
+    path: str,
+    attention_mask: torch.Tensor,
+    output_ids: torch.Tensor,
+    pad_id: int,
+    encoder_seconds: float,
+    decoder_seconds: float,
+) -> None:
+    """Per generate() call: encoder / decoder time, batch size, steps; per row: input / output tokens."""
+    ENCODER_SECONDS.observe(encoder_seconds, path=path)
+    DECODER_SECONDS.observe(decoder_seconds, path=path)
+    BATCH_SIZE.observe(output_ids.shape[0], path=path)
+    DECODE_STEPS.observe(output_ids.shape[1] - 1, path=path)
+    for n in attention_mask.sum(dim=1).tolist():
+        INPUT_TOKENS.observe(n)
+    for n in (output_ids[:, 1:] != pad_id).sum(dim=1).tolist():
+        OUTPUT_TOKENS.observe(n)
+
+
+def generate_responses(
+    texts: list[str],
+    model: BartForConditionalGeneration,
+    tokenizer: Tokenizer,
+    config: Config,
+    device: str,
+    max_len: int = 64,
+    batch_size: int = 32,
+    cache: ResultCache | SQLiteResultCache | None = None,
+) -> list[str]:
+    """
+    Batched grammar check: one model.generate() call per batch_size unique sentences.
+
+    Sentences are deduplicated on normalize_text() (repeats cost nothing), served
+    from the cache when possible, and batched in order of token length so that
+    padding is minimal. Greedy decoding with an attention mask gives the same
+    responses as generate_response() on each sentence.
+
+    Returns:
+        One response per input text, in input order.
+    """
+    start = time.perf_counter()
+    model.eval()
+    results = [""] * len(texts)                 # every slot is filled below
+    pending: dict[str, list[int]] = {}          # normalized sentence → positions
+    for i, text in enumerate(texts):
+        key = normalize_text(text)
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None:
+            results[i] = cached
+            record_response(cached, "cache")
+        else:
+            pending.setdefault(key, []).append(i)
+
+    from transformers.modeling_outputs import BaseModelOutput
+
+    encoded = {key: tokenizer.encode(key, add_bos=True, add_eos=True, max_len=max_len) for key in pending}
+    keys = sorted(pending, key=lambda k: len(encoded[k]))
+    for offset in range(0, len(keys), batch_size):
+        batch = keys[offset:offset + batch_size]
+        width = max(len(encoded[k]) for k in batch)
+        input_ids = torch.tensor(
+            [tokenizer.pad_sequence(encoded[k], width) for k in batch], dtype=torch.long, device=device
+        )
+        attention_mask = (input_ids != tokenizer.pad_id).long()
+        with torch.no_grad():
+            encode_start = time.perf_counter()
+            memory = model.get_encoder()(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+            encode_end = time.perf_counter()
+            output_ids = model.generate(  # pyright: ignore[reportAttributeAccessIssue]
+                encoder_outputs=BaseModelOutput(last_hidden_state=memory),
+                attention_mask=attention_mask,
+                max_length=max_len,
+                num_beams=1,
+                do_sample=False,
+            )
+        _record_generate("batch", attention_mask, output_ids, tokenizer.pad_id,
+                         encode_end - encode_start, time.perf_counter() - encode_end)
+        for key, row in zip(batch, output_ids.tolist()):
+            result = tokenizer.decode(row, skip_special=True).strip()
+            if cache is not None:
+                cache.put(key, result)
+            for n, i in enumerate(pending[key]):
+                results[i] = result
+                record_response(result, "model" if n == 0 else "dedup")
+    REQUEST_SECONDS.observe(time.perf_counter() - start, path="batch")
+    return results
+
+
+EXPLANATION_MARKER = "\n📝 Пояснення:"
+
+
+def _greedy_continue(
+    model: BartForConditionalGeneration,
+    memory: torch.FloatTensor,
+    attention_mask: torch.Tensor,
+    past_key_values,
+    tokens: list[int],
+    max_new: int,
+    stop=None,
+):
+    """
+    Greedy-decode one sequence token by token with the HF KV cache, appending to `tokens` in place.
+
+    Stops at <EOS>, after `max_new` generated tokens (as generate(max_length=…)
+    with its forced <EOS>), or when stop(tokens) is true. Returns the updated cache.
+    """
+    from transformers.modeling_outputs import BaseModelOutput
+
+    encoder_outputs = BaseModelOutput(last_hidden_state=memory)
+    eos_id = model.config.eos_token_id
+    with torch.no_grad():
+        while len(tokens) - 1 < max_new and tokens[-1] != eos_id:
+            out = model(
+                encoder_outputs=encoder_outputs,
+                attention_mask=attention_mask,
+                decoder_input_ids=torch.tensor([[tokens[-1]]], device=memory.device),
+                past_key_values=past_key_values,
+                use_cache=True,
+            )
+            past_key_values = out.past_key_values
+            tokens.append(int(out.logits[0, -1].argmax()))
+            if stop is not None and stop(tokens):
+                break
+    return past_key_values
+
+
+class LazyResponse:
+    """
+    Verdict + correction now, the explanation only when asked for.
+
+    .text       "✅ Correct." or "❌ Incorrect.\\n✅ Correct: <sentence>"
+    .pending    True while the explanation has not been decoded
+    .explain()  resumes greedy decoding from the saved KV cache / last token and
+                returns the full response (identical to generate_response());
+                the decoder state is released afterwards
+    """
+
+    def __init__(self, text: str, full: str | None = None, state: dict | None = None):
+        self.text = text
+        self._full = full
+        self._state = state
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> bool:
+        return self._full is None
+
+    def explain(self) -> str:
+        with self._lock:
+            if self._full is None:
+                s = self._state
+                assert s is not None                # a handle without a saved state is always complete
+                start = time.perf_counter()
+                steps = len(s["tokens"])
+                _greedy_continue(s["model"], s["memory"], s["attention_mask"], s["past_key_values"], s["tokens"],
+                                 s["max_new"])
+                DECODER_SECONDS.observe(time.perf_counter() - start, path="explain")
+                DECODE_STEPS.observe(len(s["tokens"]) - steps, path="explain")
+                self._full = s["tokenizer"].decode(s["tokens"], skip_special=True).strip()
+                if s["cache"] is not None:
+                    s["cache"].put(s["key"], self._full)
+                self._state = None
+            return self._full
+
+    def __str__(self) -> str:
+        return self.text
+
+
+def generate_response_lazy(
+    text: str,
+    model: BartForConditionalGeneration,
+    tokenizer: Tokenizer,
+    config: Config,
+    device: str,
+    max_len: int = 64,
+    cache: ResultCache | SQLiteResultCache | None = None,
+) -> LazyResponse:
+    """
+    Grammar check that stops decoding after the "✅ Correct: …" line.
+
+    Data flow:
+      text → encode → Encoder → memory [1, T_src, d]
+           → Decoder (greedy, KV cache) → "❌ Incorrect.\\n✅ Correct: <sentence>\\n"  ⏸ stop
+             (or "✅ Correct." <EOS> — then there is nothing left to decode)
+           → LazyResponse(text, state = memory + KV cache + tokens)
+      .explain() → Decoder resumes at the saved position → "…\\n📝 Пояснення: …" <EOS>
+
+    The explanation is the longest part of an answer, so clients that only need
+    the verdict and the correction (LMS grading, bulk checks) skip most decode
+    steps. A cache hit returns a complete LazyResponse; a resumed explanation
+    is written to the cache.
+
+    Returns:
+        LazyResponse (str() gives the verdict + correction).
+    """
+    from src.model.model import decoder_start_id
+
+    start = time.perf_counter()
+    if cache is not None:
+        cached = cache.get(text)
+        if cached is not None:
+            _served(cached, "cache", "lazy", start)
+            return LazyResponse(cached.split(EXPLANATION_MARKER)[0], cached)
+        text = normalize_text(text)
+
+    model.eval()
+    input_ids = torch.tensor([tokenizer.encode(text, add_bos=True, add_eos=True, max_len=max_len)],
+                             dtype=torch.long, device=device)
+    attention_mask = (input_ids != tokenizer.pad_id).long()
+    with torch.no_grad():
+        memory = model.get_encoder()(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+    encode_end = time.perf_counter()
+
+    def correction_line_done(tokens: list[int]) -> bool:
+        return "\n" in tokenizer.decode(tokens[-1:], skip_special=True) and \
+            "✅ Correct:" in tokenizer.decode(tokens, skip_special=True)
+
+    max_new = max_len - 1 - (1 if model.generation_config.forced_eos_token_id is not None else 0)
+    tokens = [decoder_start_id(model.config)]
+    past_key_values = _greedy_continue(model, memory, attention_mask, None, tokens, max_new, correction_line_done)
+
+    ENCODER_SECONDS.observe(encode_end - start, path="lazy")
+    DECODER_SECONDS.observe(time.perf_counter() - encode_end, path="lazy")
+    BATCH_SIZE.observe(1, path="lazy")
+    DECODE_STEPS.observe(len(tokens) - 1, path="lazy")
+    INPUT_TOKENS.observe(input_ids.shape[1])
+    prefix = tokenizer.decode(tokens, skip_special=True).strip()
+    if tokens[-1] == tokenizer.eos_id or len(tokens) - 1 >= max_new:
+        if cache is not None:
+            cache.put(text, prefix)
+        response = LazyResponse(prefix, prefix)
+    else:
+        response = LazyResponse(prefix, state={
+            "model": model, "tokenizer": tokenizer, "memory": memory, "attention_mask": attention_mask,
+            "past_key_values": past_key_values, "tokens": tokens, "max_new": max_new,
+            "cache": cache, "key": text,
+        })
+    _served(prefix, "model", "lazy", start)
+    return response
+
+
+def generate_n_best(
+    text: str,
+    model: BartForConditionalGeneration,
+    tokenizer: Tokenizer,
+    config: Config,
+    device: str,
+    n: int = 5,
+    max_len: int = 64,
+    seed: int | None = None,
+) -> list[dict]:
+    """
+    Sample N candidate responses from one encoder pass and rank them.
+
+    Data flow:
+      text → encode → Encoder (once) → memory [1, T_src, d]
+           → expand → [N, T_src, d]       (a view: no encoder recompute, no copy)
+           → Decoder (one batched sampled decode, generation.temperature / top_k) → N sequences
+           → log P(sequence) under the unmodified model (temperature 1, full vocabulary)
+           → deduplicate → rank by log-prob
+
+    Each candidate is {"response", "log_prob", "confidence", "count"}:
+    confidence is the candidate's share of the probability mass of all
+    distinct candidates (softmax over their log-probs), count is how many of
+    the N samples produced it. A top confidence near 1 means the alternatives
+    the model can produce are much less likely; a low one flags inputs worth a
+    second look. Sampling never touches the result cache.
+
+    Returns:
+        Distinct candidates, most likely first.
+    """
+    from transformers.modeling_outputs import BaseModelOutput
+
+    start = time.perf_counter()
+    model.eval()
+    src_ids = tokenizer.encode(text, add_bos=True, add_eos=True, max_len=max_len)
+    input_ids = torch.tensor([src_ids], dtype=torch.long, device=device)
+    attention_mask = (input_ids != tokenizer.pad_id).long()
+    # A seed reseeds a forked RNG only: the caller's global generator state is restored afterwards
+    rng_device = input_ids.device
+    forked_rng = torch.random.fork_rng(devices=[] if rng_device.type == "cpu" else [rng_device],
+                                       enabled=seed is not None, device_type=rng_device.type)
+
+    with forked_rng, torch.no_grad():
+        if seed is not None:
+            torch.manual_seed(seed)
+        memory = model.get_encoder()(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+        encode_end = time.perf_counter()
+        out = model.generate(  # pyright: ignore[reportAttributeAccessIssue]
+            encoder_outputs=BaseModelOutput(last_hidden_state=memory.expand(n, -1, -1)),
+            attention_mask=attention_mask.expand(n, -1),
+            max_length=max_len,
+            num_beams=1,
+            do_sample=True,
+            temperature=config.generation.temperature,
+            top_k=config.generation.top_k,
+            output_logits=True,
+            return_dict_in_generate=True,
+        )
+    _record_generate("nbest", attention_mask, out.sequences, tokenizer.pad_id,
+                     encode_end - start, time.perf_counter() - encode_end)
+
+    # Score with the raw logits: the ranking should not depend on the sampling temperature
+    generated = out.sequences[:, 1:]
+    log_probs = torch.stack(out.logits, dim=1).float().log_softmax(dim=-1)
+    token_log_probs = log_probs.gather(-1, generated.unsqueeze(-1)).squeeze(-1)
+    eos = generated == model.config.eos_token_id
+    after_eos = (eos.cumsum(dim=1) - eos.long()) > 0                      # positions past the first <EOS>
+    sequence_log_probs = token_log_probs.masked_fill(after_eos, 0.0).sum(dim=1).tolist()
+
+    candidates: dict[str, dict] = {}
+    for ids, log_prob in zip(out.sequences.tolist(), sequence_log_probs):
+        response = tokenizer.decode(ids, skip_special=True).strip()
+        candidate = candidates.setdefault(response, {"response": response, "log_prob": log_prob, "count": 0})
+        candidate["count"] += 1
+    ranked = sorted(candidates.values(), key=lambda c: c["log_prob"], reverse=True)
+    shares = torch.tensor([c["log_prob"] for c in ranked]).softmax(dim=0).tolist()
+    for candidate, share in zip(ranked, shares):
+        candidate["confidence"] = share
+    _served(ranked[0]["response"], "model", "nbest", start)
+    return ranked
+
+
+def generate_response_with_verdict(
+    text: str,
+    model: BartForConditionalGeneration,
+    tokenizer: Tokenizer,
+    config: Config,
+    device: str,
+    verdict_head: VerdictHead,
+    max_len: int = 64,
+) -> str:
+    """
+    Verdict-first grammar check.
+
+    Data flow:
+      text → encode → Encoder → memory [1, T_src, d]
+           → VerdictHead → P(✅ Correct.)
+           ≥ config.inference.verdict_threshold → "✅ Correct."  (no decoder pass)
+           otherwise → Decoder (greedy) on the same memory → response string
+
+    Args:
+        verdict_head: VerdictHead loaded with load_verdict_head(model_dir, d_model).
+
+    Returns:
+        Grammar check result as string (same format as generate_response()).
+    """
+    model.eval()
+    verdict_head.eval()
+
+    src_ids = tokenizer.encode(text, add_bos=True, add_eos=True, max_len=max_len)
+    input_ids = torch.tensor([src_ids], dtype=torch.long, device=device)
+    attention_mask = (input_ids != tokenizer.pad_id).long()
+
+    from transformers.modeling_outputs import BaseModelOutput
+
+    with torch.no_grad():
+        memory = model.get_encoder()(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+        p_correct = torch.sigmoid(verdict_head(memory, attention_mask)).item()
+        if p_correct >= config.inference.verdict_threshold:
+            return CORRECT_VERDICT
+
+        # Not confident → decode, reusing the encoder output (no second encoder pass)
+        output_ids = model.generate(  # pyright: ignore[reportAttributeAccessIssue]
+            encoder_outputs=BaseModelOutput(last_hidden_state=memory),
+            attention_mask=attention_mask,
+            max_length=max_len,
+            num_beams=1,
+            do_sample=False,
+        )
+
+    result = tokenizer.decode(output_ids[0].tolist(), skip_special=True)
+    return result.strip()
+
+
+def generate_response_with_tagger(
+    text: str,
+    model: BartForConditionalGeneration,
+    tokenizer: Tokenizer,
+    config: Config,
+    device: str,
+    tagger: EditTagger,
+    explain: bool = True,
+    max_len: int = 64,
+) -> str:
+    """
+    Non-autoregressive grammar check.
+
+    Data flow:
+      text → encode_words → Encoder → memory [1, T_src, d]
+           → EditTagger → (edit, append, slot) per word → corrected sentence
+           unchanged → "✅ Correct."                                (no decoder pass)
+           changed   → "❌ Incorrect.\n✅ Correct: <tagger output>"
+                       + (explain) Decoder continues after the forced prefix
+                         "…\n📝 Пояснення:" on the same memory
+
+    Args:
+        tagger: EditTagger loaded with load_edit_tagger(model_dir, d_model).
+        explain: If False, return verdict + correction only (decoder never runs).
+
+    Returns:
+        Grammar check result as string (same format as generate_response()).
+    """
+    model.eval()
+    tagger.eval()
+
+    src_ids, word_pos, words = tokenizer.encode_words(text, max_len=max_len)
+    input_ids = torch.tensor([src_ids], dtype=torch.long, device=device)
+    attention_mask = (input_ids != tokenizer.pad_id).long()
+
+    from transformers.modeling_outputs import BaseModelOutput
+
+    with torch.no_grad():
+        memory = model.get_encoder()(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+        corrected = apply_edits(words, *tagger.predict(memory, word_pos, words))
+        if corrected == words:
+            return CORRECT_VERDICT
+
+        prefix = f"❌ Incorrect.\n✅ Correct: {join_words(corrected)}"
+        if not explain:
+            return prefix
+
+        # Explanation only: the prefix is teacher-forced in one parallel pass
+        prefix_ids = [model.config.decoder_start_token_id] + tokenizer.encode(
+            prefix + "\n📝 Пояснення:", add_bos=False, add_eos=False
+        )
+        output_ids = model.generate(  # pyright: ignore[reportAttributeAccessIssue]
+            encoder_outputs=BaseModelOutput(last_hidden_state=memory),
+            attention_mask=attention_mask,
+            decoder_input_ids=torch.tensor([prefix_ids], dtype=torch.long, device=device),
+            max_length=max_len,
+            num_beams=1,
+            do_sample=False,
+        )
+
+    result = tokenizer.decode(output_ids[0].tolist(), skip_special=True)
+    return result.strip()
+
+
+def generate_response_with_knn(
+    text: str,
+    model: BartForConditionalGeneration,
+    tokenizer: Tokenizer,
+    config: Config,
+    device: str,
+    knn: KnnIndex,
+    max_len: int = 64,
+) -> str:
+    """
+    Retrieval-first grammar check.
+
+    Data flow:
+      text → encode → Encoder → memory [1, T_src, d] → pooled unit vector
+           → KnnIndex → similarity-weighted verdict of the top config.inference.knn_k neighbours
+           top-1 sim ≥ knn_threshold, verdict ✅ → "✅ Correct."             (no decoder pass)
+           top-1 sim ≥ knn_threshold, verdict ❌ → Decoder continues after the
+                                                   forced "❌ Incorrect.\n✅ Correct:" template
+           novel input                           → Decoder (greedy) on the same memory
+
+    Args:
+        knn: KnnIndex loaded with load_knn_index(model_dir).
+
+    Returns:
+        Grammar check result as string (same format as generate_response()).
+    """
+    model.eval()
+
+    src_ids = tokenizer.encode(text, add_bos=True, add_eos=True, max_len=max_len)
+    input_ids = torch.tensor([src_ids], dtype=torch.long, device=device)
+    attention_mask = (input_ids != tokenizer.pad_id).long()
+
+    from transformers.modeling_outputs import BaseModelOutput
+
+    with torch.no_grad():
+        memory = model.get_encoder()(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+        query = pool_embeddings(memory, attention_mask)[0].cpu().numpy()
+        is_correct, similarity, _ = knn.predict(query, config.inference.knn_k, config.inference.knn_n_probe)
+
+        decoder_input_ids = None
+        if similarity >= config.inference.knn_threshold:
+            if is_correct:
+                return CORRECT_VERDICT
+            prefix_ids = [model.config.decoder_start_token_id] + tokenizer.encode(
+                "❌ Incorrect.\n✅ Correct:", add_bos=False, add_eos=False
+            )
+            decoder_input_ids = torch.tensor([prefix_ids], dtype=torch.long, device=device)
+
+        output_ids = model.generate(  # pyright: ignore[reportAttributeAccessIssue]
+            encoder_outputs=BaseModelOutput(last_hidden_state=memory),
+            attention_mask=attention_mask,
+            decoder_input_ids=decoder_input_ids,
+            max_length=max_len,
+            num_beams=1,
+            do_sample=False,
+        )
+
     result = tokenizer.decode(output_ids[0].tolist(), skip_special=True)
     return result.strip()
@@ -0,0 +1,242 @@
+"""
+knn.py — Nearest-neighbour verdicts over mean-pooled encoder embeddings.
+
+The encoder is run once over the training inputs; each sentence becomes one
+L2-normalized vector, so cosine similarity is a dot product:
+
+    memory = Encoder(src) ∈ ℝ^{T×d}
+    e      = Σ_t mask_t · memory_t / Σ_t mask_t      (masked mean, as in VerdictHead)
+    ê      = e / ‖e‖                                   stored as float16 ∈ ℝ^{N×d},
+                                                       upcast once to float32 for search
+
+    sims   = Ê · q̂ ∈ ℝ^N  → top-k neighbours → similarity-weighted verdict vote
+
+Search is a single vectorized GEMV (brute force) or, with --n-lists > 0, an
+IVF partition: spherical k-means centroids, and only the n_probe closest
+lists are scanned.
+
+At inference (src/inference.py: generate_response_with_knn) one encoder pass
+plus a lookup replaces the decoder for inputs whose nearest neighbour is
+similar enough; novel inputs fall through to the decoder.
+
+Saved next to the HF model as knn_index.npz (embeddings, verdicts, optional
+IVF centroids / list assignments) — no pickle.
+
+Usage:
+    python -m src.knn                          # build from data.train_path, report trade-off
+    python -m src.knn --model model_final --n-lists 64
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+import torch
+
+from src.config import load_config, get_device, get_project_root
+from src.metrics import CORRECT_VERDICT
+from src.tokenizer.tokenizer import Tokenizer
+
+if TYPE_CHECKING:
+    from transformers import BartForConditionalGeneration
+
+KNN_INDEX_FILE = "knn_index.npz"
+
+
+@torch.no_grad()
+def encode_texts(
+    model: BartForConditionalGeneration,
+    tokenizer: Tokenizer,
+    texts: list[str],
+    device: str,
+    max_len: int = 64,
+    batch_size: int = 64,
+) -> np.ndarray:
+    """Texts → L2-normalized mean-pooled encoder embeddings [N, d] (float32)."""
+    from src.model.model import d_model_of
+
+    encoder = model.get_encoder()
+    out = []
+    for start in range(0, len(texts), batch_size):
+        batch = [tokenizer.encode(t, add_bos=True, add_eos=True, max_len=max_len) for t in texts[start:start + batch_size]]
+        width = max(len(ids) for ids in batch)
+        input_ids = torch.tensor([tokenizer.pad_sequence(ids, width) for ids in batch], dtype=torch.long, device=device)
+        attention_mask = (input_ids != tokenizer.pad_id).long()
+        memory = encoder(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+        out.append(pool_embeddings(memory, attention_mask).cpu().numpy())
+    return np.concatenate(out) if out else np.zeros((0, d_model_of(model.config)), dtype=np.float32)
+
+
+def pool_embeddings(memory: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+    """[B, T, d] encoder states → [B, d] unit-length masked means."""
+    mask = attention_mask.unsqueeze(-1).to(memory.dtype)
+    pooled = (memory * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1.0)
+    return torch.nn.functional.normalize(pooled, dim=-1)
+
+
+class KnnIndex:
+    """
+    Cosine kNN over unit vectors with per-row verdict (1 = "✅ Correct.").
+    """
+
+    def __init__(
+        self,
+        embeddings: np.ndarray,
+        verdicts: np.ndarray,
+        centroids: np.ndarray | None = None,
+        assignments: np.ndarray | None = None,
+    ):
+        self.embeddings = embeddings.astype(np.float16)       # on-disk format
+        # float16 GEMV has no fast CPU kernel (~13× slower than float32): search an upcast copy
+        self._vectors = self.embeddings.astype(np.float32)
+        self.verdicts = verdicts.astype(np.uint8)
+        self.centroids = centroids
+        self.assignments = assignments
+        self._lists: list[np.ndarray] | None = None
+        if centroids is not None:
+            self._lists = [np.flatnonzero(assignments == c) for c in range(len(centroids))]
+
+    def __len__(self) -> int:
+        return len(self.embeddings)
+
+    def build_ivf(self, n_lists: int, iters: int = 10, seed: int = 0) -> None:
+        """Spherical k-means partition of the rows into n_lists inverted lists."""
+        x = self._vectors
+        rng = np.random.default_rng(seed)
+        centroids = x[rng.choice(len(x), size=min(n_lists, len(x)), replace=False)]
+        for _ in range(iters):
+            assignments = (x @ centroids.T).argmax(axis=1)
+            for c in range(len(centroids)):
+                members = x[assignments == c]
+                if len(members):
+                    v = members.sum(axis=0)
+                    centroids[c] = v / max(np.linalg.norm(v), 1e-12)
+        self.centroids = centroids.astype(np.float32)
+        self.assignments = (x @ self.centroids.T).argmax(axis=1).astype(np.int32)
+        self._lists = [np.flatnonzero(self.assignments == c) for c in range(len(self.centroids))]
+
+    def search(self, query: np.ndarray, k: int = 5, n_probe: int = 4) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Args:
+            query: [d] unit vector.
+
+        Returns:
+            (similarities [k'], row indices [k']) sorted by decreasing similarity.
+        """
+        query = query.astype(np.float32)
+        if self._lists is None:
+            rows = None
+            sims = self._vectors @ query
+        else:
+            # Empty lists (k-means over duplicate inputs leaves some) would only use up probes
+            probe = [c for c in np.argsort(-(self.centroids @ query)) if len(self._lists[c])][:n_probe]
+            rows = np.concatenate([self._lists[c] for c in probe])
+            sims = self._vectors[rows] @ query
+        k = min(k, len(sims))
+        top = np.argpartition(-sims, k - 1)[:k] if k < len(sims) else np.arange(len(sims))
+        top = top[np.argsort(-sims[top])]
+        idx = top if rows is None else rows[top]
+        return sims[top], idx
+
+    def predict(self, query: np.ndarray, k: int = 5, n_probe: int = 4) -> tuple[bool, float, int]:
+        """
+        Returns:
+            (is_correct by similarity-weighted vote, top-1 similarity, top-1 row)
+        """
+        sims, idx = self.search(query, k, n_probe)
+        weights = np.clip(sims, 0.0, None)
+        vote = float((weights * self.verdicts[idx]).sum() / max(weights.sum(), 1e-12))
+        return vote >= 0.5, float(sims[0]), int(idx[0])
+
+    def save(self, model_dir: str | Path) -> None:
+        arrays = {"embeddings": self.embeddings, "verdicts": self.verdicts}
+        if self.centroids is not None:
+            arrays.update(centroids=self.centroids, assignments=self.assignments)
+        np.savez(Path(model_dir) / KNN_INDEX_FILE, **arrays)
+
+
+def load_knn_index(model_dir: str | Path) -> KnnIndex | None:
+    """Load knn_index.npz from a model directory (None if absent)."""
+    path = Path(model_dir) / KNN_INDEX_FILE
+    if not path.exists():
+        return None
+    with np.load(path, allow_pickle=False) as data:
+        return KnnIndex(
+            data["embeddings"], data["verdicts"],
+            data["centroids"] if "centroids" in data else None,
+            data["assignments"] if "assignments" in data else None,
+        )
+
+
+def build_knn_index(
+    model: BartForConditionalGeneration,
+    tokenizer: Tokenizer,
+    data_path: str | Path,
+    device: str,
+    max_len: int = 64,
+) -> KnnIndex:
+    """Encode every input of a JSONL file and attach its verdict."""
+    items = []
+    with open(data_path, "r", encoding="utf-8") as f:
+        for line in f:
+            items.append(json.loads(line))
+    embeddings = encode_texts(model, tokenizer, [it["input"] for it in items], device, max_len)
+    verdicts = np.array([it["output"].strip() == CORRECT_VERDICT for it in items], dtype=np.uint8)
+    return KnnIndex(embeddings, verdicts)
+
+
+def main():
+    from src.inference import load_hf_model  # inference → knn
+
+    parser = argparse.ArgumentParser(description="Build the encoder-embedding kNN index for verdict prediction")
+    parser.add_argument("--model", type=str, default="model_final")
+    parser.add_argument("--n-lists", type=int, default=0, help="IVF lists (0 = brute-force search)")
+    args = parser.parse_args()
+
+    config = load_config()
+    device = get_device("auto")
+    project_root = get_project_root()
+    tokenizer = Tokenizer(project_root / "src/tokenizer/tokenizer.json")
+    model_dir = project_root / args.model
+    if not model_dir.exists():
+        print(f"❌ Model not found at {model_dir}. Please run training first.")
+        return
+    model = load_hf_model(model_dir, device, config.model.attn_implementation)
+    max_len = config.model.max_seq_len
+
+    index = build_knn_index(model, tokenizer, config.data.train_path, device, max_len)
+    if args.n_lists:
+        index.build_ivf(args.n_lists)
+    index.save(model_dir)
+    print(f"📦 {len(index)} embeddings ({index.embeddings.nbytes / 1024:.1f} KB float16) "
+          f"saved to {model_dir / KNN_INDEX_FILE}")
+
+    # ── Accuracy / latency trade-off on tests/test_data.json ──
+    with open(project_root / "tests/test_data.json", "r", encoding="utf-8") as f:
+        test_data = json.load(f)
+    k, n_probe = config.inference.knn_k, config.inference.knn_n_probe
+    start = time.perf_counter()
+    queries = encode_texts(model, tokenizer, [it["input"] for it in test_data], device, max_len, batch_size=1)
+    preds = [index.predict(q, k, n_probe) for q in queries]
+    knn_ms = (time.perf_counter() - start) / max(len(test_data), 1) * 1000
+    expected = np.array([it["expected_type"] == "correct" for it in test_data])
+    verdicts = np.array([p[0] for p in preds])
+    sims = np.array([p[1] for p in preds])
+
+    print(f"⏱️  encoder + kNN: {knn_ms:.2f} ms/sentence")
+    # kNN decides the verdict when sim ≥ threshold; "✅ Correct." then skips the decoder
+    print(f"  {'threshold':>9} {'kNN verdict':>12} {'verdict acc.':>13} {'decoder skipped':>16}")
+    for threshold in (0.90, 0.95, 0.97, 0.99):
+        answered = sims >= threshold
+        acc = (verdicts[answered] == expected[answered]).mean() * 100 if answered.any() else float("nan")
+        skipped = (answered & verdicts).mean() * 100
+        print(f"  {threshold:>9.2f} {answered.mean() * 100:>11.1f}% {acc:>12.1f}% {skipped:>15.1f}%")
+    print(f"  (all inputs: kNN verdict accuracy {(verdicts == expected).mean() * 100:.1f}%)")
+
+if __name__ == "__main__":
+    main()
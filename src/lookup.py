@@ -0,0 +1,154 @@
+"""
+lookup.py — Exact-match lookup index over the generated corpus (zero-compute fast path).
+
+The model is trained on the closed synthetic distribution of MasterGenerator,
+so exercise-style inputs often match a generated "input" exactly — and for
+those the gold "output" is already known. This module compiles train.jsonl /
+val.jsonl into a compact hashed index and answers such inputs with a dict
+lookup instead of encode → decode.
+
+Index file (JSON):
+    {"outputs": [...unique outputs...],
+     "index":   {blake2b-64(normalize_text(input)): output position, ...}}
+
+  - keys are 8-byte hashes, not sentences (compact; collisions ≈ n²/2⁶⁵)
+  - outputs are deduplicated ("✅ Correct." is stored once)
+  - inputs seen with conflicting outputs are dropped (never serve an ambiguous answer)
+
+Usage:
+    python -m src.lookup                                   # build data/lookup_index.json
+    python -m src.lookup --output data/lookup_index.json   # + report hit rate on tests/test_data.json
+    python -m src.generate --text "Ihr habt einen Löffel." --lookup data/lookup_index.json
+"""
+
+import argparse
+import hashlib
+import json
+import threading
+from pathlib import Path
+
+from src.cache import normalize_text
+from src.config import load_config, get_project_root
+
+
+def input_hash(text: str) -> str:
+    return hashlib.blake2b(normalize_text(text).encode("utf-8"), digest_size=8).hexdigest()
+
+
+class LookupIndex:
+    """
+    Read-only normalized input → gold output index.
+
+    Counters: hits, misses (hit_rate in stats()).
+    """
+
+    def __init__(self, index: dict[str, int], outputs: list[str]):
+        self.index = index
+        self.outputs = outputs
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def load(cls, path: str | Path) -> "LookupIndex":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["index"], data["outputs"])
+
+    def get(self, text: str) -> str | None:
+        pos = self.index.get(input_hash(text))
+        with self._lock:
+            if pos is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return self.outputs[pos]
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.index),
+            "outputs": len(self.outputs),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def build_lookup_index(data_paths: list[str | Path]) -> tuple[LookupIndex, int]:
+    """
+    Compile JSONL files of {"input", "output"} pairs into a LookupIndex.
+
+    Returns:
+        (index, number of inputs dropped because they had conflicting outputs)
+    """
+    seen: dict[str, str] = {}
+    conflicts: set[str] = set()
+    for path in data_paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                item = json.loads(line)
+                key = input_hash(item["input"])
+                output = item["output"].strip()
+                if key in seen and seen[key] != output:
+                    conflicts.add(key)
+                seen.setdefault(key, output)
+
+    outputs: list[str] = []
+    positions: dict[str, int] = {}
+    index: dict[str, int] = {}
+    for key, output in seen.items():
+        if key in conflicts:
+            continue
+        if output not in positions:
+            positions[output] = len(outputs)
+            outputs.append(output)
+        index[key] = positions[output]
+    return LookupIndex(index, outputs), len(conflicts)
+
+
+def save_lookup_index(index: LookupIndex, path: str | Path) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"outputs": index.outputs, "index": index.index}, f, ensure_ascii=False, separators=(",", ":"))
+
+
+def main():
+    from src.evaluation import score_response  # evaluation → inference → lookup
+
+    parser = argparse.ArgumentParser(description="Build the exact-match lookup index from the JSONL corpus")
+    parser.add_argument("--output", type=str, default="data/lookup_index.json")
+    parser.add_argument("--data", type=str, nargs="*", default=None,
+                        help="JSONL files to index (default: data.train_path + data.val_path)")
+    args = parser.parse_args()
+
+    config = load_config()
+    project_root = get_project_root()
+    data_paths: list[str | Path] = args.data or [config.data.train_path, config.data.val_path]
+
+    index, n_conflicts = build_lookup_index(data_paths)
+    out_path = project_root / args.output
+    save_lookup_index(index, out_path)
+    print(f"📇 Indexed {len(index)} inputs → {len(index.outputs)} unique outputs "
+          f"({n_conflicts} conflicting inputs dropped)")
+    print(f"📦 Saved to {out_path} ({out_path.stat().st_size / 1024:.1f} KB)")
+
+    # Hit rate on the held-out test sentences
+    with open(project_root / "tests/test_data.json", "r", encoding="utf-8") as f:
+        test_data = json.load(f)
+    det_ok = 0
+    for item in test_data:
+        gold = index.get(item["input"])
+        if gold is not None:
+            det_ok += score_response(item, gold)[0]
+    stats = index.stats()
+    print(f"🎯 tests/test_data.json hit rate: {stats['hits']}/{stats['hits'] + stats['misses']} "
+          f"({stats['hit_rate'] * 100:.1f}%), detection correct on {det_ok}/{stats['hits']} hits")
+
+
+if __name__ == "__main__":
+    main()
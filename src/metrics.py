@@ -0,0 +1,272 @@
+"""
+metrics.py — In-process counters / gauges / histograms with Prometheus text export.
+
+Every instrument is a dict of label values → numbers behind one small lock:
+recording is a dict lookup, a bisect over ≤ 15 bucket bounds and a few
+additions (≈ 1 µs), so it stays on in production.
+
+    METRICS (process-wide registry)                         recorded by
+      a2_request_seconds{path}          end-to-end latency    generate_response / generate_responses
+      a2_encoder_seconds{path}          encoder pass          … / scheduler admission
+      a2_decoder_seconds{path}          greedy decode         … / scheduler steps
+      a2_input_tokens                   source tokens per sentence
+      a2_output_tokens                  generated tokens per sentence (incl. <EOS>)
+      a2_decode_steps{path}             decoder steps per generate() call / per scheduled request
+      a2_batch_size{path}               sentences per generate() call / active slots per scheduler step
+      a2_queue_wait_seconds{path}       submit → start of work (src/scheduler.py, src/server.py)
+      a2_responses_total{source,verdict}  source ∈ model / cache / dedup / lookup / rules,
+                                          verdict ∈ correct / incorrect / unknown
+
+Query in-process with METRICS.snapshot() (count / sum / mean / p50 / p95 / p99
+estimated from the buckets) or export with METRICS.to_prometheus()
+(served on GET /metrics by src/server.py).
+
+Usage:
+    from src.metrics import METRICS
+    METRICS.snapshot()["a2_request_seconds"]["path=single"]["p95"]
+    print(METRICS.to_prometheus())
+    python -m src.metrics --text "Ich habe den Auto." --repeat 20      # record some traffic, print both views
+"""
+
+import argparse
+import bisect
+import json
+import threading
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (2, 4, 8, 12, 16, 24, 32, 48, 64, 128)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+def _label_key(names: tuple[str, ...], labels: dict) -> tuple[str, ...]:
+    if set(labels) != set(names):
+        raise ValueError(f"expected labels {names}, got {tuple(labels)}")
+    return tuple(str(labels[n]) for n in names)
+
+
+def _label_text(names: tuple[str, ...], key: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{v}"' for n, v in zip(names, key)] + ([extra] if extra else [])
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    """Monotonic count per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = _label_key(self.labels, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(self.labels, labels), 0.0)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {",".join(f"{n}={v}" for n, v in zip(self.labels, k)): v for k, v in self._values.items()}
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            return [f"{self.name}{_label_text(self.labels, k)} {v:g}" for k, v in sorted(self._values.items())]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Gauge(Counter):
+    """Current value per label set (set / inc / dec)."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = _label_key(self.labels, labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram:
+    """Fixed-bucket distribution per label set (cumulative buckets on export, like Prometheus)."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: tuple[float, ...], labels: tuple[str, ...] = ()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple[str, ...], list] = {}   # key → [bucket counts (+Inf last), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(self.labels, labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def _quantile(self, counts: list[int], q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (the last finite bound for +Inf)."""
+        target = q * sum(counts)
+        seen = 0
+        for bound, n in zip(self.buckets + (self.buckets[-1],), counts):
+            seen += n
+            if seen >= target:
+                return bound
+        return self.buckets[-1]
+
+    def summary(self, **labels) -> dict:
+        with self._lock:
+            series = self._series.get(_label_key(self.labels, labels))
+            counts, total = (list(series[0]), series[1]) if series else ([0] * (len(self.buckets) + 1), 0.0)
+        count = sum(counts)
+        return {
+            "count": count,
+            "sum": total,
+            "mean": total / count if count else 0.0,
+            "p50": self._quantile(counts, 0.50) if count else 0.0,
+            "p95": self._quantile(counts, 0.95) if count else 0.0,
+            "p99": self._quantile(counts, 0.99) if count else 0.0,
+        }
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            keys = list(self._series)
+        return {",".join(f"{n}={v}" for n, v in zip(self.labels, k)): self.summary(**dict(zip(self.labels, k)))
+                for k in keys}
+
+    def samples(self) -> list[str]:
+        lines = []
+        with self._lock:
+            series = [(k, list(s[0]), s[1]) for k, s in sorted(self._series.items())]
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound:g}"'
+                lines.append(f"{self.name}_bucket{_label_text(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(self.labels, key)} {total:.6g}")
+            lines.append(f"{self.name}_count{_label_text(self.labels, key)} {sum(counts)}")
+        return lines
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class Registry:
+    """Named instruments; creating an existing name returns the same instrument."""
+
+    def __init__(self):
+        self._instruments: dict[str, Counter | Gauge | Histogram] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            instrument = self._instruments.get(name)
+            if instrument is None:
+                instrument = self._instruments[name] = cls(name, *args, **kwargs)
+            elif type(instrument) is not cls:
+                raise ValueError(f"{name} is already registered as a {instrument.kind}")
+            return instrument
+
+    def counter(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Counter:
+        return self._get(Counter, name, help, labels)
+
+    def gauge(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Gauge:
+        return self._get(Gauge, name, help, labels)
+
+    def histogram(self, name: str, help: str, buckets: tuple[float, ...], labels: tuple[str, ...] = ()) -> Histogram:
+        return self._get(Histogram, name, help, buckets, labels)
+
+    def snapshot(self) -> dict:
+        """{metric name: {"label=value,…": value or histogram summary}}"""
+        return {name: m.snapshot() for name, m in self._instruments.items()}
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for name, m in self._instruments.items():
+            lines += [f"# HELP {name} {m.help}", f"# TYPE {name} {m.kind}"] + m.samples()
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        for m in self._instruments.values():
+            m.reset()
+
+
+METRICS = Registry()
+
+REQUEST_SECONDS = METRICS.histogram(
+    "a2_request_seconds", "End-to-end latency of one check call.", LATENCY_BUCKETS, ("path",))
+ENCODER_SECONDS = METRICS.histogram(
+    "a2_encoder_seconds", "Encoder pass time per call / admission batch.", LATENCY_BUCKETS, ("path",))
+DECODER_SECONDS = METRICS.histogram(
+    "a2_decoder_seconds", "Greedy decoding time per call / scheduler step.", LATENCY_BUCKETS, ("path",))
+INPUT_TOKENS = METRICS.histogram(
+    "a2_input_tokens", "Source tokens per sentence sent to the model.", TOKEN_BUCKETS)
+OUTPUT_TOKENS = METRICS.histogram(
+    "a2_output_tokens", "Generated tokens per sentence (including <EOS>).", TOKEN_BUCKETS)
+DECODE_STEPS = METRICS.histogram(
+    "a2_decode_steps", "Decoder steps per generate() call / per scheduled request.", TOKEN_BUCKETS, ("path",))
+BATCH_SIZE = METRICS.histogram(
+    "a2_batch_size", "Sentences per generate() call / active slots per scheduler step.", BATCH_BUCKETS, ("path",))
+QUEUE_WAIT_SECONDS = METRICS.histogram(
+    "a2_queue_wait_seconds", "Time from submission to the start of work.", LATENCY_BUCKETS, ("path",))
+RESPONSES = METRICS.counter(
+    "a2_responses_total", "Responses by where they came from and their verdict.", ("source", "verdict"))
+
+
+# The model's whole response for a correct sentence. Defined here, on the
+# torch-free path, so the rule checker can share it with the model code.
+CORRECT_VERDICT = "✅ Correct."
+
+
+def verdict_of(response: str) -> str:
+    if response.startswith("❌"):
+        return "incorrect"
+    if response.startswith(CORRECT_VERDICT):
+        return "correct"
+    return "unknown"
+
+
+def record_response(response: str, source: str) -> None:
+    RESPONSES.inc(source=source, verdict=verdict_of(response))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record a few checks and print the inference metrics")
+    parser.add_argument("--model", type=str, default="model_final", help="Path to model directory")
+    parser.add_argument("--text", type=str, nargs="+", default=["Ich habe den Auto.", "Wo du wohnst?"])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="Print the snapshot as JSON instead of Prometheus text")
+    args = parser.parse_args()
+
+    from src.config import get_project_root, load_config
+    from src.inference import generate_response, generate_responses, load_model
+
+    config = load_config()
+    model_path = get_project_root() / args.model
+    if not model_path.exists():
+        print(f"❌ Model not found at {model_path}")
+        return
+    model, tokenizer, device = load_model(model_path, config)
+    for _ in range(args.repeat):
+        for text in args.text:
+            generate_response(text, model, tokenizer, config, device, config.model.max_seq_len)
+    generate_responses(args.text * args.repeat, model, tokenizer, config, device, config.model.max_seq_len)
+    print(json.dumps(METRICS.snapshot(), indent=2, ensure_ascii=False) if args.json else METRICS.to_prometheus())
+
+
+if __name__ == "__main__":
+    main()
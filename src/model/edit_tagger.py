@@ -0,0 +1,202 @@
+"""
+edit_tagger.py — Non-autoregressive edit tagger on top of the BART encoder.
+
+Every error family the generators produce (inversion, Akkusativ articles,
+Perfekt auxiliaries, separable verbs, ...) is a local substitution, deletion,
+insertion or reordering of input words. So instead of decoding the
+correction token by token, each input word gets three tags in ONE pass:
+
+  edit   ∈ {$KEEP, $DELETE, $REPLACE_<w>}   what the word becomes
+  append ∈ {$NONE, <w…>}                     words inserted right after it
+  slot   ∈ {0 … max_words−1}                  its position in the corrected sentence
+
+  "Heute ich spiele Fußball."  →  ich: KEEP slot 2, spiele: KEEP slot 1
+  "Ich aufstehe um 7 Uhr."     →  aufstehe: REPLACE_stehe, Uhr: append "auf"
+
+Architecture (encoder frozen, only the tagger is trained):
+  memory = Encoder(src) ∈ ℝ^{B×T×d}
+  words  = memory[first token of each word] ∈ ℝ^{B×W×d}
+  h      = TransformerEncoderLayer(words)    (word-level context)
+  logits = W_edit·h ∈ ℝ^{B×W×|edit|},  W_app·h ∈ ℝ^{B×W×|append|},  W_slot·h ∈ ℝ^{B×W×max_words}
+
+Training pairs come from the generators' "input" vs "✅ Correct: …" lines
+(see src/train_edit_tagger.py). Files saved next to the HF model:
+edit_tagger.safetensors + edit_tagger.json (label vocabularies).
+"""
+
+import difflib
+import json
+import re
+from pathlib import Path
+
+import torch
+import torch.nn as nn
+from safetensors.torch import load_file, save_file
+
+EDIT_TAGGER_FILE = "edit_tagger.safetensors"
+EDIT_TAGGER_CONFIG = "edit_tagger.json"
+
+KEEP = "$KEEP"
+DELETE = "$DELETE"
+REPLACE = "$REPLACE_"
+NO_APPEND = "$NONE"
+
+
+def extract_correction(output: str) -> str | None:
+    """The sentence after "✅ Correct:" in a model/generator output (None if absent)."""
+    for line in output.split("\n"):
+        if "✅ Correct:" in line:
+            return line.split("✅ Correct:")[1].strip()
+    return None
+
+
+def join_words(words: list[str]) -> str:
+    """Inverse of word splitting for generator-style sentences."""
+    text = " ".join(words)
+    text = re.sub(r"\s+([.,!?;:])", r"\1", text)
+    return re.sub(r"\s*-\s*", "-", text)
+
+
+def align_edits(src: list[str], tgt: list[str]) -> tuple[list[str], list[str], list[int]] | None:
+    """
+    Derive per-source-word (edit, append, slot) tags that turn src into tgt.
+
+    Returns None when the pair is not expressible (insertion before the first word).
+    """
+    n = len(src)
+    mapping: dict[int, int] = {}          # src idx → tgt idx
+    edits = [DELETE] * n
+
+    sm = difflib.SequenceMatcher(None, src, tgt, autojunk=False)
+    for op, i1, i2, j1, j2 in sm.get_opcodes():
+        if op == "equal":
+            for k in range(i2 - i1):
+                mapping[i1 + k] = j1 + k
+                edits[i1 + k] = KEEP
+        elif op == "replace":
+            for k in range(min(i2 - i1, j2 - j1)):
+                mapping[i1 + k] = j1 + k
+                edits[i1 + k] = REPLACE + tgt[j1 + k]
+
+    # Moves: a deleted source word that reappears unmatched in the target
+    free_tgt = [j for j in range(len(tgt)) if j not in mapping.values()]
+    for i in range(n):
+        if i in mapping:
+            continue
+        for j in free_tgt:
+            if tgt[j] == src[i]:
+                mapping[i] = j
+                edits[i] = KEEP
+                free_tgt.remove(j)
+                break
+
+    # Remaining target words are insertions, attached to the word before them
+    tgt_to_src = {j: i for i, j in mapping.items()}
+    appends: list[list[str]] = [[] for _ in range(n)]
+    host = None
+    for j in range(len(tgt)):
+        if j in tgt_to_src:
+            host = tgt_to_src[j]
+        elif host is None:
+            return None
+        else:
+            appends[host].append(tgt[j])
+
+    slots = [mapping.get(i, i) for i in range(n)]
+    return edits, [" ".join(a) if a else NO_APPEND for a in appends], slots
+
+
+def apply_edits(src: list[str], edits: list[str], appends: list[str], slots: list[int]) -> list[str]:
+    """Rebuild the corrected word list from per-word tags."""
+    items = []
+    for i, word in enumerate(src):
+        if edits[i] == DELETE:
+            out = []
+        elif edits[i].startswith(REPLACE):
+            out = [edits[i][len(REPLACE):]]
+        else:
+            out = [word]
+        if appends[i] != NO_APPEND:
+            out += appends[i].split(" ")
+        if out:
+            items.append((slots[i], i, out))
+    items.sort(key=lambda x: (x[0], x[1]))
+    return [w for _, _, out in items for w in out]
+
+
+class EditTagger(nn.Module):
+    def __init__(
+        self,
+        d_model: int,
+        edit_labels: list[str],
+        append_labels: list[str],
+        max_words: int,
+        n_heads: int = 4,
+        dropout: float = 0.1,
+    ):
+        super().__init__()
+        self.edit_labels = edit_labels
+        self.append_labels = append_labels
+        self.max_words = max_words
+        self.n_heads = n_heads
+        self.context = nn.TransformerEncoderLayer(
+            d_model, n_heads, dim_feedforward=2 * d_model, dropout=dropout, batch_first=True
+        )
+        self.edit_proj = nn.Linear(d_model, len(edit_labels))
+        self.append_proj = nn.Linear(d_model, len(append_labels))
+        self.slot_proj = nn.Linear(d_model, max_words)
+
+    def forward(
+        self, memory: torch.Tensor, word_pos: torch.Tensor, word_mask: torch.Tensor
+    ) -> tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+        """
+        Args:
+            memory:    [B, T, d] encoder last hidden state.
+            word_pos:  [B, W] index of each word's first token (0 for padding).
+            word_mask: [B, W] 1 = real word, 0 = padding.
+
+        Returns:
+            (edit_logits [B, W, E], append_logits [B, W, A], slot_logits [B, W, max_words])
+        """
+        idx = word_pos.unsqueeze(-1).expand(-1, -1, memory.size(-1))
+        words = memory.gather(1, idx)                                           # [B, W, d]
+        h = self.context(words, src_key_padding_mask=word_mask == 0)
+        return self.edit_proj(h), self.append_proj(h), self.slot_proj(h)
+
+    @torch.no_grad()
+    def predict(
+        self, memory: torch.Tensor, word_pos: list[int], words: list[str]
+    ) -> tuple[list[str], list[str], list[int]]:
+        """Tags for a single sentence (memory: [1, T, d])."""
+        pos = torch.tensor([word_pos], dtype=torch.long, device=memory.device)
+        mask = torch.ones_like(pos)
+        edit_logits, append_logits, slot_logits = self(memory, pos, mask)
+        edits = [self.edit_labels[i] for i in edit_logits[0].argmax(-1).tolist()]
+        appends = [self.append_labels[i] for i in append_logits[0].argmax(-1).tolist()]
+        slots = slot_logits[0].argmax(-1).tolist()
+        return edits, appends, slots
+
+
+def save_edit_tagger(tagger: EditTagger, model_dir: str | Path) -> None:
+    model_dir = Path(model_dir)
+    save_file(tagger.state_dict(), str(model_dir / EDIT_TAGGER_FILE))
+    with open(model_dir / EDIT_TAGGER_CONFIG, "w", encoding="utf-8") as f:
+        json.dump({
+            "edit_labels": tagger.edit_labels,
+            "append_labels": tagger.append_labels,
+            "max_words": tagger.max_words,
+            "n_heads": tagger.n_heads,
+        }, f, ensure_ascii=False, indent=2)
+
+
+def load_edit_tagger(model_dir: str | Path, d_model: int) -> EditTagger | None:
+    """Load edit_tagger.safetensors + edit_tagger.json from a model directory (None if absent)."""
+    model_dir = Path(model_dir)
+    if not (model_dir / EDIT_TAGGER_FILE).exists():
+        return None
+    with open(model_dir / EDIT_TAGGER_CONFIG, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    tagger = EditTagger(d_model, meta["edit_labels"], meta["append_labels"], meta["max_words"], meta["n_heads"])
+    tagger.load_state_dict(load_file(str(model_dir / EDIT_TAGGER_FILE)))
+    tagger.eval()
+    return tagger
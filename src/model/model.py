@@ -30,10 +30,59 @@ Architecture overview (matrices & dimensions):
 Hyperparameters (config.yaml):
   V = 8000, d = 256, H = 4, d_k = 64, d_ff = 512
   N_enc = 3, N_dec = 3, T = 64
+
+Attention backend (model.attn_implementation):
+  "sdpa"   softmax(QKᵀ/√d_k + mask)·V in one fused torch.nn.functional.scaled_dot_product_attention call
+  "eager"  the same math as separate matmul / softmax / dropout / matmul ops (reference path)
+  Not stored in config.json — every loader applies the configured value
+  (create_model, load_model_from_dir, src/inference.load_hf_model).
 """
 
-from transformers import BartConfig, BartForConditionalGeneration, BartTokenizerFast
 from pathlib import Path
+from typing import cast
+
+from transformers import BartConfig, BartForConditionalGeneration, BartTokenizerFast
+from transformers.models.bart.modeling_bart import BartDecoderLayer, BartEncoderLayer
+
+ATTN_IMPLEMENTATIONS = ("sdpa", "eager")
+
+
+def check_attn_implementation(name: str) -> str:
+    if name not in ATTN_IMPLEMENTATIONS:
+        raise ValueError(f"model.attn_implementation must be one of {ATTN_IMPLEMENTATIONS}, got {name!r}")
+    return name
+
+
+def d_model_of(config: BartConfig) -> int:
+    """BartConfig.d_model narrowed to int (typed Optional by transformers, always set for a built model)."""
+    if config.d_model is None:
+        raise ValueError("BartConfig.d_model is not set")
+    return config.d_model
+
+
+def head_dims(config: BartConfig, decoder: bool = True) -> tuple[int, int]:
+    """(attention heads, head dim) of the decoder (or encoder) with the Optional config ints narrowed."""
+    n_heads = config.decoder_attention_heads if decoder else config.encoder_attention_heads
+    if n_heads is None:
+        raise ValueError("BartConfig attention heads are not set")
+    return n_heads, d_model_of(config) // n_heads
+
+
+def decoder_start_id(config: BartConfig) -> int:
+    """BartConfig.decoder_start_token_id narrowed to int (the first decoder input of every sequence)."""
+    if config.decoder_start_token_id is None:
+        raise ValueError("BartConfig.decoder_start_token_id is not set")
+    return config.decoder_start_token_id
+
+
+def encoder_layers(model: BartForConditionalGeneration) -> list[BartEncoderLayer]:
+    """The encoder's layers with their HF type (nn.ModuleList items are untyped nn.Module)."""
+    return cast("list[BartEncoderLayer]", list(model.model.encoder.layers))
+
+
+def decoder_layers(model: BartForConditionalGeneration) -> list[BartDecoderLayer]:
+    """The decoder's layers with their HF type (nn.ModuleList items are untyped nn.Module)."""
+    return cast("list[BartDecoderLayer]", list(model.model.decoder.layers))
 
 
 def create_bart_config(config) -> BartConfig:
@@ -53,7 +102,7 @@ def create_bart_config(config) -> BartConfig:
         W₁ ∈ ℝ^{d_model × d_ff}  = ℝ^{256 × 512}
         W₂ ∈ ℝ^{d_ff × d_model}  = ℝ^{512 × 256}
     """
-    return BartConfig(
+    bart_config = BartConfig(
         # ── Vocabulary & Embeddings ──
         vocab_size=config.model.vocab_size,       # V = 8000 — E ∈ ℝ^{V×d}
         d_model=config.model.d_model,             # d = 256  — hidden dimension throughout
@@ -92,6 +141,9 @@ def create_bart_config(config) -> BartConfig:
         eos_token_id=2,
         decoder_start_token_id=1,         # Decoder starts with <BOS>
     )
+    # ── Attention kernel (same weights / math, different execution; not a BartConfig field) ──
+    bart_config._attn_implementation = check_attn_implementation(config.model.attn_implementation)
+    return bart_config
 
 
 def create_model(config, tokenizer=None) -> BartForConditionalGeneration:
@@ -142,7 +194,7 @@ def create_model(config, tokenizer=None) -> BartForConditionalGeneration:
     return model
 
 
-def load_model_from_dir(model_dir: str | Path) -> BartForConditionalGeneration:
+def load_model_from_dir(model_dir: str | Path, attn_implementation: str = "sdpa") -> BartForConditionalGeneration:
     """
     Load a trained model from a directory (HF format).
 
@@ -152,10 +204,12 @@ def load_model_from_dir(model_dir: str | Path) -> BartForConditionalGeneration:
 
     Args:
         model_dir: Path to directory with saved HF model.
+        attn_implementation: "sdpa" or "eager" (config.model.attn_implementation).
 
     Returns:
         BartForConditionalGeneration in eval mode.
     """
-    model = BartForConditionalGeneration.from_pretrained(str(model_dir))
+    model = BartForConditionalGeneration.from_pretrained(
+        str(model_dir), attn_implementation=check_attn_implementation(attn_implementation))
     model.eval()
     return model
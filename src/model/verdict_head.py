@@ -0,0 +1,75 @@
+"""
+verdict_head.py — Auxiliary "is this sentence correct?" classifier on the encoder.
+
+    memory = Encoder(src) ∈ ℝ^{B×T×d}
+    pooled = Σ_t mask_t · memory_t / Σ_t mask_t        ∈ ℝ^{B×d}   (masked mean)
+    logit  = w₂ · tanh(W₁ · pooled + b₁) + b₂           ∈ ℝ^{B}
+    P(✅ Correct.) = σ(logit)
+
+    W₁ ∈ ℝ^{d×d}, w₂ ∈ ℝ^{d}
+
+Trained jointly with the seq2seq loss in src/train.py (target = 1 when the
+output starts with "✅ Correct."), and saved next to the HF model as
+verdict_head.safetensors. At inference a confident head answers
+"✅ Correct." after a single encoder pass, skipping the decoder.
+"""
+
+from pathlib import Path
+
+import torch
+import torch.nn as nn
+from safetensors.torch import load_file, save_file
+
+VERDICT_HEAD_FILE = "verdict_head.safetensors"
+
+
+class VerdictHead(nn.Module):
+    def __init__(self, d_model: int, dropout: float = 0.1):
+        super().__init__()
+        self.dense = nn.Linear(d_model, d_model)
+        self.dropout = nn.Dropout(dropout)
+        self.out_proj = nn.Linear(d_model, 1)
+
+    def forward(self, memory: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+        """
+        Args:
+            memory:         [B, T, d] encoder last hidden state.
+            attention_mask: [B, T] (1 = real token, 0 = PAD).
+
+        Returns:
+            logits [B] — P(correct) = sigmoid(logits).
+        """
+        mask = attention_mask.unsqueeze(-1).to(memory.dtype)             # [B, T, 1]
+        pooled = (memory * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1.0)  # [B, d]
+        x = self.dropout(torch.tanh(self.dense(self.dropout(pooled))))
+        return self.out_proj(x).squeeze(-1)
+
+
+def verdict_targets(labels: torch.Tensor, correct_prefix: list[int]) -> torch.Tensor:
+    """
+    Derive the verdict target from seq2seq labels without touching the dataset.
+
+    Args:
+        labels:         [B, T] label IDs (-100 = ignore) from Seq2SeqDataset.
+        correct_prefix: token IDs of "✅ Correct." (tokenizer.encode(..., add_bos/eos=False)).
+
+    Returns:
+        float tensor [B] — 1.0 where the target output starts with "✅ Correct.".
+    """
+    prefix = torch.tensor(correct_prefix, dtype=labels.dtype, device=labels.device)
+    return (labels[:, :len(correct_prefix)] == prefix).all(dim=1).float()
+
+
+def save_verdict_head(head: VerdictHead, model_dir: str | Path) -> None:
+    save_file(head.state_dict(), str(Path(model_dir) / VERDICT_HEAD_FILE))
+
+
+def load_verdict_head(model_dir: str | Path, d_model: int) -> VerdictHead | None:
+    """Load verdict_head.safetensors from a model directory (None if absent)."""
+    path = Path(model_dir) / VERDICT_HEAD_FILE
+    if not path.exists():
+        return None
+    head = VerdictHead(d_model)
+    head.load_state_dict(load_file(str(path)))
+    head.eval()
+    return head
@@ -0,0 +1,280 @@
+"""
+numpy_model.py — BART forward + KV-cached greedy decoding in NumPy only (no torch, no transformers).
+
+The model is small enough that NumPy's BLAS calls carry it: an edge or
+serverless deployment needs numpy + tokenizers (≈ 30 MB) instead of
+torch + transformers (≈ 1 GB, seconds of import), and starts in well under
+a second.
+
+    model_dir/config.json             → dims, heads, activation, special ids
+    model_dir/generation_config.json  → forced_eos_token_id (if present)
+    model_dir/model.safetensors       → np.memmap of the file; every tensor is a zero-copy view
+                                        (F16 / BF16 checkpoints are upcast to float32 on load)
+
+    input_ids [B, T]
+      → E[ids] + P[t + 2] → LN                                     (learned positions, offset 2)
+      → encoder layer × N:  LN(h + SelfAttn(h)) → LN(h + W₂·GELU(W₁·h))     (post-LN, like BART)
+      → memory [B, T, d] → cross K/V per decoder layer, computed once
+    greedy loop, one token per step for the whole batch:
+      → E[tok] + P[pos + 2] → LN
+      → decoder layer × N:  self-attn over the K/V cache [B, H, max_len, d_h] (written at pos)
+                            → cross-attn over memory → FFN, each followed by its LN
+      → logits = h · Eᵀ + final_logits_bias → argmax
+      stop at <EOS>, or after max_len - 1 tokens (- 1 more when generate() would force <EOS>)
+
+The same stop rule as model.generate(max_length=max_len) makes responses
+identical to src/inference.py (tests/test_numpy_model.py checks logits and
+tokens against BartForConditionalGeneration on tests/test_data.json).
+
+Usage:
+    from src.numpy_model import NumpyBart
+    from src.tokenizer.tokenizer import Tokenizer
+    model = NumpyBart.from_dir("model_final")
+    model.check(["Ich habe den Auto."], Tokenizer())
+
+    python -m src.numpy_model --text "Ich habe den Auto."         # prints import / load / response time
+"""
+
+import argparse
+import json
+import struct
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+_DTYPES = {"F32": np.float32, "F16": np.float16, "BF16": np.uint16, "F64": np.float64, "I64": np.int64}
+LAYER_NORM_EPS = 1e-5
+
+
+def load_safetensors(path: str | Path) -> dict[str, np.ndarray]:
+    """Memory-map a .safetensors file: {name: array view into the mapped file} (float32 for float weights)."""
+    with open(path, "rb") as f:
+        header_len = struct.unpack("<Q", f.read(8))[0]
+        header = json.loads(f.read(header_len))
+    data = np.memmap(path, dtype=np.uint8, mode="r", offset=8 + header_len)
+    tensors = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        if info["dtype"] not in _DTYPES:
+            raise ValueError(f"{name}: unsupported dtype {info['dtype']}")
+        begin, end = info["data_offsets"]
+        array = data[begin:end].view(_DTYPES[info["dtype"]]).reshape(info["shape"])
+        if info["dtype"] == "BF16":
+            array = (array.astype(np.uint32) << 16).view(np.float32)
+        elif info["dtype"] in ("F16", "F64"):
+            array = array.astype(np.float32)
+        tensors[name] = array
+    return tensors
+
+
+def _erf(x: np.ndarray) -> np.ndarray:
+    """Abramowitz & Stegun 7.1.26 (|error| < 1.5e-7, below float32 resolution of GELU's inputs)."""
+    sign = np.sign(x)
+    x = np.abs(x)
+    t = 1.0 / (1.0 + 0.3275911 * x)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    return sign * (1.0 - poly * np.exp(-x * x))
+
+
+_ACTIVATIONS = {
+    "gelu": lambda x: 0.5 * x * (1.0 + _erf(x / np.sqrt(2.0, dtype=x.dtype))),
+    "gelu_new": lambda x: 0.5 * x * (1.0 + np.tanh(0.7978845608 * (x + 0.044715 * x ** 3))),
+    "relu": lambda x: np.maximum(x, 0),
+}
+
+
+def _layer_norm(x: np.ndarray, weight: np.ndarray, bias: np.ndarray) -> np.ndarray:
+    mean = x.mean(axis=-1, keepdims=True)
+    var = ((x - mean) ** 2).mean(axis=-1, keepdims=True)
+    return (x - mean) / np.sqrt(var + LAYER_NORM_EPS) * weight + bias
+
+
+def _softmax(x: np.ndarray) -> np.ndarray:
+    x = np.exp(x - x.max(axis=-1, keepdims=True))
+    return x / x.sum(axis=-1, keepdims=True)
+
+
+class NumpyBart:
+    """BartForConditionalGeneration inference (eval mode) over a dict of NumPy weights."""
+
+    def __init__(self, weights: dict[str, np.ndarray], config: dict, generation: dict | None = None):
+        self.w = weights
+        self.config = config
+        self.d_model = config["d_model"]
+        self.n_heads = config["decoder_attention_heads"]
+        self.head_dim = self.d_model // self.n_heads
+        self.n_enc = config["encoder_layers"]
+        self.n_dec = config["decoder_layers"]
+        self.offset = 2                                  # BartLearnedPositionalEmbedding
+        self.embed_scale = float(np.sqrt(self.d_model)) if config.get("scale_embedding") else 1.0
+        self.act = _ACTIVATIONS[config.get("activation_function", "gelu")]
+        self.pad_id = config["pad_token_id"]
+        self.eos_id = config["eos_token_id"]
+        self.start_id = config["decoder_start_token_id"]
+        generation = generation or {}
+        self.forced_eos = generation.get("forced_eos_token_id", config.get("forced_eos_token_id")) is not None
+
+        for name in ("model.shared.weight", "model.encoder.embed_tokens.weight", "lm_head.weight"):
+            if name in weights:
+                self.embed = weights[name]               # tied: E and the LM head are one matrix
+                break
+        else:
+            raise KeyError("no token embedding (model.shared.weight) in the checkpoint")
+        self.lm_head = weights.get("lm_head.weight", self.embed)
+        self.final_logits_bias = weights["final_logits_bias"][0] if "final_logits_bias" in weights else 0.0
+
+    @classmethod
+    def from_dir(cls, model_dir: str | Path) -> "NumpyBart":
+        model_dir = Path(model_dir)
+        with open(model_dir / "config.json", "r", encoding="utf-8") as f:
+            config = json.load(f)
+        generation = None
+        if (model_dir / "generation_config.json").exists():
+            with open(model_dir / "generation_config.json", "r", encoding="utf-8") as f:
+                generation = json.load(f)
+        return cls(load_safetensors(model_dir / "model.safetensors"), config, generation)
+
+    # ── Building blocks ──────────────────────────────────────────────────────
+
+    def _linear(self, x: np.ndarray, prefix: str) -> np.ndarray:
+        return x @ self.w[prefix + ".weight"].T + self.w[prefix + ".bias"]
+
+    def _ln(self, x: np.ndarray, prefix: str) -> np.ndarray:
+        return _layer_norm(x, self.w[prefix + ".weight"], self.w[prefix + ".bias"])
+
+    def _heads(self, x: np.ndarray) -> np.ndarray:
+        """[B, T, d] → [B, H, T, d_h]"""
+        b, t, _ = x.shape
+        return x.reshape(b, t, self.n_heads, self.head_dim).transpose(0, 2, 1, 3)
+
+    def _attend(self, q: np.ndarray, k: np.ndarray, v: np.ndarray, mask: np.ndarray | bool, prefix: str) -> np.ndarray:
+        """q [B, H, Tq, d_h] over k/v [B, H, Tk, d_h]; mask broadcastable to [B, H, Tq, Tk] (True = attend)."""
+        scores = (q * self.head_dim ** -0.5) @ k.transpose(0, 1, 3, 2)
+        out = _softmax(np.where(mask, scores, -np.inf)) @ v                       # [B, H, Tq, d_h]
+        b, _, t, _ = out.shape
+        return self._linear(out.transpose(0, 2, 1, 3).reshape(b, t, self.d_model), prefix + ".out_proj")
+
+    def _ffn(self, h: np.ndarray, prefix: str) -> np.ndarray:
+        return self._ln(h + self._linear(self.act(self._linear(h, prefix + ".fc1")), prefix + ".fc2"),
+                        prefix + ".final_layer_norm")
+
+    def _embed(self, ids: np.ndarray, positions: np.ndarray, stack: str) -> np.ndarray:
+        h = self.embed[ids] * self.embed_scale + self.w[f"model.{stack}.embed_positions.weight"][positions + self.offset]
+        return self._ln(h, f"model.{stack}.layernorm_embedding")
+
+    # ── Forward ──────────────────────────────────────────────────────────────
+
+    def encode(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        """input_ids / attention_mask [B, T] → memory [B, T, d]"""
+        h = self._embed(input_ids, np.arange(input_ids.shape[1]), "encoder")
+        mask = attention_mask.astype(bool)[:, None, None, :]
+        for i in range(self.n_enc):
+            p = f"model.encoder.layers.{i}"
+            q, k, v = (self._heads(self._linear(h, f"{p}.self_attn.{n}_proj")) for n in "qkv")
+            h = self._ln(h + self._attend(q, k, v, mask, f"{p}.self_attn"), f"{p}.self_attn_layer_norm")
+            h = self._ffn(h, p)
+        return h
+
+    def _logits(self, h: np.ndarray) -> np.ndarray:
+        return h @ self.lm_head.T + self.final_logits_bias
+
+    def forward(self, input_ids: np.ndarray, attention_mask: np.ndarray, decoder_input_ids: np.ndarray) -> np.ndarray:
+        """Teacher-forced logits [B, T_dec, V] (model(...).logits)."""
+        memory = self.encode(input_ids, attention_mask)
+        t_dec = decoder_input_ids.shape[1]
+        h = self._embed(decoder_input_ids, np.arange(t_dec), "decoder")
+        causal = np.tril(np.ones((t_dec, t_dec), dtype=bool))[None, None]
+        cross_mask = attention_mask.astype(bool)[:, None, None, :]
+        for i in range(self.n_dec):
+            p = f"model.decoder.layers.{i}"
+            q, k, v = (self._heads(self._linear(h, f"{p}.self_attn.{n}_proj")) for n in "qkv")
+            h = self._ln(h + self._attend(q, k, v, causal, f"{p}.self_attn"), f"{p}.self_attn_layer_norm")
+            q = self._heads(self._linear(h, f"{p}.encoder_attn.q_proj"))
+            k, v = (self._heads(self._linear(memory, f"{p}.encoder_attn.{n}_proj")) for n in "kv")
+            h = self._ln(h + self._attend(q, k, v, cross_mask, f"{p}.encoder_attn"), f"{p}.encoder_attn_layer_norm")
+            h = self._ffn(h, p)
+        return self._logits(h)
+
+    def generate(self, input_ids: np.ndarray, attention_mask: np.ndarray, max_length: int = 64) -> list[list[int]]:
+        """Greedy decoding with a KV cache; generated token ids per row (without <BOS>, stopping at <EOS>)."""
+        memory = self.encode(input_ids, attention_mask)
+        b = input_ids.shape[0]
+        cross_mask = attention_mask.astype(bool)[:, None, None, :]
+        cross = []
+        for i in range(self.n_dec):
+            p = f"model.decoder.layers.{i}.encoder_attn"
+            cross.append(tuple(self._heads(self._linear(memory, f"{p}.{n}_proj")) for n in "kv"))
+        max_new = max_length - 1 - (1 if self.forced_eos else 0)
+        cache_k = np.zeros((self.n_dec, b, self.n_heads, max(max_new, 1), self.head_dim), dtype=memory.dtype)
+        cache_v = np.zeros_like(cache_k)
+
+        tokens = np.full(b, self.start_id)
+        outputs: list[list[int]] = [[] for _ in range(b)]
+        running = set(range(b))
+        for pos in range(max_new):
+            h = self._embed(tokens[:, None], np.array([pos]), "decoder")             # [B, 1, d]
+            for i in range(self.n_dec):
+                p = f"model.decoder.layers.{i}"
+                q = self._heads(self._linear(h, f"{p}.self_attn.q_proj"))
+                cache_k[i, :, :, pos] = self._heads(self._linear(h, f"{p}.self_attn.k_proj"))[:, :, 0]
+                cache_v[i, :, :, pos] = self._heads(self._linear(h, f"{p}.self_attn.v_proj"))[:, :, 0]
+                out = self._attend(q, cache_k[i, :, :, :pos + 1], cache_v[i, :, :, :pos + 1], True,
+                                   f"{p}.self_attn")
+                h = self._ln(h + out, f"{p}.self_attn_layer_norm")
+                q = self._heads(self._linear(h, f"{p}.encoder_attn.q_proj"))
+                out = self._attend(q, cross[i][0], cross[i][1], cross_mask, f"{p}.encoder_attn")
+                h = self._ln(h + out, f"{p}.encoder_attn_layer_norm")
+                h = self._ffn(h, p)
+            tokens = self._logits(h[:, 0]).argmax(axis=-1)
+            for row in list(running):
+                outputs[row].append(int(tokens[row]))
+                if tokens[row] == self.eos_id:
+                    running.discard(row)
+            if not running:
+                break
+        return outputs
+
+    def check(self, texts: list[str], tokenizer, max_len: int = 64) -> list[str]:
+        """Grammar-check responses, one per text (same as src/inference.generate_responses)."""
+        if not texts:
+            return []
+        sources = [tokenizer.encode(t, add_bos=True, add_eos=True, max_len=max_len) for t in texts]
+        width = max(len(s) for s in sources)
+        input_ids = np.array([tokenizer.pad_sequence(s, width) for s in sources], dtype=np.int64)
+        outputs = self.generate(input_ids, input_ids != tokenizer.pad_id, max_len)
+        return [tokenizer.decode(ids, skip_special=True).strip() for ids in outputs]
+
+
+def main():
+    start = time.perf_counter()
+    from src.tokenizer.tokenizer import Tokenizer
+
+    parser = argparse.ArgumentParser(description="Grammar check with the NumPy-only BART (no torch)")
+    parser.add_argument("--model", type=str, default="model_final", help="HF model directory")
+    parser.add_argument("--text", type=str, nargs="+", required=True)
+    parser.add_argument("--max-len", type=int, default=64)
+    args = parser.parse_args()
+
+    model_dir = Path(args.model)
+    if not model_dir.is_absolute():
+        model_dir = Path(__file__).parent.parent / model_dir
+    if not (model_dir / "model.safetensors").exists():
+        print(f"❌ No model.safetensors in {model_dir}")
+        return
+    # A tokenizer.json shipped next to the weights (hf_export/) wins over the repo copy
+    tokenizer = Tokenizer(model_dir / "tokenizer.json" if (model_dir / "tokenizer.json").exists() else None)
+    model = NumpyBart.from_dir(model_dir)
+    loaded = time.perf_counter()
+    responses = model.check(args.text, tokenizer, args.max_len)
+    done = time.perf_counter()
+    for text, response in zip(args.text, responses):
+        print(f"\nInput:  {text}\nOutput: {response}")
+    print(f"\n⏱️  start → loaded {1000 * (loaded - start):.0f} ms, checks {1000 * (done - loaded):.0f} ms "
+          f"(torch imported: {'torch' in sys.modules})")
+
+
+if __name__ == "__main__":
+    main()
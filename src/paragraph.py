@@ -0,0 +1,105 @@
+"""
+paragraph.py — Paragraph mode: sentence segmentation, batched checking, reassembly.
+
+generate_response() checks one sentence of at most max_seq_len tokens, so a
+pasted paragraph is silently truncated. check_paragraph() instead:
+
+  1. split_sentences()   → (start, end) character spans
+                            - no split after German abbreviations (z.B., usw., Dr., …),
+                              ordinals ("am 3. Mai") or single-letter initials
+                            - closing quotes / brackets stay with their sentence („Komm!“)
+                            - blank lines always end a sentence
+  2. dedupe               → each normalize_text(sentence) is checked once
+  3. generate_responses() → ONE batched encoder/decoder pass (src/inference.py)
+  4. per-sentence results with the original character offsets
+
+Usage:
+    python -m src.generate --paragraph --text "Ich habe den Auto. Wo du wohnst? Ich bin müde."
+"""
+
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING
+
+from src.cache import ResultCache, SQLiteResultCache
+from src.config import Config
+from src.inference import generate_responses
+from src.metrics import verdict_of
+from src.tokenizer.tokenizer import Tokenizer
+
+if TYPE_CHECKING:
+    from transformers import BartForConditionalGeneration
+
+ABBREVIATIONS = {
+    "z.b.", "d.h.", "u.a.", "z.t.", "o.ä.", "u.u.", "usw.", "bzw.", "etc.", "ca.", "vgl.", "ggf.",
+    "evtl.", "inkl.", "bspw.", "sog.", "dr.", "prof.", "hr.", "fr.", "nr.", "str.", "tel.", "mio.",
+    "mrd.", "jh.", "st.", "abs.", "bzgl.", "min.", "max.", "geb.",
+}
+_SENTENCE_END = re.compile(r"[.!?…]+[\"'»«“”‚‘’)\]]*")
+_BLANK_LINE = re.compile(r"\n\s*\n")
+_OPENERS = "\"'„‚»«“‘(["
+
+
+def _is_boundary(text: str, start: int, end: int) -> bool:
+    """Does the punctuation run text[start:end] end a sentence?"""
+    rest = text[end:]
+    if not rest.strip():
+        return True
+    if not rest[0].isspace():
+        return False                                    # "3.5", "z.B.x", „Komm!“, fragt er
+    nxt = rest.lstrip()[0]
+    if not (nxt.isupper() or nxt.isdigit() or nxt in _OPENERS):
+        return False                                    # "… usw. und so weiter"
+    if text[start:end] != ".":
+        return True
+    token = text[:end].split()[-1].lower()
+    if token in ABBREVIATIONS:
+        return False
+    word = token[:-1].lstrip(_OPENERS)
+    if word.isdigit() or (len(word) == 1 and word.isalpha()):
+        return False                                    # "am 3. Mai", "Thomas M. Müller"
+    return True
+
+
+def split_sentences(text: str) -> list[tuple[int, int]]:
+    """Character spans (start, end) of the sentences in text, whitespace trimmed."""
+    cuts = [m.end() for m in _SENTENCE_END.finditer(text) if _is_boundary(text, m.start(), m.end())]
+    cuts += [m.start() for m in _BLANK_LINE.finditer(text)]
+    spans = []
+    start = 0
+    for cut in sorted(set(cuts)) + [len(text)]:
+        chunk = text[start:cut]
+        if chunk.strip():
+            lead = len(chunk) - len(chunk.lstrip())
+            spans.append((start + lead, start + len(chunk.rstrip())))
+        start = cut
+    return spans
+
+
+def check_paragraph(
+    text: str,
+    model: BartForConditionalGeneration,
+    tokenizer: Tokenizer,
+    config: Config,
+    device: str,
+    batch_size: int = 32,
+    cache: ResultCache | SQLiteResultCache | None = None,
+) -> list[dict]:
+    """
+    Check every sentence of a paragraph in one batched pass.
+
+    Returns:
+        [{"start", "end", "sentence", "verdict", "response"}, ...] in text order;
+        text[start:end] == sentence, verdict ∈ {"correct", "incorrect", "unknown"}.
+    """
+    spans = split_sentences(text)
+    sentences = [text[s:e] for s, e in spans]
+    responses = generate_responses(
+        sentences, model, tokenizer, config, device,
+        max_len=config.model.max_seq_len, batch_size=batch_size, cache=cache,
+    )
+    return [
+        {"start": s, "end": e, "sentence": sentence, "verdict": verdict_of(response), "response": response}
+        for (s, e), sentence, response in zip(spans, sentences, responses)
+    ]
@@ -0,0 +1,422 @@
+"""
+pool.py — Multi-process inference worker pool over one shared copy of the weights.
+
+One Python process cannot use a many-core box: the GIL serializes the
+per-token Python work in generate(), and a 256-dim model is far too small
+for torch's intra-op threads to pay off. N independent processes scale —
+but N copies of the model do not fit the memory budget. So:
+
+    parent:  load_hf_model() → model.share_memory()      (weights in shared memory, once)
+             start N workers (forkserver, else spawn) ─►  tensors are passed as shared-memory
+                                                          handles, not copied
+    worker:  torch.set_num_threads(threads_per_worker)    (no oversubscription)
+             [optional] sched_setaffinity(its own cores)
+             task queue → generate_responses(batch) → its own result pipe
+
+    dispatch:  check(texts) → batches of ≤ batch_size → worker with the fewest in-flight batches
+    monitor:   every health_interval s — dead worker → start a new one, re-queue its in-flight batches
+               (each batch is retried once), heartbeat older than hang_timeout → kill + replace
+    restart(): rolling — one worker at a time finishes its queue, exits and is replaced
+
+Workers are never plain fork()s of this process: the parent runs collector /
+monitor threads (and possibly torch's OpenMP pool), and forking a threaded
+process can deadlock the child on a lock some other thread held. The
+forkserver (preloaded with this module) and spawn start children from a
+clean single-threaded state, so replacing a worker from the monitor thread
+is safe; no pool lock is held while a process starts. Each worker also
+writes to its own result pipe: a worker killed in the middle of a send can
+only corrupt its own channel, never block the others on a shared queue lock.
+
+With a persistent SQLiteResultCache (inference.cache_path), every worker
+reopens the same database, so cached sentences skip the model there too.
+
+Usage:
+    from src.pool import WorkerPool
+    with WorkerPool.from_dir("model_final", n_workers=8) as pool:
+        responses = pool.check(sentences)
+
+    python -m src.pool --workers 1 2 4 8          # throughput + resident memory per pool size
+    python -m src.generate --input data/val.jsonl --workers 8
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing.connection import Connection, wait
+from pathlib import Path
+
+import torch
+import torch.multiprocessing as mp
+
+from src.cache import SQLiteResultCache
+from src.config import Config, load_config, get_project_root
+from src.inference import generate_responses, load_hf_model
+from src.tokenizer.tokenizer import Tokenizer
+
+_STOP = None
+
+
+def _start_context():
+    """forkserver (fast restarts: torch is preloaded once) where available, else spawn."""
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = mp.get_context("forkserver")
+        ctx.set_forkserver_preload(["src.pool"])
+        return ctx
+    return mp.get_context("spawn")
+
+
+def _worker_main(
+    wid: int,
+    model,
+    tokenizer: Tokenizer,
+    config: Config,
+    cache: SQLiteResultCache | None,
+    threads: int,
+    cpus: list[int] | None,
+    batch_size: int,
+    tasks,
+    results,
+    heartbeats,
+) -> None:
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+
+    while True:
+        heartbeats[wid] = time.time()
+        try:
+            task = tasks.get(timeout=1.0)
+        except queue.Empty:
+            continue
+        if task is _STOP:
+            return
+        batch_id, texts = task
+        try:
+            responses = generate_responses(
+                texts, model, tokenizer, config, "cpu",
+                max_len=config.model.max_seq_len, batch_size=batch_size, cache=cache,
+            )
+            results.send(("done", wid, batch_id, responses))
+        except Exception as e:  # report, keep serving
+            results.send(("error", wid, batch_id, f"{type(e).__name__}: {e}"))
+
+
+class WorkerPool:
+    """
+    N CPU worker processes sharing one read-only model.
+
+    Counters: batches (per worker), restarts, retries (in health()).
+    """
+
+    def __init__(
+        self,
+        model,
+        tokenizer: Tokenizer,
+        config: Config,
+        n_workers: int = 0,
+        threads_per_worker: int = 1,
+        batch_size: int = 32,
+        cache: SQLiteResultCache | None = None,
+        pin_cpus: bool = False,
+        health_interval: float = 1.0,
+        hang_timeout: float = 120.0,
+    ):
+        if cache is not None and not isinstance(cache, SQLiteResultCache):
+            raise ValueError("WorkerPool needs a SQLiteResultCache (inference.cache_path): "
+                             "an in-process cache cannot be shared with worker processes")
+        cpu_count = os.cpu_count() or 1
+        self.n_workers = n_workers or max(cpu_count // threads_per_worker, 1)
+        self.threads_per_worker = threads_per_worker
+        self.batch_size = batch_size
+        self.pin_cpus = pin_cpus
+        self.health_interval = health_interval
+        self.hang_timeout = hang_timeout
+
+        model.eval()
+        model.share_memory()                    # one copy of the weights for every worker
+        self._model, self._tokenizer, self._config, self._cache = model, tokenizer, config, cache
+
+        self._ctx = _start_context()
+        self._readers: dict = {}                # result pipe → worker id, until the worker's EOF
+        self._heartbeats = self._ctx.Array("d", self.n_workers, lock=False)
+        self._lock = threading.Lock()
+        self._replace_lock = threading.Lock()   # one replacement at a time (monitor vs. restart())
+        self._batch_ids = itertools.count()
+        self._futures: dict[int, Future] = {}
+        self._inflight: dict[int, dict[int, list[str]]] = {w: {} for w in range(self.n_workers)}
+        self._attempts: dict[int, int] = {}
+        self._draining: set[int] = set()
+        self._tasks = [self._ctx.Queue() for _ in range(self.n_workers)]
+        self._procs = [self._start(wid) for wid in range(self.n_workers)]
+        self.batches = [0] * self.n_workers
+        self.restarts = 0
+        self.retries = 0
+        self._closed = False
+
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+        self._monitor = threading.Thread(target=self._watch, daemon=True)
+        self._monitor.start()
+
+    @classmethod
+    def from_dir(cls, model_dir: str | Path, config: Config | None = None, **kwargs) -> "WorkerPool":
+        config = config or load_config()
+        tokenizer = Tokenizer(get_project_root() / "src/tokenizer/tokenizer.json")
+        return cls(load_hf_model(model_dir, "cpu", config.model.attn_implementation), tokenizer, config, **kwargs)
+
+    # ── Workers ──────────────────────────────────────────────────────────────
+
+    def _cpus(self, wid: int) -> list[int] | None:
+        if not self.pin_cpus or not hasattr(os, "sched_getaffinity"):
+            return None
+        available = sorted(os.sched_getaffinity(0))
+        k = self.threads_per_worker
+        start = (wid * k) % len(available)
+        return [available[(start + i) % len(available)] for i in range(k)]
+
+    def _start(self, wid: int):
+        """Start worker `wid` on its task queue with a fresh result pipe (no pool lock held)."""
+        self._heartbeats[wid] = time.time()
+        reader, writer = self._ctx.Pipe(duplex=False)
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(wid, self._model, self._tokenizer, self._config, self._cache, self.threads_per_worker,
+                  self._cpus(wid), self.batch_size, self._tasks[wid], writer, self._heartbeats),
+            daemon=True,
+        )
+        proc.start()
+        writer.close()                          # the worker holds the only write end → EOF when it exits
+        with self._lock:
+            self._readers[reader] = wid
+        return proc
+
+    def _replace(self, wid: int, graceful_timeout: float = 0.0, failed_proc=None) -> None:
+        """
+        Replace worker `wid` and re-queue whatever it still had in flight.
+
+        graceful_timeout > 0: let it finish its queue and exit first (rolling restart);
+        otherwise it is killed (dead or hung). failed_proc: only act if that process
+        is still the current one (it may have been replaced meanwhile).
+        """
+        with self._replace_lock:
+            self._replace_locked(wid, graceful_timeout, failed_proc)
+
+    def _replace_locked(self, wid: int, graceful_timeout: float, failed_proc) -> None:
+        with self._lock:
+            if self._closed or (failed_proc is not None and self._procs[wid] is not failed_proc):
+                return
+            self._draining.add(wid)
+            proc = self._procs[wid]
+            if graceful_timeout:
+                self._tasks[wid].put(_STOP)
+        if graceful_timeout:
+            proc.join(timeout=graceful_timeout)
+            deadline = time.time() + graceful_timeout
+            while time.time() < deadline:
+                with self._lock:
+                    if not self._inflight[wid]:
+                        break
+                time.sleep(0.01)                # let the collector take its last results
+        if proc.is_alive():
+            proc.kill()
+        proc.join(timeout=5)
+
+        # Fresh queue: a killed worker may have died holding the old queue's lock
+        tasks = self._ctx.Queue()
+        with self._lock:
+            self._tasks[wid] = tasks
+        new_proc = self._start(wid)
+        with self._lock:
+            self._procs[wid] = new_proc
+            self._draining.discard(wid)
+            self.restarts += 1
+            orphaned = self._inflight[wid]
+            self._inflight[wid] = {}
+            for batch_id, texts in orphaned.items():
+                if batch_id not in self._futures:
+                    continue
+                self._attempts[batch_id] += 1
+                if self._attempts[batch_id] > 2:
+                    self._attempts.pop(batch_id)
+                    self._futures.pop(batch_id).set_exception(
+                        RuntimeError(f"batch {batch_id} crashed two workers"))
+                    continue
+                self.retries += 1
+                self._dispatch(batch_id, texts)
+
+    def _dispatch(self, batch_id: int, texts: list[str]) -> None:
+        """Send a batch to the live worker with the fewest in-flight batches (lock held)."""
+        candidates = [w for w in range(self.n_workers) if w not in self._draining] or list(range(self.n_workers))
+        wid = min(candidates, key=lambda w: len(self._inflight[w]))
+        self._inflight[wid][batch_id] = texts
+        self._tasks[wid].put((batch_id, texts))
+
+    def _collect(self) -> None:
+        while not self._closed:
+            with self._lock:
+                readers = list(self._readers)
+            for reader in wait(readers, timeout=0.1):
+                assert isinstance(reader, Connection)     # wait() returns the objects it was given
+                try:
+                    kind, wid, batch_id, payload = reader.recv()
+                except (EOFError, OSError):
+                    with self._lock:            # worker exited (or died mid-send)
+                        self._readers.pop(reader, None)
+                    reader.close()
+                    continue
+                self._resolve(kind, wid, batch_id, payload)
+
+    def _resolve(self, kind: str, wid: int, batch_id: int, payload) -> None:
+        with self._lock:
+            self._inflight[wid].pop(batch_id, None)
+            self._attempts.pop(batch_id, None)
+            future = self._futures.pop(batch_id, None)
+            if kind == "done":
+                self.batches[wid] += 1
+        if future is None:
+            return                              # duplicate result after a retry
+        if kind == "done":
+            future.set_result(payload)
+        else:
+            future.set_exception(RuntimeError(payload))
+
+    def _watch(self) -> None:
+        while not self._closed:
+            time.sleep(self.health_interval)
+            now = time.time()
+            with self._lock:
+                if self._closed:
+                    return
+                failed = [
+                    (wid, proc) for wid, proc in enumerate(self._procs)
+                    if wid not in self._draining
+                    and (not proc.is_alive() or now - self._heartbeats[wid] > self.hang_timeout)
+                ]
+            for wid, proc in failed:
+                self._replace(wid, failed_proc=proc)
+
+    # ── Public API ───────────────────────────────────────────────────────────
+
+    def submit(self, texts: list[str]) -> Future:
+        """Queue one batch (≤ batch_size texts); the Future resolves to its responses."""
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("WorkerPool is closed")
+            batch_id = next(self._batch_ids)
+            self._futures[batch_id] = future
+            self._attempts[batch_id] = 1
+            self._dispatch(batch_id, list(texts))
+        return future
+
+    def check(self, texts: list[str]) -> list[str]:
+        """Responses for texts in input order, spread over all workers in batch_size chunks."""
+        futures = [self.submit(texts[i:i + self.batch_size]) for i in range(0, len(texts), self.batch_size)]
+        return [response for future in futures for response in future.result()]
+
+    def health(self) -> dict:
+        now = time.time()
+        with self._lock:
+            workers = [
+                {
+                    "worker": wid,
+                    "pid": proc.pid,
+                    "alive": proc.is_alive(),
+                    "inflight": len(self._inflight[wid]),
+                    "batches": self.batches[wid],
+                    "heartbeat_age": now - self._heartbeats[wid],
+                }
+                for wid, proc in enumerate(self._procs)
+            ]
+        healthy = all(w["alive"] and w["heartbeat_age"] < self.hang_timeout for w in workers)
+        return {"healthy": healthy, "restarts": self.restarts, "retries": self.retries, "workers": workers}
+
+    def restart(self, timeout: float = 60.0) -> None:
+        """Rolling restart: each worker drains its queue, exits and is replaced; others keep serving."""
+        for wid in range(self.n_workers):
+            self._replace(wid, graceful_timeout=timeout)
+
+    def close(self, timeout: float = 10.0) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            for tasks in self._tasks:
+                tasks.put(_STOP)
+            procs = list(self._procs)
+        self._monitor.join(timeout=self.health_interval + 10)
+        for proc in procs:
+            proc.join(timeout=timeout)
+            if proc.is_alive():
+                proc.kill()
+        self._collector.join(timeout=2)
+        for reader in self._readers:
+            reader.close()
+
+    def __enter__(self) -> "WorkerPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def resident_memory_mb(pids: list[int]) -> float:
+    """Proportional set size (shared pages split between sharers) of a process group, in MB (Linux)."""
+    total = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/smaps_rollup") as f:
+                for line in f:
+                    if line.startswith("Pss:"):
+                        total += int(line.split()[1])
+                        break
+        except OSError:
+            return float("nan")
+    return total / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker-pool throughput and memory by pool size")
+    parser.add_argument("--model", type=str, default="model_final")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--threads", type=int, default=1, help="torch threads per worker")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--n", type=int, default=512, help="sentences from data.val_path")
+    parser.add_argument("--pin-cpus", action="store_true")
+    args = parser.parse_args()
+
+    config = load_config()
+    model_dir = get_project_root() / args.model
+    if not model_dir.exists():
+        print(f"❌ Model not found at {model_dir}. Please run training first.")
+        return
+    with open(config.data.val_path, "r", encoding="utf-8") as f:
+        texts = [json.loads(line)["input"] for line in itertools.islice(f, args.n)]
+
+    print(f"\n📊 {len(texts)} sentences, batch size {args.batch_size}, {args.threads} thread(s)/worker, "
+          f"{os.cpu_count()} CPUs\n")
+    print(f"  {'workers':>7} {'sent/s':>9} {'speed-up':>9} {'PSS total':>10}")
+    base = None
+    for n_workers in args.workers:
+        with WorkerPool.from_dir(model_dir, config, n_workers=n_workers, threads_per_worker=args.threads,
+                                 batch_size=args.batch_size, pin_cpus=args.pin_cpus) as pool:
+            pool.check(texts[:args.batch_size * n_workers])          # warm-up every worker
+            start = time.perf_counter()
+            pool.check(texts)
+            rate = len(texts) / (time.perf_counter() - start)
+            pids = [os.getpid()] + [w["pid"] for w in pool.health()["workers"]]
+            pss = resident_memory_mb(pids)
+        base = base or rate
+        print(f"  {n_workers:>7} {rate:>9.1f} {rate / base:>8.2f}× {pss:>8.0f} MB")
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+prune.py — Structured pruning of a trained BART model with fine-tune recovery.
+
+Importance is first-order Taylor saliency on the validation set:
+  score(unit) = Σ_batches Σ_{w ∈ unit} |w · ∂L/∂w|
+
+Units:
+  - attention head h of a block:  rows h·d_k … (h+1)·d_k of W_Q, W_K, W_V
+                                  + the same columns of W_O
+  - FFN neuron j of a layer:      row j of W₁ (+ bias) and column j of W₂
+
+FFN neurons are physically removed (W₁ ∈ ℝ^{d × d_ff'}, W₂ ∈ ℝ^{d_ff' × d}).
+The same number of neurons is kept in every layer of a stack, so the result
+is expressible as a plain BartConfig (encoder_ffn_dim / decoder_ffn_dim) and
+loads with from_pretrained() / exports with src/export_hf.py --model.
+
+Attention heads are scored and probed in memory only: BartConfig derives
+d_k = d_model / n_heads, so a checkpoint with fewer heads (and narrower
+W_Q/K/V) cannot be described by the standard config. The probe row in the
+report shows what dropping the weakest heads would cost.
+
+Usage:
+    python -m src.prune
+    python -m src.prune --model model_final --out model_pruned --ffn-keep 0.5 --finetune-steps 500
+"""
+
+import argparse
+import copy
+import itertools
+from typing import cast
+
+import torch
+from torch.utils.data import DataLoader
+from tqdm import tqdm
+from transformers import BartForConditionalGeneration
+from transformers.models.bart.modeling_bart import BartAttention, BartDecoderLayer, BartEncoderLayer
+from transformers.pytorch_utils import prune_linear_layer
+
+from src.config import load_config, get_device, get_project_root
+from src.evaluation import evaluate_quality, load_test_data, print_report
+from src.model.model import decoder_layers, encoder_layers
+from src.tokenizer.tokenizer import Tokenizer
+from src.train import Seq2SeqDataset
+
+
+def attention_blocks(model: BartForConditionalGeneration) -> list[tuple[str, BartAttention]]:
+    """All attention modules: enc self-attn, dec self-attn, dec cross-attn (3 + 3 + 3 = 9 by default)."""
+    blocks = []
+    for i, layer in enumerate(encoder_layers(model)):
+        blocks.append((f"enc{i}.self", layer.self_attn))
+    for i, layer in enumerate(decoder_layers(model)):
+        blocks.append((f"dec{i}.self", layer.self_attn))
+        blocks.append((f"dec{i}.cross", layer.encoder_attn))
+    return blocks
+
+
+def ffn_layers(model: BartForConditionalGeneration) -> dict[str, list[BartEncoderLayer] | list[BartDecoderLayer]]:
+    return {
+        "encoder": encoder_layers(model),
+        "decoder": decoder_layers(model),
+    }
+
+
+def _taylor(linear: torch.nn.Linear, dim: int) -> torch.Tensor:
+    """|w · g| summed along `dim` of the weight (dim=1 → per output row, dim=0 → per input column)."""
+    assert linear.weight.grad is not None
+    s = (linear.weight * linear.weight.grad).abs().sum(dim=dim)
+    if dim == 1 and linear.bias is not None and linear.bias.grad is not None:
+        s = s + (linear.bias * linear.bias.grad).abs()
+    return s.detach()
+
+
+def score_importance(
+    model: BartForConditionalGeneration,
+    loader: DataLoader,
+    device: str,
+    max_batches: int,
+) -> tuple[dict[str, torch.Tensor], dict[str, list[torch.Tensor]]]:
+    """
+    Accumulate Taylor importance of every head and FFN neuron.
+
+    Returns:
+        head_scores: {block_name: [H]}
+        ffn_scores:  {"encoder"/"decoder": [per layer tensor [d_ff]]}
+    """
+    model.eval()  # no dropout noise in the saliency; gradients still flow
+    blocks = attention_blocks(model)
+    stacks = ffn_layers(model)
+    head_scores = {name: torch.zeros(attn.num_heads, device=device) for name, attn in blocks}
+    ffn_scores = {
+        stack: [torch.zeros(layer.fc1.out_features, device=device) for layer in layers]
+        for stack, layers in stacks.items()
+    }
+
+    for src_ids, attn_mask, tgt_ids, dec_attn_mask, labels in tqdm(
+        itertools.islice(loader, max_batches), total=max_batches, desc="Scoring"
+    ):
+        model.zero_grad()
+        loss = model(
+            input_ids=src_ids.to(device),
+            attention_mask=attn_mask.to(device),
+            decoder_input_ids=tgt_ids.to(device),
+            decoder_attention_mask=dec_attn_mask.to(device),
+            labels=labels.to(device),
+        ).loss
+        loss.backward()
+
+        for name, attn in blocks:
+            per_row = _taylor(attn.q_proj, 1) + _taylor(attn.k_proj, 1) + _taylor(attn.v_proj, 1)
+            per_row = per_row + _taylor(attn.out_proj, 0)
+            head_scores[name] += per_row.view(attn.num_heads, attn.head_dim).sum(dim=1)
+
+        for stack, layers in stacks.items():
+            for i, layer in enumerate(layers):
+                ffn_scores[stack][i] += _taylor(layer.fc1, 1) + _taylor(layer.fc2, 0)
+
+    model.zero_grad()
+    return head_scores, ffn_scores
+
+
+def prune_ffn(
+    model: BartForConditionalGeneration,
+    ffn_scores: dict[str, list[torch.Tensor]],
+    keep_ratio: float,
+) -> None:
+    """Physically drop the lowest-scoring FFN neurons (same width per stack), in place."""
+    for stack, layers in ffn_layers(model).items():
+        d_ff = layers[0].fc1.out_features
+        n_keep = max(1, round(d_ff * keep_ratio))
+        for layer, scores in zip(layers, ffn_scores[stack]):
+            index = cast(torch.LongTensor, scores.topk(n_keep).indices.sort().values)
+            layer.fc1 = prune_linear_layer(layer.fc1, index, dim=0)   # W₁: [d_ff', d]
+            layer.fc2 = prune_linear_layer(layer.fc2, index, dim=1)   # W₂: [d, d_ff']
+        if stack == "encoder":
+            model.config.encoder_ffn_dim = n_keep
+        else:
+            model.config.decoder_ffn_dim = n_keep
+
+
+def prune_heads(
+    model: BartForConditionalGeneration,
+    head_scores: dict[str, torch.Tensor],
+    n_drop: int,
+) -> None:
+    """
+    Physically drop the n_drop weakest heads of every attention block, in place.
+
+    The result runs (HF reshapes with d_k, not H) but cannot be saved as a
+    standard BartConfig checkpoint — use for probing only.
+    """
+    for name, attn in attention_blocks(model):
+        n_keep = attn.num_heads - n_drop
+        if n_keep < 1:
+            continue
+        keep = head_scores[name].topk(n_keep).indices.sort().values
+        index = torch.cat([torch.arange(h * attn.head_dim, (h + 1) * attn.head_dim) for h in keep.tolist()])
+        index = cast(torch.LongTensor, index.to(attn.q_proj.weight.device))
+        attn.q_proj = prune_linear_layer(attn.q_proj, index, dim=0)
+        attn.k_proj = prune_linear_layer(attn.k_proj, index, dim=0)
+        attn.v_proj = prune_linear_layer(attn.v_proj, index, dim=0)
+        attn.out_proj = prune_linear_layer(attn.out_proj, index, dim=1)
+        attn.num_heads = n_keep
+
+
+def finetune(
+    model: BartForConditionalGeneration,
+    loader: DataLoader,
+    device: str,
+    steps: int,
+    lr: float,
+) -> None:
+    """Short recovery fine-tune with the standard label loss."""
+    model.train()
+    optimizer = torch.optim.AdamW(model.parameters(), lr=lr)
+    batches = itertools.islice(itertools.cycle(loader), steps)
+    pbar = tqdm(batches, total=steps, desc="Recovery")
+    for src_ids, attn_mask, tgt_ids, dec_attn_mask, labels in pbar:
+        loss = model(
+            input_ids=src_ids.to(device),
+            attention_mask=attn_mask.to(device),
+            decoder_input_ids=tgt_ids.to(device),
+            decoder_attention_mask=dec_attn_mask.to(device),
+            labels=labels.to(device),
+        ).loss
+        optimizer.zero_grad()
+        loss.backward()
+        optimizer.step()
+        pbar.set_postfix({"loss": f"{loss.item():.4f}"})
+    model.eval()
+
+
+def prune():
+    # ── 0. Parse CLI Arguments ──
+    parser = argparse.ArgumentParser(description="Structured pruning of heads / FFN neurons (HF BART)")
+    parser.add_argument("--model", type=str, default="model_final", help="Trained model directory")
+    parser.add_argument("--out", type=str, default="model_pruned", help="Where to save the pruned model")
+    parser.add_argument("--ffn-keep", type=float, default=0.5, help="Fraction of FFN neurons kept per layer")
+    parser.add_argument("--probe-heads", type=int, default=1,
+                        help="Heads per block to drop in the in-memory probe (0 = skip)")
+    parser.add_argument("--score-batches", type=int, default=20, help="Validation batches for importance")
+    parser.add_argument("--finetune-steps", type=int, default=500, help="Recovery fine-tune steps")
+    args = parser.parse_args()
+
+    # ── 1. Load Config, Tokenizer, Model ──
+    config = load_config()
+    device = get_device(config.training.device)
+    project_root = get_project_root()
+    tokenizer = Tokenizer(project_root / "src/tokenizer/tokenizer.json")
+
+    model_dir = project_root / args.model
+    if not model_dir.exists():
+        print(f"❌ Model not found at {model_dir}. Please run training first.")
+        return
+    model = BartForConditionalGeneration.from_pretrained(
+        str(model_dir), attn_implementation=config.model.attn_implementation).to(device)  # pyright: ignore[reportArgumentType]
+    model.eval()
+    print(f"✂️  Pruning {model_dir} on device: {device}")
+
+    # ── 2. Data ──
+    max_len = config.model.max_seq_len
+    train_ds = Seq2SeqDataset(config.data.train_path, tokenizer, max_len, tokenizer.pad_id)
+    validation_ds = Seq2SeqDataset(config.data.val_path, tokenizer, max_len, tokenizer.pad_id)
+    train_loader = DataLoader(train_ds, batch_size=config.training.batch_size, shuffle=True)
+    validation_loader = DataLoader(validation_ds, batch_size=config.training.batch_size)
+    test_data = load_test_data()
+
+    rows = [("baseline", evaluate_quality(model, tokenizer, config, device, test_data))]
+
+    # ── 3. Importance on the validation set ──
+    head_scores, ffn_scores = score_importance(model, validation_loader, device, args.score_batches)
+    print("\n📊 Head importance (Taylor, higher = more important):")
+    for name, scores in head_scores.items():
+        cells = " ".join(f"{s:9.3f}" for s in scores.tolist())
+        print(f"   {name:<10} {cells}")
+
+    # ── 4. Probe: drop weakest heads (in memory, not saved) ──
+    if args.probe_heads > 0:
+        probe = copy.deepcopy(model)
+        prune_heads(probe, head_scores, args.probe_heads)
+        rows.append((f"heads −{args.probe_heads}/block (probe)",
+                     evaluate_quality(probe, tokenizer, config, device, test_data)))
+        del probe
+
+    # ── 5. Physically prune FFN neurons ──
+    prune_ffn(model, ffn_scores, args.ffn_keep)
+    print(f"\n✂️  FFN width: encoder {config.model.d_ff} → {model.config.encoder_ffn_dim}, "
+          f"decoder {config.model.d_ff} → {model.config.decoder_ffn_dim}")
+    rows.append((f"ffn ×{args.ffn_keep}", evaluate_quality(model, tokenizer, config, device, test_data)))
+
+    # ── 6. Recovery fine-tune ──
+    if args.finetune_steps > 0:
+        finetune(model, train_loader, device, args.finetune_steps, float(config.training.learning_rate))
+        rows.append((f"ffn ×{args.ffn_keep} + finetune",
+                     evaluate_quality(model, tokenizer, config, device, test_data)))
+
+    # ── 7. Save (HF format, loadable by from_pretrained / export_hf.py) ──
+    save_dir = project_root / args.out
+    model.save_pretrained(str(save_dir))
+    print(f"📦 Pruned model saved to {save_dir}/")
+    print(f"   Export with: python -m src.export_hf --model {args.out}")
+
+    print_report(rows)
+
+
+if __name__ == "__main__":
+    prune()
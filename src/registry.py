@@ -0,0 +1,447 @@
+"""
+registry.py — Versioned model registry + hot-swapping inference engine.
+
+Registry (inference.registry_path, default models/):
+
+    models/
+      ACTIVE                  → "v3"  (version served by default; load_model() follows it)
+      v1/ v2/ v3/             each a complete model directory (config.json, model.safetensors,
+                              generation_config.json, plus any side files: output_vocab.json, …)
+        manifest.json         {"version", "created", "source", "weights_sha256", "cache_version",
+                               "config": config.json contents, "eval": evaluate_quality() scores, "notes"}
+
+    publish() copies into a temporary directory and renames it into place, so
+    a half-written version is never visible; ACTIVE is replaced atomically.
+
+Engine (zero-downtime swap inside one process):
+
+    check(text) ─► lease current deployment (in_flight += 1) ─► generate_response() ─► release
+                     │
+    deploy(v)      ──┼─ background thread: load_hf_model → warm-up → switch `current` under the lock
+                     │  (new requests go to v at once) → old deployment drains: wait until its
+                     │  in_flight == 0, then its weights are dropped
+                     │
+    shadow(v, rate) ─┘ sampled requests are replayed on candidate v in a separate thread (never on
+                       the caller's path); shadow_report() compares latency and agreement, then
+                       promote() switches to the already-warm candidate.
+
+Each deployment has its own result cache versioned by its weights, so a
+swap never serves answers of the previous model.
+
+Usage:
+    python -m src.registry publish model_final --eval --notes "retrained on v4 data"
+    python -m src.registry list
+    python -m src.registry activate v2
+    python -m src.registry verify v2
+    python -m src.registry shadow v3 --rate 0.5        # replay test sentences, print the latency comparison
+
+    engine = InferenceEngine(ModelRegistry("models"), config)      # serves ACTIVE
+    engine.check("Ich habe den Auto.")
+    engine.shadow("v3", rate=0.1); …; engine.shadow_report()
+    engine.deploy("v3").result()                                    # load, warm up, switch, drain
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+from src.cache import create_cache, model_version
+from src.config import Config, get_device, get_project_root, load_config
+from src.inference import generate_response, load_hf_model
+from src.tokenizer.tokenizer import Tokenizer
+
+MANIFEST_FILE = "manifest.json"
+ACTIVE_FILE = "ACTIVE"
+WARMUP_TEXTS = ["Ich habe den Auto.", "Wo du wohnst?", "Ich habe nach Berlin gefahren.", "Ich bin müde."]
+_VERSION = re.compile(r"^v(\d+)$")
+
+
+def _version_number(version: str) -> int:
+    """Registry version name → number ("v12" → 12)."""
+    match = _VERSION.match(version)
+    if match is None:
+        raise ValueError(f"not a registry version: {version!r}")
+    return int(match.group(1))
+
+
+def file_sha256(path: str | Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ModelRegistry:
+    """Versioned model directories under one root, each with a manifest.json."""
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+
+    def path(self, version: str) -> Path:
+        return self.root / version
+
+    def versions(self) -> list[str]:
+        """Published versions, oldest first."""
+        if not self.root.exists():
+            return []
+        found = [p.name for p in self.root.iterdir() if _VERSION.match(p.name) and (p / MANIFEST_FILE).exists()]
+        return sorted(found, key=_version_number)
+
+    def manifest(self, version: str) -> dict:
+        path = self.path(version) / MANIFEST_FILE
+        if not path.exists():
+            raise KeyError(f"no model version {version!r} in {self.root}")
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def publish(
+        self,
+        model_dir: str | Path,
+        eval_scores: dict | None = None,
+        notes: str = "",
+        activate: bool = False,
+    ) -> dict:
+        """Copy a model directory in as the next version v<N+1>; returns its manifest."""
+        model_dir = Path(model_dir)
+        if not (model_dir / "model.safetensors").exists():
+            raise FileNotFoundError(f"{model_dir} has no model.safetensors")
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(model_dir / "config.json", "r", encoding="utf-8") as f:
+            bart_config = json.load(f)
+
+        staging = Path(tempfile.mkdtemp(prefix=".publish-", dir=self.root))
+        try:
+            for item in model_dir.iterdir():
+                if item.is_file() and item.name != MANIFEST_FILE:
+                    shutil.copy2(item, staging / item.name)
+            existing = self.versions()
+            version = f"v{_version_number(existing[-1]) + 1}" if existing else "v1"
+            manifest = {
+                "version": version,
+                "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "source": str(model_dir),
+                "weights_sha256": file_sha256(staging / "model.safetensors"),
+                "cache_version": model_version(staging),
+                "config": bart_config,
+                "eval": eval_scores or {},
+                "notes": notes,
+            }
+            with open(staging / MANIFEST_FILE, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2, ensure_ascii=False)
+            os.rename(staging, self.path(version))     # fails (never overwrites) if the version appeared meanwhile
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        if activate:
+            self.activate(version)
+        return manifest
+
+    def verify(self, version: str) -> bool:
+        """Do the weights still match the hash recorded at publish time?"""
+        return file_sha256(self.path(version) / "model.safetensors") == self.manifest(version)["weights_sha256"]
+
+    def activate(self, version: str) -> None:
+        self.manifest(version)                          # must exist
+        tmp = self.root / f".{ACTIVE_FILE}.tmp"
+        tmp.write_text(version + "\n", encoding="utf-8")
+        os.replace(tmp, self.root / ACTIVE_FILE)
+
+    def active(self) -> str | None:
+        """ACTIVE version, else the newest one, else None."""
+        pointer = self.root / ACTIVE_FILE
+        if pointer.exists():
+            return pointer.read_text(encoding="utf-8").strip()
+        versions = self.versions()
+        return versions[-1] if versions else None
+
+
+class _Deployment:
+    """One loaded version: model + its cache + an in-flight counter for draining."""
+
+    def __init__(self, version: str, model, cache):
+        self.version = version
+        self.model = model
+        self.cache = cache
+        self.in_flight = 0
+        self.served = 0
+        self._idle = threading.Condition()
+
+    def acquire(self) -> None:
+        with self._idle:
+            self.in_flight += 1
+
+    def release(self) -> None:
+        with self._idle:
+            self.in_flight -= 1
+            self.served += 1
+            if self.in_flight == 0:
+                self._idle.notify_all()
+
+    def wait_idle(self, timeout: float | None = None) -> bool:
+        with self._idle:
+            return self._idle.wait_for(lambda: self.in_flight == 0, timeout)
+
+
+class InferenceEngine:
+    """
+    Serves the registry's ACTIVE (or a given) version; swaps versions without a restart.
+
+    Counters: swaps; status() reports the current version, in-flight requests
+    and any shadow candidate.
+    """
+
+    def __init__(
+        self,
+        registry: ModelRegistry,
+        config: Config,
+        device: str | None = None,
+        version: str | None = None,
+        warmup_texts: list[str] | None = None,
+        drain_timeout: float = 60.0,
+        use_cache: bool = True,
+    ):
+        self.registry = registry
+        self.config = config
+        self.device = device or get_device(config.training.device)
+        self.tokenizer = Tokenizer(get_project_root() / "src/tokenizer/tokenizer.json")
+        self.max_len = config.model.max_seq_len
+        self.warmup_texts = WARMUP_TEXTS if warmup_texts is None else warmup_texts
+        self.drain_timeout = drain_timeout
+        self.use_cache = use_cache
+        self.swaps = 0
+
+        version = version or registry.active()
+        if version is None:
+            raise FileNotFoundError(f"no published model in {registry.root} (python -m src.registry publish …)")
+        self._lock = threading.Lock()
+        self._current = self._load(version)
+        self._loader = ThreadPoolExecutor(1, thread_name_prefix="model-load")
+        self._shadow: _Deployment | None = None
+        self._shadow_rate = 0.0
+        self._shadow_pending = 0
+        self._shadow_max_pending = 32
+        self._shadow_runner = ThreadPoolExecutor(1, thread_name_prefix="shadow")
+        self._shadow_samples: list[tuple[float, float, bool]] = []   # (primary ms, candidate ms, same answer)
+        self._rng = random.Random(0)
+
+    # ── Loading ──────────────────────────────────────────────────────────────
+
+    def _load(self, version: str) -> _Deployment:
+        """Load + warm up a version (runs on the caller's thread)."""
+        path = self.registry.path(version)
+        self.registry.manifest(version)
+        model = load_hf_model(path, self.device, self.config.model.attn_implementation)
+        cache = create_cache(self.config, path) if self.use_cache else None
+        for text in self.warmup_texts:                 # allocator growth / kernel selection before traffic
+            generate_response(text, model, self.tokenizer, self.config, self.device, self.max_len)
+        return _Deployment(version, model, cache)
+
+    @property
+    def version(self) -> str:
+        return self._current.version
+
+    # ── Serving ──────────────────────────────────────────────────────────────
+
+    @contextmanager
+    def _lease(self):
+        with self._lock:
+            deployment = self._current
+            deployment.acquire()
+        try:
+            yield deployment
+        finally:
+            deployment.release()
+
+    def check(self, text: str) -> str:
+        with self._lease() as deployment:
+            start = time.perf_counter()
+            response = generate_response(text, deployment.model, self.tokenizer, self.config, self.device,
+                                         self.max_len, cache=deployment.cache)
+            elapsed = (time.perf_counter() - start) * 1000
+        if self._shadow is not None and self._rng.random() < self._shadow_rate:
+            self._mirror(text, response, elapsed)
+        return response
+
+    def check_many(self, texts: list[str]) -> list[str]:
+        return [self.check(t) for t in texts]
+
+    # ── Swapping ─────────────────────────────────────────────────────────────
+
+    def deploy(self, version: str) -> Future:
+        """Load + warm up `version` in the background, then switch to it; the Future resolves to promote()'s report."""
+        def run():
+            if self._shadow is not None and self._shadow.version == version:
+                return self.promote()
+            return self._switch(self._load(version))
+
+        return self._loader.submit(run)
+
+    def promote(self) -> dict:
+        """Switch traffic to the (already warm) shadow candidate."""
+        if self._shadow is None:
+            raise RuntimeError("no shadow candidate to promote")
+        candidate = self._shadow
+        self.stop_shadow()
+        return self._switch(candidate)
+
+    def _switch(self, deployment: _Deployment) -> dict:
+        with self._lock:
+            old, self._current = self._current, deployment
+        self.swaps += 1
+        start = time.perf_counter()
+        drained = old.wait_idle(self.drain_timeout)     # in-flight requests finish on the old weights
+        report = {"from": old.version, "to": deployment.version, "drained": drained,
+                  "drain_ms": (time.perf_counter() - start) * 1000, "old_served": old.served}
+        if drained:
+            old.model = None                            # drop the old weights
+        return report
+
+    # ── Shadow traffic ───────────────────────────────────────────────────────
+
+    def shadow(self, version: str, rate: float = 0.1, max_pending: int = 32) -> Future:
+        """Load `version` in the background and replay a `rate` sample of traffic on it once warm."""
+        def run():
+            candidate = self._shadow if self._shadow and self._shadow.version == version else self._load(version)
+            with self._lock:
+                self._shadow_samples = []
+                self._shadow_rate = rate
+                self._shadow_max_pending = max_pending
+                self._shadow = candidate
+            return candidate.version
+
+        return self._loader.submit(run)
+
+    def stop_shadow(self) -> None:
+        with self._lock:
+            self._shadow = None
+            self._shadow_rate = 0.0
+        self._shadow_runner.submit(lambda: None).result()     # let queued replays finish
+
+    def _mirror(self, text: str, primary: str, primary_ms: float) -> None:
+        with self._lock:
+            candidate = self._shadow
+            if candidate is None or self._shadow_pending >= self._shadow_max_pending:
+                return                                  # shadow must never build an unbounded backlog
+            self._shadow_pending += 1
+
+        def replay():
+            try:
+                start = time.perf_counter()
+                response = generate_response(text, candidate.model, self.tokenizer, self.config, self.device,
+                                             self.max_len)
+                sample = (primary_ms, (time.perf_counter() - start) * 1000, response == primary)
+                with self._lock:
+                    if self._shadow is candidate:
+                        self._shadow_samples.append(sample)
+            finally:
+                with self._lock:
+                    self._shadow_pending -= 1
+
+        self._shadow_runner.submit(replay)
+
+    def shadow_report(self, wait: bool = True) -> dict:
+        """Latency of the same sampled requests on the current version vs the candidate."""
+        if wait:
+            self._shadow_runner.submit(lambda: None).result()
+        with self._lock:
+            samples = list(self._shadow_samples)
+            candidate = self._shadow.version if self._shadow else None
+        report = {"current": self.version, "candidate": candidate, "requests": len(samples)}
+        if samples:
+            primary = [s[0] for s in samples]
+            shadow = [s[1] for s in samples]
+            report.update(
+                current_p50_ms=statistics.median(primary),
+                candidate_p50_ms=statistics.median(shadow),
+                current_mean_ms=statistics.fmean(primary),
+                candidate_mean_ms=statistics.fmean(shadow),
+                agreement=sum(s[2] for s in samples) / len(samples),
+            )
+        return report
+
+    def status(self) -> dict:
+        with self._lock:
+            current, shadow = self._current, self._shadow
+        return {"version": current.version, "in_flight": current.in_flight, "served": current.served,
+                "swaps": self.swaps, "shadow": shadow.version if shadow else None, "shadow_rate": self._shadow_rate}
+
+    def close(self) -> None:
+        self._loader.shutdown(wait=True)
+        self._shadow_runner.shutdown(wait=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Versioned model registry")
+    parser.add_argument("--root", type=str, default=None, help="Registry directory (default: inference.registry_path)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("publish", help="Copy a model directory in as the next version")
+    p.add_argument("model", type=str)
+    p.add_argument("--eval", action="store_true", help="Score on tests/test_data.json and store it in the manifest")
+    p.add_argument("--notes", type=str, default="")
+    p.add_argument("--activate", action="store_true")
+    sub.add_parser("list", help="Versions with hash and eval scores")
+    p = sub.add_parser("activate", help="Make a version the default for load_model()")
+    p.add_argument("version", type=str)
+    p = sub.add_parser("verify", help="Re-hash a version's weights against its manifest")
+    p.add_argument("version", type=str)
+    p = sub.add_parser("shadow", help="Replay the test sentences with a candidate shadowing the active version")
+    p.add_argument("version", type=str)
+    p.add_argument("--rate", type=float, default=1.0)
+    args = parser.parse_args()
+
+    config = load_config()
+    project_root = get_project_root()
+    registry = ModelRegistry(Path(args.root) if args.root else project_root / config.inference.registry_path)
+
+    if args.command == "publish":
+        scores = None
+        if args.eval:
+            from src.evaluation import evaluate_quality, load_test_data
+
+            device = get_device(config.training.device)
+            scores = evaluate_quality(load_hf_model(args.model, device, config.model.attn_implementation), Tokenizer(), config, device,
+                                      load_test_data())
+        manifest = registry.publish(args.model, eval_scores=scores, notes=args.notes, activate=args.activate)
+        print(f"📦 Published {args.model} as {manifest['version']} (sha256 {manifest['weights_sha256'][:12]}…)"
+              + (" — active" if args.activate else ""))
+    elif args.command == "list":
+        active = registry.active()
+        for version in registry.versions():
+            m = registry.manifest(version)
+            scores = m["eval"]
+            evaluated = (f"det {scores['det_acc']:.1f}%  corr {scores['corr_acc']:.1f}%  "
+                         f"p50 {scores['latency_p50_ms']:.1f} ms") if scores else "not evaluated"
+            print(f"  {'▶' if version == active else ' '} {version:<5} {m['created']}  {m['weights_sha256'][:12]}  "
+                  f"{evaluated}  {m['notes']}")
+    elif args.command == "activate":
+        registry.activate(args.version)
+        print(f"✅ {args.version} is now active")
+    elif args.command == "verify":
+        ok = registry.verify(args.version)
+        print(f"{'✅' if ok else '❌'} {args.version}: weights {'match' if ok else 'DO NOT match'} the manifest")
+    elif args.command == "shadow":
+        from src.evaluation import load_test_data
+
+        engine = InferenceEngine(registry, config)
+        engine.shadow(args.version, rate=args.rate).result()
+        for item in load_test_data():
+            engine.check(item["input"])
+        report = engine.shadow_report()
+        engine.close()
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+"""
+rules.py — Deterministic fast-path checker compiled from the generator lexicons.
+
+The data generators (src/data/generators/) already hold authoritative grammar
+tables. RuleChecker compiles them into lookup structures once and answers the
+core A1/A2 sentence patterns without the neural model:
+
+  subject–verb agreement   "Du spiele Fußball."        subjects × conjugation tables
+  Perfekt auxiliary        "Ich habe nach Hause gegangen."   perfekt_sein/haben_verbs
+  separable verbs          "Ich aufstehe um 7 Uhr."    separable_verbs
+  inversion after time_adv "Heute ich spiele Fußball." time_adv
+  fixed prepositions       "Ich gehe mit den Freund."  articles × nouns_with_gender
+
+Every slot of a sentence must be recognized (subject, verb form, complement
+from the generators' noun/phrase tables, ...); anything else → None (abstain)
+and the caller falls back to the model. Responses use the model's format:
+"✅ Correct." or "❌ Incorrect.\\n✅ Correct: …\\n📝 Пояснення: …".
+
+Usage:
+    python -m src.rules                      # coverage / agreement with gold on the JSONL data
+    python -m src.generate --text "Du spiele Fußball." --rules
+"""
+
+import json
+import threading
+
+from src.cache import normalize_text
+from src.config import load_config, get_project_root
+from src.data.generators.verbs import VerbGenerator
+from src.metrics import CORRECT_VERDICT
+
+# Prepositions that always govern one case (CaseGenerator.generate_fixed_prepositions)
+FIXED_PREPOSITION_CASES = {
+    "mit": "dat", "nach": "dat", "von": "dat", "bei": "dat", "aus": "dat", "zu": "dat",
+    "für": "akk", "ohne": "akk", "gegen": "akk", "durch": "akk",
+}
+CASE_NAMES = {"nom": "Nominativ", "akk": "Akkusativ", "dat": "Dativ", "gen": "Genitiv"}
+
+# Verbs that take a directional phrase ("nach Hause", "ins Kino", ...)
+MOTION_VERBS = {"gehen", "fahren", "kommen"}
+# Objects of "getrunken" (VerbGenerator.generate_perfekt_aux)
+DRINKS = {"Kaffee", "Tee", "Wasser", "Bier", "Milch"}
+
+
+class RuleChecker:
+    """
+    Counters: hits (answered), abstains.
+    """
+
+    def __init__(self, generator: VerbGenerator | None = None):
+        g = generator or VerbGenerator()
+        self.g = g
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.abstains = 0
+
+        # Subject word → possible subject keys ("sie" = she or formal/plural Sie)
+        self.readings: dict[str, list[str]] = {}
+        for key in g.subjects:
+            self.readings.setdefault(g.get_display_name(key).lower(), []).append(key)
+
+        # Paradigms: verb → {subject key: finite form}
+        self.paradigms: dict[str, dict[str, str]] = {
+            "sein": {k: v["bin"] for k, v in g.subjects.items()},
+            "haben": {k: v["habe"] for k, v in g.subjects.items()},
+            "sein:prät": {k: v["war"] for k, v in g.subjects.items()},
+            "haben:prät": {k: v["hatte"] for k, v in g.subjects.items()},
+        }
+        strong = {inf: dict(zip(["ich", "du", "er", "sie", "wir", "ihr"], forms)) for inf, forms, _ in g.strong_verbs}
+        for forms in strong.values():
+            forms["sie_plural"] = forms["wir"]
+        stems = [stem for stem, _ in g.praesens_verbs] + [stem for _, stem, _, _ in g.separable_verbs]
+        stems += [inf[:-2] for inf, _ in g.perfekt_sein_verbs + g.perfekt_haben_verbs]
+        for stem in stems:
+            inf = stem + "en"
+            self.paradigms[inf] = strong.get(inf) or {k: g.get_verb_form(stem, k) for k in g.subjects}
+
+        # Finite form → verbs it belongs to
+        self.form_index: dict[str, set[str]] = {}
+        for verb, forms in self.paradigms.items():
+            for form in forms.values():
+                self.form_index.setdefault(form, set()).add(verb)
+
+        # Partizip II → (auxiliary paradigm, infinitive)
+        self.participles = {p2: ("sein", inf) for inf, p2 in g.perfekt_sein_verbs}
+        self.participles.update({p2: ("haben", inf) for inf, p2 in g.perfekt_haben_verbs})
+
+        # Wrongly fused separable forms ("aufstehe") → (infinitive, stem, prefix)
+        self.fused: dict[str, tuple[str, str, str]] = {}
+        self.separable_prefixes: dict[str, tuple[str, str, str]] = {}
+        for inf, stem, prefix, extra in g.separable_verbs:
+            for key in g.subjects:
+                self.fused[prefix + g.get_verb_form(stem, key)] = (inf, stem, prefix)
+            self.separable_prefixes[prefix] = (inf, stem, extra)
+
+        self.genders = dict(g.nouns_with_gender)
+        self.genders.update({noun: gender for noun, gender in g.nouns["food"]})
+
+        # Complements per verb that may follow its finite form in a fully recognized
+        # sentence. sein / haben get none of the Perfekt middles, so a bare
+        # auxiliary without a participle ("Ich habe nach Hause.") abstains.
+        places = {phrase for phrase, _ in g.nouns["place"]}
+        foods = {phrase for phrase, _ in g.nouns["food"]}
+        self.complements: dict[str, set[str]] = {
+            "sein": set(), "sein:prät": set(), "haben:prät": set(),
+            "haben": {phrase for phrase, _ in g.nouns["objects"]},
+        }
+        for verb in self.paradigms:
+            self.complements.setdefault(verb, {"", "gut"})
+        for stem, obj in g.praesens_verbs:
+            self.complements[stem + "en"].add(obj)
+        for verb in MOTION_VERBS:
+            self.complements[verb] |= places
+
+        # Partizip II's infinitive → what may stand between auxiliary and participle
+        self.perfekt_middles: dict[str, set[str]] = {}
+        for inf, _ in g.perfekt_sein_verbs:
+            self.perfekt_middles[inf] = {""} | (places if inf in MOTION_VERBS else set())
+        for inf, _ in g.perfekt_haben_verbs:
+            self.perfekt_middles[inf] = {""} | (DRINKS if inf == "trinken" else foods)
+
+        self.time_adv = sorted((adv.split() for adv in g.time_adv), key=len, reverse=True)
+
+    # ── Helpers ──────────────────────────────────────────────────────────────
+
+    def _agree(self, subject: str, verb: str) -> tuple[str, str] | None:
+        """
+        (verb paradigm, correct form) for a subject + finite verb, or None if
+        either is unknown or the correct form is ambiguous ("Sie" = sie / Sie).
+        """
+        keys = self.readings.get(subject.lower())
+        verbs = self.form_index.get(verb)
+        if not keys or not verbs or len(verbs) != 1:
+            return None
+        paradigm = next(iter(verbs))
+        forms = {self.paradigms[paradigm][k] for k in keys}
+        if verb in forms:
+            return paradigm, verb
+        if len(forms) != 1:
+            return None
+        return paradigm, forms.pop()
+
+    def _agreement_explanation(self, paradigm: str, dn: str, correct: str, wrong: str) -> str:
+        if paradigm in ("sein", "haben"):
+            return f"Дієслово '{paradigm}' для підмета '{dn}' має форму '{correct}', а не '{wrong}'."
+        if paradigm.endswith(":prät"):
+            return f"У минулому часі (Präteritum) дієслово '{paradigm[:-5]}' для '{dn}' має форму '{correct}'."
+        ending = self.g.subjects[self.readings[dn.lower()][0]]["ending"]
+        return (f"У теперішньому часі (Präsens) для підмета '{dn}' дієслово має закінчення '-{ending}', "
+                f"тому правильно '{correct}', а не '{wrong}'.")
+
+    @staticmethod
+    def _incorrect(correction: str, explanation: str) -> str:
+        return f"❌ Incorrect.\n✅ Correct: {correction}\n📝 Пояснення: {explanation}"
+
+    # ── Patterns ─────────────────────────────────────────────────────────────
+
+    def _check_inversion(self, adv: list[str], words: list[str]) -> str | None:
+        adv_text = " ".join(adv)
+        if len(words) < 2:
+            return None
+        first, second, rest = words[0], words[1], " ".join(words[2:])
+        if first.lower() in self.readings:
+            # "Heute ich spiele …" → verb must come second
+            agreed = self._agree(first, second)
+            if agreed is None or rest not in self.complements[agreed[0]]:
+                return None
+            paradigm, verb = agreed
+            # Only formal "Sie" keeps its capital once it leaves the first position
+            formal = first == "Sie" and verb == self.paradigms[paradigm]["sie_plural"]
+            subject = first if formal else first.lower()
+            correction = " ".join(w for w in (adv_text, verb, subject, rest) if w) + "."
+            return self._incorrect(
+                correction,
+                f"Коли речення починається з '{adv_text}', дієслово '{verb}' має стояти на другому місці, "
+                f"перед підметом '{subject}'.",
+            )
+        if second.lower() in self.readings:
+            agreed = self._agree(second, first)
+            if agreed is None or rest not in self.complements[agreed[0]]:
+                return None
+            paradigm, verb = agreed
+            if verb == first:
+                return CORRECT_VERDICT
+            correction = " ".join(w for w in (adv_text, verb, second, rest) if w) + "."
+            return self._incorrect(correction, self._agreement_explanation(paradigm, second.capitalize(), verb, first))
+        return None
+
+    def _check_subject_first(self, words: list[str]) -> str | None:
+        subject, verb, rest = words[0], words[1], words[2:]
+        if subject.lower() not in self.readings or subject != subject.capitalize():
+            return None
+        keys = self.readings[subject.lower()]
+
+        # Separable verb fused with its prefix: "Ich aufstehe um 7 Uhr."
+        if verb in self.fused:
+            inf, stem, prefix = self.fused[verb]
+            forms = {self.g.get_verb_form(stem, k) for k in keys}
+            if len(forms) != 1:
+                return None
+            correction = " ".join([subject, forms.pop(), *rest, prefix]) + "."
+            return self._incorrect(
+                correction,
+                f"Дієслово '{inf}' є відокремлюваним. У теперішньому часі приставка '{prefix}' "
+                f"має стояти в самому кінці речення.",
+            )
+
+        # Separable verb, correctly split: "Ich stehe um 7 Uhr auf."
+        if rest and rest[-1] in self.separable_prefixes:
+            inf, stem, extra = self.separable_prefixes[rest[-1]]
+            if " ".join(rest[:-1]) != extra:
+                return None
+            agreed = self._agree(subject, verb)
+            if agreed is None or agreed[0] != stem + "en":
+                return None
+            if agreed[1] == verb:
+                return CORRECT_VERDICT
+            correction = " ".join([subject, agreed[1], *rest]) + "."
+            return self._incorrect(correction, self._agreement_explanation(agreed[0], subject, agreed[1], verb))
+
+        # Perfekt: "<S> <aux> [complement] <Partizip II>."
+        if rest and rest[-1] in self.participles:
+            aux_verb, inf = self.participles[rest[-1]]
+            middle = " ".join(rest[:-1])
+            if middle not in self.perfekt_middles[inf]:
+                return None
+            used = self.form_index.get(verb, set()) & {"sein", "haben"}
+            if len(used) != 1:
+                return None
+            forms = {self.paradigms[aux_verb][k] for k in keys}
+            if verb in forms:
+                return CORRECT_VERDICT
+            if len(forms) != 1:
+                return None
+            c_aux = forms.pop()
+            if used == {aux_verb}:
+                expl = (f"Допоміжне дієслово має узгоджуватися з підметом: для '{subject}' правильно "
+                        f"'{c_aux}', а не '{verb}'.")
+            elif aux_verb == "sein":
+                expl = f"Дієслово '{inf}' означає рух, тому використовуємо '{c_aux}', а не '{verb}'."
+            else:
+                expl = f"Дієслово '{inf}' потребує допоміжного haben, тому використовуємо '{c_aux}', а не '{verb}'."
+            return self._incorrect(" ".join([subject, c_aux, *rest]) + ".", expl)
+
+        agreed = self._agree(subject, verb)
+        if agreed is None:
+            return None
+        paradigm, c_verb = agreed
+
+        # Fixed preposition + definite article + noun: "Ich gehe mit dem Freund."
+        if len(rest) == 3 and rest[0] in FIXED_PREPOSITION_CASES:
+            prep, article, noun = rest
+            if article not in self.g.all_def_articles or noun not in self.genders:
+                return None
+            case = FIXED_PREPOSITION_CASES[prep]
+            c_art = self.g.articles[case][self.genders[noun]]
+            if c_verb == verb and c_art == article:
+                return CORRECT_VERDICT
+            correction = f"{subject} {c_verb} {prep} {c_art} {noun}."
+            if c_art != article:
+                expl = f"Прийменник '{prep}' завжди вимагає {CASE_NAMES[case]}. Тому артикль має бути '{c_art}'."
+            else:
+                expl = self._agreement_explanation(paradigm, subject, c_verb, verb)
+            return self._incorrect(correction, expl)
+
+        # Plain agreement with a known complement: "Du spiele Fußball."
+        if " ".join(rest) not in self.complements[paradigm]:
+            return None
+        if c_verb == verb:
+            return CORRECT_VERDICT
+        correction = " ".join([subject, c_verb, *rest]) + "."
+        return self._incorrect(correction, self._agreement_explanation(paradigm, subject, c_verb, verb))
+
+    # ── Public API ───────────────────────────────────────────────────────────
+
+    def check(self, text: str) -> str | None:
+        """Model-format response for a recognized sentence, None (abstain) otherwise."""
+        result = self._check(normalize_text(text))
+        with self._lock:
+            if result is None:
+                self.abstains += 1
+            else:
+                self.hits += 1
+        return result
+
+    def _check(self, text: str) -> str | None:
+        if not text.endswith(".") or any(c in text[:-1] for c in ",;:!?\"'"):
+            return None
+        words = text[:-1].split(" ")
+        for adv in self.time_adv:
+            if [w.lower() for w in words[:len(adv)]] == [a.lower() for a in adv]:
+                return self._check_inversion(adv, words[len(adv):])
+        if len(words) < 2:
+            return None
+        return self._check_subject_first(words)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.abstains
+        return {
+            "hits": self.hits,
+            "abstains": self.abstains,
+            "coverage": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def main():
+    from src.evaluation import score_response  # evaluation → inference → rules
+
+    config = load_config()
+    project_root = get_project_root()
+    checker = RuleChecker()
+
+    # Agreement with the gold outputs of the generated corpus
+    for path in (config.data.train_path, config.data.val_path):
+        answered = agree = 0
+        with open(project_root / path, "r", encoding="utf-8") as f:
+            items = [json.loads(line) for line in f]
+        for item in items:
+            result = checker.check(item["input"])
+            if result is not None:
+                answered += 1
+                agree += result.split("\n📝")[0] == item["output"].split("\n📝")[0]
+        print(f"📚 {path}: answered {answered}/{len(items)} ({answered / max(len(items), 1) * 100:.1f}%), "
+              f"verdict + correction match gold on {agree}/{answered}")
+
+    # Held-out test sentences
+    with open(project_root / "tests/test_data.json", "r", encoding="utf-8") as f:
+        test_data = json.load(f)
+    answered = det_ok = corr_ok = 0
+    for item in test_data:
+        result = checker.check(item["input"])
+        if result is not None:
+            answered += 1
+            det, corr, _ = score_response(item, result)
+            det_ok += det
+            corr_ok += corr
+    print(f"🎯 tests/test_data.json: answered {answered}/{len(test_data)}, "
+          f"detection correct {det_ok}/{answered}, correction correct {corr_ok}/{answered}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,423 @@
+"""
+scheduler.py — Continuous (iteration-level) batching for greedy decoding.
+
+With static batching, model.generate() runs a batch until its *longest*
+output is finished: a 4-token "✅ Correct." waits behind a 60-token
+Ukrainian explanation, and its batch row keeps burning decoder FLOPs on
+padding. The scheduler instead keeps a running decode batch of `max_slots`
+slots and makes every decision per decoder step:
+
+    submit(text) → waiting queue → Future
+                                  │
+    every step:                   ▼
+      admit     free slots ← waiting requests      one batched Encoder pass for all arrivals
+                                                   cross K/V written into the slots' caches
+      decode    active slots → one decoder step    [A, 1] tokens, each slot at its own position
+      retire    slot emitted <EOS> (or hit max_len) → decode text → Future resolved, slot freed
+
+Per-slot KV caches are static buffers (no concatenation per step):
+
+    self K/V    [slots, H, max_len, d_h]   per decoder layer, written at the slot's own position
+    cross K/V   [slots, H, max_len, d_h]   per decoder layer, computed once on admission
+    positions   [slots]                    decoder tokens already in the slot's cache
+
+HF's decoder takes one cache length for the whole batch, so the step is
+spelled out with the model's own submodules (embed_tokens / embed_positions /
+layernorm_embedding, then per layer self-attn → cross-attn → FFN, each
+followed by its post-LN). It reproduces generate_response() token for token,
+including the forced <EOS> at max_len.
+
+Usage:
+    from src.scheduler import ContinuousBatcher
+    with ContinuousBatcher(model, tokenizer, config, max_slots=32) as batcher:
+        future = batcher.submit("Ich habe den Auto.")      # thread-safe
+        responses = batcher.check(sentences)               # blocking, input order
+
+    python -m src.scheduler                 # static generate_responses() vs continuous, mixed traffic
+    python -m src.scheduler --slots 8 --requests 256
+"""
+
+import argparse
+import json
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+
+import torch
+import torch.nn.functional as F
+from transformers import BartForConditionalGeneration
+
+from src.cache import ResultCache, SQLiteResultCache, normalize_text
+from src.config import Config, get_project_root, load_config
+from src.inference import generate_responses, load_hf_model
+from src.model.model import decoder_layers, decoder_start_id, head_dims
+from src.metrics import (
+    BATCH_SIZE, DECODE_STEPS, DECODER_SECONDS, ENCODER_SECONDS, INPUT_TOKENS, OUTPUT_TOKENS, QUEUE_WAIT_SECONDS,
+    REQUEST_SECONDS, record_response,
+)
+from src.tokenizer.tokenizer import Tokenizer
+
+
+@dataclass
+class _Request:
+    text: str
+    future: Future
+    submitted: float = field(default_factory=time.perf_counter)
+    src_ids: list[int] = field(default_factory=list)
+    tokens: list[int] = field(default_factory=list)
+
+
+class SlotDecoder:
+    """
+    Greedy decoder over `max_slots` independent KV-cache slots.
+
+    admit() runs the encoder for a batch of new sources and fills their slots;
+    step() advances any subset of slots by one token.
+    """
+
+    def __init__(self, model: BartForConditionalGeneration, max_slots: int, max_len: int, device: str = "cpu"):
+        self.model = model
+        self.max_slots = max_slots
+        self.max_len = max_len
+        self.n_heads, self.head_dim = head_dims(model.config)
+        self.decoder = model.model.decoder
+        self.layers = decoder_layers(model)
+
+        shape = (max_slots, self.n_heads, max_len, self.head_dim)
+        dtype = model.lm_head.weight.dtype
+        n_layers = len(self.layers)
+        self.self_k = [torch.zeros(shape, dtype=dtype, device=device) for _ in range(n_layers)]
+        self.self_v = [torch.zeros(shape, dtype=dtype, device=device) for _ in range(n_layers)]
+        self.cross_k = [torch.zeros(shape, dtype=dtype, device=device) for _ in range(n_layers)]
+        self.cross_v = [torch.zeros(shape, dtype=dtype, device=device) for _ in range(n_layers)]
+        self.cross_mask = torch.zeros(max_slots, max_len, dtype=torch.bool, device=device)
+        self.src_len = torch.zeros(max_slots, dtype=torch.long, device=device)
+        self.positions = torch.zeros(max_slots, dtype=torch.long, device=device)
+        self._arange = torch.arange(max_len, device=device)
+
+    def _heads(self, x: torch.Tensor) -> torch.Tensor:
+        """[..., d] → [..., H, d_h]"""
+        return x.view(*x.shape[:-1], self.n_heads, self.head_dim)
+
+    @torch.no_grad()
+    def admit(self, slots: torch.Tensor, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> None:
+        """Encode [B, T_src] sources in one pass and reset `slots` [B] to start decoding them."""
+        memory = self.model.model.encoder(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+        width = input_ids.shape[1]
+        for layer, ck, cv in zip(self.layers, self.cross_k, self.cross_v):
+            attn = layer.encoder_attn
+            ck[slots, :, :width] = self._heads(attn.k_proj(memory)).transpose(1, 2)    # [B, H, T_src, d_h]
+            cv[slots, :, :width] = self._heads(attn.v_proj(memory)).transpose(1, 2)
+        self.cross_mask[slots] = False
+        self.cross_mask[slots, :width] = attention_mask.bool()
+        self.src_len[slots] = width
+        self.positions[slots] = 0
+
+    @torch.no_grad()
+    def step(self, slots: torch.Tensor, tokens: torch.Tensor) -> torch.Tensor:
+        """Feed tokens [A] into slots [A]; returns next-token logits [A, V]."""
+        dec = self.decoder
+        pos = self.positions[slots]                                            # [A]
+        h = dec.embed_tokens(tokens) + dec.embed_positions.weight[pos + dec.embed_positions.offset]
+        h = dec.layernorm_embedding(h)                                         # [A, d]
+
+        t_dec = int(pos.max()) + 1                  # only attend over the filled part of the buffers
+        t_src = int(self.src_len[slots].max())
+        self_mask = (self._arange[:t_dec] <= pos[:, None])[:, None, None, :]   # [A, 1, 1, T_dec]
+        cross_mask = self.cross_mask[slots, :t_src][:, None, None, :]          # [A, 1, 1, T_src]
+
+        for i, layer in enumerate(self.layers):
+            # ── Masked self-attention: write this step's K/V at each slot's own position ──
+            attn = layer.self_attn
+            q = self._heads(attn.q_proj(h))[:, :, None]                        # [A, H, 1, d_h]
+            self.self_k[i][slots, :, pos] = self._heads(attn.k_proj(h))
+            self.self_v[i][slots, :, pos] = self._heads(attn.v_proj(h))
+            out = F.scaled_dot_product_attention(
+                q, self.self_k[i][slots, :, :t_dec], self.self_v[i][slots, :, :t_dec],
+                attn_mask=self_mask, scale=attn.scaling,
+            )
+            h = layer.self_attn_layer_norm(h + attn.out_proj(out.reshape(h.shape)))
+
+            # ── Cross-attention over the slot's encoder memory ──
+            attn = layer.encoder_attn
+            q = self._heads(attn.q_proj(h))[:, :, None]
+            out = F.scaled_dot_product_attention(
+                q, self.cross_k[i][slots, :, :t_src], self.cross_v[i][slots, :, :t_src],
+                attn_mask=cross_mask, scale=attn.scaling,
+            )
+            h = layer.encoder_attn_layer_norm(h + attn.out_proj(out.reshape(h.shape)))
+
+            # ── FFN ──
+            h = layer.final_layer_norm(h + layer.fc2(layer.activation_fn(layer.fc1(h))))
+
+        self.positions[slots] += 1
+        return self.model.lm_head(h) + self.model.final_logits_bias[0]
+
+
+class ContinuousBatcher:
+    """
+    Iteration-level scheduler: admit, decode one step, retire — in a background thread.
+
+    Counters: steps, admitted, completed, slot_steps (sum of active slots over steps),
+    encoder_batches; stats() adds mean occupancy.
+    """
+
+    def __init__(
+        self,
+        model: BartForConditionalGeneration,
+        tokenizer: Tokenizer,
+        config: Config,
+        device: str = "cpu",
+        max_slots: int = 32,
+        max_len: int | None = None,
+        cache: ResultCache | SQLiteResultCache | None = None,
+    ):
+        model.eval()
+        self.model = model
+        self.cache = cache
+        self.tokenizer = tokenizer
+        self.device = device
+        self.max_len = max_len or config.model.max_seq_len
+        self.max_slots = max_slots
+        self.decoder = SlotDecoder(model, max_slots, self.max_len, device)
+
+        # generate(max_length=L) appends at most L-1 tokens; a forced <EOS> takes the last one
+        gen = model.generation_config
+        self.start_id = decoder_start_id(model.config)
+        self.eos_id = tokenizer.eos_id
+        self.max_new = self.max_len - 1 - (1 if gen.forced_eos_token_id is not None else 0)
+
+        self._slots: list[_Request | None] = [None] * max_slots
+        self._next = torch.full((max_slots,), self.start_id, dtype=torch.long, device=device)
+        self._waiting: deque[_Request] = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.steps = 0
+        self.admitted = 0
+        self.completed = 0
+        self.slot_steps = 0
+        self.encoder_batches = 0
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    # ── Client API ───────────────────────────────────────────────────────────
+
+    def submit(self, text: str) -> Future:
+        """
+        Queue one sentence; the Future resolves to its response string.
+
+        With a result cache the sentence is normalized first and a hit resolves
+        the Future at once; decoded responses are written back on retirement.
+        """
+        if self.cache is not None:
+            start = time.perf_counter()
+            text = normalize_text(text)
+            cached = self.cache.get(text)
+            if cached is not None:
+                future = Future()
+                future.set_result(cached)
+                record_response(cached, "cache")
+                REQUEST_SECONDS.observe(time.perf_counter() - start, path="scheduler")
+                return future
+        request = _Request(text, Future())
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("ContinuousBatcher is closed")
+            self._waiting.append(request)
+            self._cond.notify()
+        return request.future
+
+    def check(self, texts: list[str]) -> list[str]:
+        """Blocking: one response per text, in input order."""
+        return [f.result() for f in [self.submit(t) for t in texts]]
+
+    def stats(self) -> dict:
+        with self._cond:
+            waiting = len(self._waiting)
+        return {
+            "steps": self.steps,
+            "admitted": self.admitted,
+            "completed": self.completed,
+            "encoder_batches": self.encoder_batches,
+            "active": sum(r is not None for r in self._slots),
+            "waiting": waiting,
+            "mean_occupancy": self.slot_steps / self.steps if self.steps else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ── Scheduler loop ───────────────────────────────────────────────────────
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed and not self._waiting and not any(self._slots):
+                    self._cond.wait()
+                if self._closed:
+                    break
+                free = [i for i, r in enumerate(self._slots) if r is None]
+                arrivals = [self._waiting.popleft() for _ in range(min(len(free), len(self._waiting)))]
+            # Requests cancelled while waiting (e.g. a client timeout) never take a slot
+            arrivals = [r for r in arrivals if r.future.set_running_or_notify_cancel()]
+            try:
+                if arrivals:
+                    self._admit(free[:len(arrivals)], arrivals)
+                if any(self._slots):
+                    self._step()
+            except Exception as e:  # fail the requests in flight, keep serving
+                for i, request in enumerate(self._slots):
+                    if request is not None:
+                        request.future.set_exception(e)
+                        self._slots[i] = None
+                for request in arrivals:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+
+        closed = RuntimeError("ContinuousBatcher closed")
+        for request in self._waiting:
+            if request.future.set_running_or_notify_cancel():
+                request.future.set_exception(closed)
+        for request in self._slots:
+            if request is not None:
+                request.future.set_exception(closed)
+
+    def _admit(self, slots: list[int], arrivals: list[_Request]) -> None:
+        tok = self.tokenizer
+        for request in arrivals:
+            request.src_ids = tok.encode(request.text, add_bos=True, add_eos=True, max_len=self.max_len)
+        width = max(len(r.src_ids) for r in arrivals)
+        input_ids = torch.tensor(
+            [tok.pad_sequence(r.src_ids, width) for r in arrivals], dtype=torch.long, device=self.device
+        )
+        index = torch.tensor(slots, dtype=torch.long, device=self.device)
+        start = time.perf_counter()
+        self.decoder.admit(index, input_ids, (input_ids != tok.pad_id).long())
+        ENCODER_SECONDS.observe(time.perf_counter() - start, path="scheduler")
+        self._next[index] = self.start_id
+        for slot, request in zip(slots, arrivals):
+            self._slots[slot] = request
+            QUEUE_WAIT_SECONDS.observe(start - request.submitted, path="scheduler")
+            INPUT_TOKENS.observe(len(request.src_ids))
+        self.admitted += len(arrivals)
+        self.encoder_batches += 1
+
+    def _step(self) -> None:
+        requests = {i: r for i, r in enumerate(self._slots) if r is not None}
+        active = list(requests)
+        index = torch.tensor(active, dtype=torch.long, device=self.device)
+        start = time.perf_counter()
+        logits = self.decoder.step(index, self._next[index])
+        next_ids = logits.argmax(dim=-1)
+        self._next[index] = next_ids
+        tokens = next_ids.tolist()
+        DECODER_SECONDS.observe(time.perf_counter() - start, path="scheduler")
+        BATCH_SIZE.observe(len(active), path="scheduler")
+        self.steps += 1
+        self.slot_steps += len(active)
+
+        for slot, token in zip(active, tokens):
+            request = requests[slot]
+            request.tokens.append(token)
+            if token == self.eos_id or len(request.tokens) >= self.max_new:
+                self._slots[slot] = None
+                self.completed += 1
+                response = self.tokenizer.decode(request.tokens, skip_special=True).strip()
+                DECODE_STEPS.observe(len(request.tokens), path="scheduler")
+                OUTPUT_TOKENS.observe(len(request.tokens))
+                REQUEST_SECONDS.observe(time.perf_counter() - request.submitted, path="scheduler")
+                record_response(response, "model")
+                if self.cache is not None:
+                    self.cache.put(request.text, response)
+                request.future.set_result(response)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Static vs continuous batching under mixed traffic")
+    parser.add_argument("--model", type=str, default="model_final", help="HF model dir (random weights if missing)")
+    parser.add_argument("--slots", type=int, default=32, help="Running batch size / static batch size")
+    parser.add_argument("--requests", type=int, default=128, help="Sentences submitted at once")
+    parser.add_argument("--json", type=str, default=None, help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    config = load_config()
+    project_root = get_project_root()
+    tokenizer = Tokenizer(project_root / "src/tokenizer/tokenizer.json")
+    model_dir = project_root / args.model
+    if (model_dir / "model.safetensors").exists():
+        model = load_hf_model(model_dir, "cpu", config.model.attn_implementation)
+    else:
+        from src.model.model import create_model
+
+        print(f"⚠️  No weights in {model_dir} — timing a randomly initialised model of the configured size")
+        torch.manual_seed(0)
+        model = create_model(config, tokenizer).eval()
+
+    with open(project_root / "tests/test_data.json", "r", encoding="utf-8") as f:
+        corpus = [item["input"] for item in json.load(f)]
+    texts = [corpus[i % len(corpus)] for i in range(args.requests)]
+    max_len = config.model.max_seq_len
+    print(f"\n🚦 {args.requests} requests, {args.slots} slots / batch size, max_len {max_len}")
+
+    # ── Static: every request in a batch finishes when the batch does ──
+    generate_responses(texts[:args.slots], model, tokenizer, config, "cpu", max_len, batch_size=args.slots)
+    start = time.perf_counter()
+    static_latency, static = [], []
+    for i in range(0, len(texts), args.slots):
+        batch = texts[i:i + args.slots]
+        static += generate_responses(batch, model, tokenizer, config, "cpu", max_len, batch_size=args.slots)
+        static_latency += [time.perf_counter() - start] * len(batch)
+    static_seconds = time.perf_counter() - start
+
+    # ── Continuous: each request finishes when its own sequence does ──
+    with ContinuousBatcher(model, tokenizer, config, max_slots=args.slots) as batcher:
+        batcher.check(texts[:args.slots])
+        start = time.perf_counter()
+        futures = [batcher.submit(t) for t in texts]
+        continuous_latency = [0.0] * len(futures)
+        for i, fut in enumerate(futures):
+            fut.add_done_callback(lambda _, i=i: continuous_latency.__setitem__(i, time.perf_counter() - start))
+        continuous = [f.result() for f in futures]
+        continuous_seconds = time.perf_counter() - start
+        stats = batcher.stats()
+
+    short = [i for i, r in enumerate(continuous) if r.startswith("✅")] or list(range(len(texts)))
+    results = {}
+    print(f"\n  {'mode':<12} {'sent/s':>8} {'p50 ms':>8} {'p50 short ms':>13}")
+    for name, seconds, latency in (
+        ("static", static_seconds, static_latency),
+        ("continuous", continuous_seconds, continuous_latency),
+    ):
+        results[name] = {
+            "sentences_per_s": len(texts) / seconds,
+            "p50_ms": statistics.median(latency) * 1000,
+            "p50_short_ms": statistics.median(latency[i] for i in short) * 1000,
+        }
+        r = results[name]
+        print(f"  {name:<12} {r['sentences_per_s']:>8.1f} {r['p50_ms']:>8.0f} {r['p50_short_ms']:>13.0f}")
+    mismatches = sum(a != b for a, b in zip(static, continuous))
+    results.update(scheduler=stats, mismatches=mismatches)
+    print(f"\n  mean slot occupancy {stats['mean_occupancy']:.1f}/{args.slots} over {stats['steps']} steps, "
+          f"{stats['encoder_batches']} encoder batches")
+    print(f"  {'✅' if mismatches == 0 else '⚠️ '} {mismatches} responses differ from generate_responses()\n")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
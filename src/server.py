@@ -0,0 +1,425 @@
+"""
+server.py — Lightweight asyncio HTTP/JSON inference server (no web framework).
+
+The Gradio Space is a UI. Programmatic clients (the LMS integration) need a
+plain JSON endpoint that holds hundreds of open connections without one
+slow request blocking the others:
+
+    client ──► asyncio event loop (all connections, HTTP/1.1 keep-alive, JSON parsing)
+                   │   pending model calls ≥ max_pending → 503 + Retry-After   (backpressure)
+                   ▼
+               bounded executor (max_workers threads) → generate_response / generate_responses /
+                   │                                    check_paragraph   (src/inference.py)
+                   │   or, with continuous: true, /check → ContinuousBatcher (src/scheduler.py)
+                   │   or, with compiled: true,   /check → CompiledEngine (src/compiled.py, warmed up at start)
+                   ▼
+               result within request_timeout → 200, else 504 (a queued call is dropped)
+
+Endpoints:
+    POST /check       {"text": "..."}            → {"text", "response", "verdict"}
+                      {"texts": ["...", ...]}    → {"results": [{"text", "response", "verdict"}, ...]}
+    POST /paragraph   {"text": "..."}            → {"sentences": [{"start", "end", "sentence", "verdict", "response"}]}
+    GET  /healthz                                → {"status": "ok", "pending", "max_pending", ...}
+    GET  /metrics                                → Prometheus text format (server + src/metrics.py)
+
+Errors are JSON too: {"error": "..."} with 400 (bad request), 404, 405,
+413 (body or batch too large), 503 (overloaded), 504 (timeout).
+
+Usage:
+    python -m src.server                                  # config.yaml `server` section
+    python -m src.server --port 9000 --workers 4 --continuous
+    python -m src.server --compiled                       # compile + warm up all shape buckets before listening
+    curl -s localhost:8080/check -d '{"text": "Ich habe den Auto."}'
+
+    from src.server import InferenceServer, BackgroundServer
+    with BackgroundServer(InferenceServer(model, tokenizer, config)) as srv:   # tests / notebooks
+        urllib.request.urlopen(srv.url + "/healthz")
+"""
+
+import argparse
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from http import HTTPStatus
+from pathlib import Path
+from typing import Callable, TypeVar
+from urllib.parse import urlsplit
+
+from src.cache import ResultCache, SQLiteResultCache, create_cache
+from src.config import Config, get_project_root, load_config
+from src.inference import generate_response, generate_responses, load_model
+from src.metrics import LATENCY_BUCKETS, METRICS, QUEUE_WAIT_SECONDS, Registry
+from src.paragraph import check_paragraph, verdict_of
+from src.tokenizer.tokenizer import Tokenizer
+
+T = TypeVar("T")
+
+MAX_BODY_BYTES = 1 << 20
+KEEPALIVE_TIMEOUT = 15.0
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str, headers: dict | None = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+class InferenceServer:
+    """
+    Request handling + bounded model execution; start() binds the socket.
+
+    Server metrics (self.metrics, served on /metrics together with src/metrics.py
+    METRICS): requests per (endpoint, status), latency per endpoint, rejected
+    (503) and timed-out (504) requests, pending model calls.
+    """
+
+    def __init__(
+        self,
+        model,
+        tokenizer: Tokenizer,
+        config: Config,
+        device: str = "cpu",
+        cache: ResultCache | SQLiteResultCache | None = None,
+        max_workers: int | None = None,
+        max_pending: int | None = None,
+        request_timeout: float | None = None,
+        continuous: bool | None = None,
+        compiled: bool | None = None,
+    ):
+        opts = config.server
+        self.model, self.tokenizer, self.config, self.device, self.cache = model, tokenizer, config, device, cache
+        self.max_len = config.model.max_seq_len
+        self.max_pending = opts.max_pending if max_pending is None else max_pending
+        self.request_timeout = opts.request_timeout if request_timeout is None else request_timeout
+        self.max_batch = opts.max_batch
+        self._executor = ThreadPoolExecutor(max_workers or opts.max_workers, thread_name_prefix="infer")
+        self._batcher = None
+        if opts.continuous if continuous is None else continuous:
+            from src.scheduler import ContinuousBatcher
+
+            self._batcher = ContinuousBatcher(model, tokenizer, config, device, max_slots=opts.max_slots,
+                                              cache=cache)
+        self._engine = None
+        if self._batcher is None and (opts.compiled if compiled is None else compiled):
+            from src.compiled import CompiledEngine
+
+            self._engine = CompiledEngine(model, tokenizer, config, device)
+
+        self._pending = 0                        # model calls queued or running (incl. timed-out ones)
+        self._pending_lock = threading.Lock()
+        self._server: asyncio.AbstractServer | None = None
+        self.started = time.time()
+        self.metrics = Registry()               # server-level; model-level metrics live in METRICS
+        self.requests = self.metrics.counter(
+            "a2_server_requests_total", "HTTP requests by endpoint and status.", ("endpoint", "status"))
+        self.request_seconds = self.metrics.histogram(
+            "a2_server_request_seconds", "HTTP request latency by endpoint.", LATENCY_BUCKETS, ("endpoint",))
+        self.rejected = self.metrics.counter("a2_server_rejected_total", "Requests refused with 503 (max_pending).")
+        self.timeouts = self.metrics.counter("a2_server_timeouts_total", "Requests answered with 504.")
+        self.pending = self.metrics.gauge("a2_server_pending", "Model calls queued or running.")
+
+    # ── Bounded model execution ──────────────────────────────────────────────
+
+    def _release(self, _future) -> None:
+        with self._pending_lock:
+            self._pending -= 1
+
+    async def _run(self, submit: Callable[[], Future[T]]) -> T:
+        """
+        Run one model call: `submit()` must return a concurrent.futures.Future.
+        503 when max_pending calls are already queued or running, 504 after request_timeout.
+        """
+        with self._pending_lock:
+            if self._pending >= self.max_pending:
+                self.rejected.inc()
+                raise HTTPError(503, "server overloaded, retry later", {"Retry-After": "1"})
+            self._pending += 1
+        try:
+            future = submit()
+        except BaseException:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)  # a timed-out call still occupies its slot until it ends
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.request_timeout)
+        except asyncio.TimeoutError:
+            self.timeouts.inc()                  # wait_for cancelled the future: dropped if still queued
+            raise HTTPError(504, f"no response within {self.request_timeout:g}s") from None
+
+    def _submit(self, fn, *args):
+        """executor.submit() that records how long the call waited for a free executor thread."""
+        submitted = time.perf_counter()
+
+        def timed():
+            QUEUE_WAIT_SECONDS.observe(time.perf_counter() - submitted, path="server")
+            return fn(*args)
+
+        return self._executor.submit(timed)
+
+    def _check_many(self, texts: list[str]) -> Future[list[str]]:
+        """Future for a list of responses: one scheduler request each, or one batched call."""
+        if self._engine is not None:
+            return self._submit(self._engine.check, texts, self.cache)
+        if self._batcher is None:
+            return self._submit(
+                generate_responses, texts, self.model, self.tokenizer, self.config, self.device,
+                self.max_len, 32, self.cache,
+            )
+        futures = [self._batcher.submit(t) for t in texts]
+        combined: Future[list[str]] = Future()
+        remaining = [len(futures)]
+        lock = threading.Lock()
+
+        def done(_):
+            with lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            if combined.set_running_or_notify_cancel():
+                try:
+                    combined.set_result([f.result() for f in futures])
+                except Exception as e:
+                    combined.set_exception(e)
+
+        def cancelled(_):
+            if combined.cancelled():
+                for f in futures:
+                    f.cancel()
+
+        combined.add_done_callback(cancelled)
+        for f in futures:
+            f.add_done_callback(done)
+        return combined
+
+    # ── Endpoints ────────────────────────────────────────────────────────────
+
+    async def check(self, payload: dict) -> dict:
+        if isinstance(payload.get("texts"), list):
+            texts = payload["texts"]
+            if not all(isinstance(t, str) and t.strip() for t in texts):
+                raise HTTPError(400, '"texts" must be a list of non-empty strings')
+            if len(texts) > self.max_batch:
+                raise HTTPError(413, f"at most {self.max_batch} texts per request")
+            responses = await self._run(lambda: self._check_many(texts)) if texts else []
+            return {"results": [{"text": t, "response": r, "verdict": verdict_of(r)}
+                                for t, r in zip(texts, responses)]}
+        text = self._text(payload)
+        batcher, engine = self._batcher, self._engine
+        if batcher is not None:
+            response = await self._run(lambda: batcher.submit(text))
+        elif engine is not None:
+            response = await self._run(lambda: self._submit(engine.check_one, text, self.cache))
+        else:
+            response = await self._run(lambda: self._submit(
+                generate_response, text, self.model, self.tokenizer, self.config, self.device, self.max_len,
+                self.cache,
+            ))
+        return {"text": text, "response": response, "verdict": verdict_of(response)}
+
+    async def paragraph(self, payload: dict) -> dict:
+        text = self._text(payload)
+        sentences = await self._run(lambda: self._submit(
+            check_paragraph, text, self.model, self.tokenizer, self.config, self.device, 32, self.cache,
+        ))
+        return {"sentences": sentences}
+
+    def health(self) -> dict:
+        return {
+            "status": "ok",
+            "uptime_s": time.time() - self.started,
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+            "continuous": self._batcher is not None,
+            "compiled": self._engine is not None,
+        }
+
+    def metrics_text(self) -> str:
+        """Prometheus text exposition format: server metrics, then the inference METRICS."""
+        self.pending.set(self._pending)
+        return self.metrics.to_prometheus() + METRICS.to_prometheus()
+
+    @staticmethod
+    def _text(payload: dict) -> str:
+        text = payload.get("text")
+        if not isinstance(text, str) or not text.strip():
+            raise HTTPError(400, '"text" must be a non-empty string')
+        return text
+
+    async def dispatch(self, method: str, path: str, body: bytes) -> tuple[int, str, bytes, dict]:
+        """(status, content type, body, extra headers) for one request."""
+        routes = {"/check": ("POST", self.check), "/paragraph": ("POST", self.paragraph),
+                  "/healthz": ("GET", None), "/metrics": ("GET", None)}
+        try:
+            if path not in routes:
+                raise HTTPError(404, f"no such endpoint: {path}")
+            allowed, handler = routes[path]
+            if method != allowed:
+                raise HTTPError(405, f"{path} accepts {allowed}", {"Allow": allowed})
+            if path == "/metrics":
+                return 200, "text/plain; version=0.0.4; charset=utf-8", self.metrics_text().encode(), {}
+            if path == "/healthz":
+                result = self.health()
+            else:
+                try:
+                    payload = json.loads(body or b"{}")
+                except (UnicodeDecodeError, json.JSONDecodeError) as e:
+                    raise HTTPError(400, f"invalid JSON: {e}") from None
+                if not isinstance(payload, dict):
+                    raise HTTPError(400, "request body must be a JSON object")
+                result = await handler(payload)
+            status, headers = 200, {}
+        except HTTPError as e:
+            status, headers, result = e.status, e.headers, {"error": str(e)}
+        except Exception as e:  # model failure: report, keep serving
+            status, headers, result = 500, {}, {"error": f"{type(e).__name__}: {e}"}
+        return status, "application/json", json.dumps(result, ensure_ascii=False).encode(), headers
+
+    # ── HTTP/1.1 over asyncio streams ────────────────────────────────────────
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    line = await asyncio.wait_for(reader.readline(), KEEPALIVE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                if not line.strip():
+                    break
+                try:
+                    method, target, version = line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, 400, "application/json", b'{"error": "malformed request line"}',
+                                        {}, keep_alive=False)
+                    break
+                headers = {}
+                while (header := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = header.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                length = int(headers.get("content-length") or 0)
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, "application/json", b'{"error": "request body too large"}',
+                                        {}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                path = urlsplit(target).path
+                start = time.perf_counter()
+                status, content_type, payload, extra = await self.dispatch(method.upper(), path, body)
+                self.requests.inc(endpoint=path, status=status)
+                self.request_seconds.observe(time.perf_counter() - start, endpoint=path)
+                await self._respond(writer, status, content_type, payload, extra, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status: int, content_type: str, body: bytes, headers: dict, keep_alive: bool):
+        head = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+                f"Content-Type: {content_type}",
+                f"Content-Length: {len(body)}",
+                f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        head += [f"{k}: {v}" for k, v in headers.items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def start(self, host: str | None = None, port: int | None = None) -> tuple[str, int]:
+        """Bind and start accepting connections; returns the bound (host, port) (port 0 = any free)."""
+        host = host or self.config.server.host
+        port = self.config.server.port if port is None else port
+        self._server = await asyncio.start_server(self._handle, host, port, backlog=1024)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            raise RuntimeError("InferenceServer.start() has not been called")
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._batcher is not None:
+            self._batcher.close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class BackgroundServer:
+    """Run an InferenceServer on its own event loop thread (tests, notebooks); `.url` once entered."""
+
+    def __init__(self, server: InferenceServer, host: str = "127.0.0.1", port: int = 0):
+        self.server = server
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        bound_host, bound_port = asyncio.run_coroutine_threadsafe(server.start(host, port), self._loop).result()
+        self.url = f"http://{bound_host}:{bound_port}"
+
+    def close(self) -> None:
+        asyncio.run_coroutine_threadsafe(self.server.close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+async def _serve(server: InferenceServer, host: str, port: int) -> None:
+    bound_host, bound_port = await server.start(host, port)
+    print(f"🌐 Serving on http://{bound_host}:{bound_port}  (/check /paragraph /healthz /metrics)")
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP/JSON grammar-check server")
+    parser.add_argument("--model", type=str, default="model_final", help="Path to model directory")
+    parser.add_argument("--host", type=str, default=None, help="Default: server.host")
+    parser.add_argument("--port", type=int, default=None, help="Default: server.port")
+    parser.add_argument("--workers", type=int, default=None, help="Executor threads (default: server.max_workers)")
+    parser.add_argument("--max-pending", type=int, default=None, help="Default: server.max_pending")
+    parser.add_argument("--timeout", type=float, default=None, help="Seconds per request (default: server.request_timeout)")
+    parser.add_argument("--continuous", action="store_true", help="Serve /check through the continuous batcher")
+    parser.add_argument("--compiled", action="store_true",
+                        help="Serve /check through the static-shape compiled engine (src/compiled.py)")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the result cache")
+    args = parser.parse_args()
+
+    config = load_config()
+    model_path = Path(args.model)
+    if not model_path.is_absolute():
+        model_path = get_project_root() / model_path
+    if not model_path.exists():
+        print(f"❌ Model not found at {model_path}")
+        return
+
+    print(f"📥 Loading model from {model_path}...")
+    model, tokenizer, device = load_model(model_path, config)
+    cache = None if args.no_cache else create_cache(config, model_path)
+    if (args.compiled or config.server.compiled) and not (args.continuous or config.server.continuous):
+        print(f"🔧 Compiling {config.compiled.batch_buckets} × {config.compiled.src_buckets} shape buckets...")
+    server = InferenceServer(
+        model, tokenizer, config, device, cache=cache, max_workers=args.workers, max_pending=args.max_pending,
+        request_timeout=args.timeout, continuous=args.continuous or None, compiled=args.compiled or None,
+    )
+    try:
+        asyncio.run(_serve(server, args.host or config.server.host,
+                           config.server.port if args.port is None else args.port))
+    except KeyboardInterrupt:
+        print("\n👋 Stopped")
+
+
+if __name__ == "__main__":
+    main()
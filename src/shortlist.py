@@ -0,0 +1,171 @@
+"""
+shortlist.py — Output-vocabulary shortlist for the LM head during greedy decoding.
+
+Every decoder step normally computes logits = h · Eᵀ over the full tied
+embedding E ∈ ℝ^{V×d} (V = 8000). Outputs only ever contain:
+  - the verdict scaffold  (❌ Incorrect. / ✅ Correct: / 📝 Пояснення:)
+  - German tokens from the input (or the correction vocabulary seen in training)
+  - the fixed Ukrainian explanation vocabulary
+
+So the output vocabulary S is mined once from the training targets and saved
+next to the model (output_vocab.json). At decode time the projection becomes
+  logits_S = h · E[S]ᵀ + b[S]        E[S] ∈ ℝ^{|S ∪ input| × d}
+
+Parity check: the decoder hidden states h₁…h_n of every step are kept, and
+after decoding one batched full-vocab GEMM [n × d]·[d × V] verifies that the
+shortlisted argmax equals the full argmax at every position. On any
+disagreement the request falls back to the standard model.generate().
+That GEMM costs as much as the full LM head it replaces, so only a sampled
+fraction of calls (verify_rate) is checked; `verified` / `fallbacks` give the
+observed disagreement rate.
+
+Usage:
+    python -m src.shortlist                      # build model_final/output_vocab.json
+    python -m src.shortlist --model model_pruned
+"""
+
+import argparse
+import json
+import random
+from pathlib import Path
+
+import torch
+from transformers import BartForConditionalGeneration
+from transformers.cache_utils import DynamicCache, EncoderDecoderCache
+
+from src.config import Config, load_config, get_project_root
+from src.inference import generate_response
+from src.tokenizer.tokenizer import Tokenizer
+
+OUTPUT_VOCAB_FILE = "output_vocab.json"
+
+
+def build_output_vocab(data_paths: list[str | Path], tokenizer: Tokenizer) -> list[int]:
+    """Collect every token ID that appears in an `output` of the given JSONL files."""
+    ids = {tokenizer.eos_id}
+    for path in data_paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                item = json.loads(line)
+                ids.update(tokenizer.encode(item["output"], add_bos=False, add_eos=False))
+    return sorted(ids)
+
+
+def save_output_vocab(ids: list[int], model_dir: str | Path) -> Path:
+    path = Path(model_dir) / OUTPUT_VOCAB_FILE
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(ids, f)
+    return path
+
+
+def load_output_vocab(model_dir: str | Path) -> list[int] | None:
+    """Return the saved output vocabulary, or None if the model has none."""
+    path = Path(model_dir) / OUTPUT_VOCAB_FILE
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class ShortlistDecoder:
+    """
+    Greedy KV-cached decoding with a restricted LM-head projection.
+
+    Produces the same text as generate_response() whenever the full argmax lies
+    in the shortlist. A `verify_rate` fraction of calls is checked against the
+    full vocabulary (1.0 = every call, exact); `verified` counts the checked
+    calls and `fallbacks` those where the parity check failed.
+    """
+
+    def __init__(
+        self,
+        model: BartForConditionalGeneration,
+        tokenizer: Tokenizer,
+        output_vocab: list[int],
+        verify_rate: float = 1.0,
+        seed: int = 0,
+    ):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.verify_rate = verify_rate
+        self.output_vocab = torch.tensor(output_vocab, dtype=torch.long)
+        self.calls = 0
+        self.verified = 0
+        self.fallbacks = 0
+        self._sampler = random.Random(seed)   # own stream: sampling never touches the global RNG
+
+    def _shortlist(self, src_ids: list[int], device) -> torch.Tensor:
+        ids = torch.cat([self.output_vocab, torch.tensor(src_ids, dtype=torch.long)])
+        return torch.unique(ids).to(device)   # sorted, deduplicated
+
+    @torch.no_grad()
+    def generate(self, text: str, config: Config, device: str, max_len: int = 64) -> str:
+        model = self.model
+        tok = self.tokenizer
+        model.eval()
+        self.calls += 1
+
+        src_ids = tok.encode(text, add_bos=True, add_eos=True, max_len=max_len)
+        input_ids = torch.tensor([src_ids], dtype=torch.long, device=device)
+        attention_mask = (input_ids != tok.pad_id).long()
+
+        S = self._shortlist(src_ids, device)                         # [|S|]
+        W_S = model.lm_head.weight[S]                                 # [|S|, d]
+        b_S = model.final_logits_bias[0, S]                           # [|S|]
+
+        # ── Encoder: once ──
+        memory = model.model.encoder(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+        cache = EncoderDecoderCache(DynamicCache(config=model.config), DynamicCache(config=model.config))
+
+        # ── Decoder: greedy over the shortlist ──
+        next_id = model.config.decoder_start_token_id
+        generated: list[int] = []
+        hidden: list[torch.Tensor] = []
+        for _ in range(max_len - 1):
+            out = model.model.decoder(
+                input_ids=torch.tensor([[next_id]], device=device),
+                encoder_hidden_states=memory,
+                encoder_attention_mask=attention_mask,
+                past_key_values=cache,
+                use_cache=True,
+            )
+            h = out.last_hidden_state[:, -1]                          # [1, d]
+            hidden.append(h)
+            next_id = int(S[(h @ W_S.T + b_S).argmax(dim=-1)])
+            generated.append(next_id)
+            if next_id == tok.eos_id:
+                break
+
+        # ── Parity check (sampled): one full-vocab GEMM over all steps ──
+        if self.verify_rate >= 1.0 or self._sampler.random() < self.verify_rate:
+            self.verified += 1
+            full_logits = model.lm_head(torch.cat(hidden)) + model.final_logits_bias   # [n, V]
+            if full_logits.argmax(dim=-1).tolist() != generated:
+                self.fallbacks += 1
+                return generate_response(text, model, tok, config, device, max_len)
+
+        return tok.decode(generated, skip_special=True).strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the decoder output-vocabulary shortlist")
+    parser.add_argument("--model", type=str, default="model_final", help="Model directory to write into")
+    args = parser.parse_args()
+
+    config = load_config()
+    project_root = get_project_root()
+    tokenizer = Tokenizer(project_root / "src/tokenizer/tokenizer.json")
+
+    model_dir = project_root / args.model
+    if not model_dir.exists():
+        print(f"❌ Model not found at {model_dir}. Please run training first.")
+        return
+
+    ids = build_output_vocab([config.data.train_path, config.data.val_path], tokenizer)
+    path = save_output_vocab(ids, model_dir)
+    print(f"✅ Output vocabulary: {len(ids)}/{tokenizer.vocab_size} tokens "
+          f"({len(ids) / tokenizer.vocab_size * 100:.1f}%) → {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 """
-tokenizer.py — Thin compatibility shim around PreTrainedTokenizerFast.
+tokenizer.py — Thin compatibility shim around the `tokenizers` (Rust) BPE tokenizer.
 
 WHY THIS FILE EXISTS
 ─────────────────────
@@ -10,9 +10,12 @@ train.py, inference.py and generate.py call:
     tokenizer.pad_id / .bos_id / .eos_id
     tokenizer.token_to_id  (dict-like)
 
-PreTrainedTokenizerFast uses a slightly different API.
-This shim adapts the HF tokenizer to the old API so we don't have to touch
-every call site.  All the real work is delegated to PreTrainedTokenizerFast.
+The HF tokenizer API is slightly different.
+This shim adapts it to the old API so we don't have to touch every call site.
+All the real work is delegated to tokenizers.Tokenizer loaded straight from
+tokenizer.json — the same object PreTrainedTokenizerFast wraps, so ids,
+offsets and decoded text are identical, but importing it does not pull in
+`transformers` (≈3 s of CLI startup).
 
 USAGE
 ─────
@@ -24,7 +27,7 @@ USAGE
 """
 
 from pathlib import Path
-from transformers import PreTrainedTokenizerFast
+from tokenizers import Tokenizer as RustTokenizer
 
 # Special token strings (must match what train_tokenizer.py registered)
 PAD_TOKEN = "<PAD>"
@@ -34,10 +37,10 @@ UNK_TOKEN = "<UNK>"
 
 
 class Tokenizer:
-    """Compatibility wrapper around PreTrainedTokenizerFast.
+    """Compatibility wrapper around tokenizers.Tokenizer.
 
     Exposes the same API that train.py / inference.py / generate.py expect,
-    while storing a standard HF tokenizer under self._tok.
+    while storing the Rust tokenizer under self._tok.
     """
 
     def __init__(self, tokenizer_path: str | Path | None = None):
@@ -51,19 +54,13 @@ class Tokenizer:
                 f"Run first: python src/tokenizer/train_tokenizer.py"
             )
 
-        self._tok = PreTrainedTokenizerFast(
-            tokenizer_file=str(tokenizer_path),
-            bos_token=BOS_TOKEN,
-            eos_token=EOS_TOKEN,
-            pad_token=PAD_TOKEN,
-            unk_token=UNK_TOKEN,
-        )
+        self._tok = RustTokenizer.from_file(str(tokenizer_path))
 
         # Resolve special IDs once
-        self.pad_id: int = self._tok.convert_tokens_to_ids(PAD_TOKEN)
-        self.bos_id: int = self._tok.convert_tokens_to_ids(BOS_TOKEN)
-        self.eos_id: int = self._tok.convert_tokens_to_ids(EOS_TOKEN)
-        self.unk_id: int = self._tok.convert_tokens_to_ids(UNK_TOKEN)
+        self.pad_id: int = self._tok.token_to_id(PAD_TOKEN)
+        self.bos_id: int = self._tok.token_to_id(BOS_TOKEN)
+        self.eos_id: int = self._tok.token_to_id(EOS_TOKEN)
+        self.unk_id: int = self._tok.token_to_id(UNK_TOKEN)
 
         self._special_ids = {self.pad_id, self.bos_id, self.eos_id}
 
@@ -74,7 +71,7 @@ class Tokenizer:
 
     @property
     def vocab_size(self) -> int:
-        return self._tok.vocab_size
+        return self._tok.get_vocab_size(with_added_tokens=False)
 
     def encode(
         self,
@@ -84,7 +81,7 @@ class Tokenizer:
         max_len: int | None = None,
     ) -> list[int]:
         """Text → list of token IDs."""
-        ids: list[int] = self._tok.encode(text, add_special_tokens=False)
+        ids: list[int] = self._tok.encode(text, add_special_tokens=False).ids
 
         if add_bos:
             ids = [self.bos_id] + ids
@@ -98,11 +95,41 @@ class Tokenizer:
 
         return ids
 
+    def encode_words(
+        self, text: str, max_len: int | None = None
+    ) -> tuple[list[int], list[int], list[str]]:
+        """Text → (<BOS> + ids + <EOS>, index of each word's first token, words).
+
+        Words are the ByteLevel pre-tokenizer pieces ("Fußball", ".", ...),
+        so every token belongs to exactly one word. Words that do not fit
+        into max_len (with BOS/EOS) are dropped from the end.
+        """
+        enc = self._tok.encode(text, add_special_tokens=False)
+        ids: list[int] = enc.ids
+        word_ids = enc.word_ids
+        offsets = enc.offsets
+        limit = len(ids) if max_len is None else min(len(ids), max_len - 2)
+        # Never cut a word in half
+        while 0 < limit < len(ids) and word_ids[limit] == word_ids[limit - 1]:
+            limit -= 1
+
+        first_pos: list[int] = []
+        spans: list[list[int]] = []
+        for i in range(limit):
+            if i == 0 or word_ids[i] != word_ids[i - 1]:
+                first_pos.append(i + 1)   # +1 for <BOS>
+                spans.append([offsets[i][0], offsets[i][1]])
+            else:
+                spans[-1][1] = offsets[i][1]
+        words = [text[start:end].strip() for start, end in spans]
+
+        return [self.bos_id] + ids[:limit] + [self.eos_id], first_pos, words
+
     def decode(self, ids: list[int], skip_special: bool = True) -> str:
         """List of token IDs → text."""
         if skip_special:
             ids = [i for i in ids if i not in self._special_ids]
-        return self._tok.decode(ids)
+        return self._tok.decode(ids, skip_special_tokens=False)
 
     def pad_sequence(
         self, ids: list[int], max_len: int, pad_id: int | None = None
@@ -9,10 +9,13 @@ Data flow per batch:
   2. tgt_ids  → Decoder (with decoder_attention_mask + causal mask auto-applied)
   3. labels   → CrossEntropyLoss(ignore_index=pad_id)
   4. Logits shape: [B, T, V] where V = vocab_size
+  5. (optional) memory → VerdictHead → BCE(✅ Correct. vs ❌), weighted by
+     training.verdict_loss_weight; saved as model_final/verdict_head.safetensors
 """
 
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
 from torch.utils.data import Dataset, DataLoader
 import json
 import argparse
@@ -21,9 +24,11 @@ from tqdm import tqdm
 
 from transformers import BartForConditionalGeneration
 
-from src.model.model import create_model
+from src.model.model import create_model, d_model_of
+from src.metrics import CORRECT_VERDICT
+from src.model.verdict_head import VerdictHead, load_verdict_head, save_verdict_head, verdict_targets
 from src.tokenizer.tokenizer import Tokenizer
-from src.config import load_config, get_device, get_project_root
+from src.config import apply_runtime, load_config, get_device, get_project_root
 
 
 class Seq2SeqDataset(Dataset):
@@ -94,6 +99,7 @@ def train():
 
     # ── 1. Load Config ──
     config = load_config()
+    apply_runtime(config.runtime, training=True)  # training_num_threads from tune_profile.json
 
     # ── 2. Set Device ──
     device = get_device(config.training.device)
@@ -108,17 +114,28 @@ def train():
 
     if args.continue_train and save_dir.exists():
         # Resume from HF-format checkpoint
-        model = BartForConditionalGeneration.from_pretrained(str(save_dir))
-        model = model.to(device)
+        model = BartForConditionalGeneration.from_pretrained(str(save_dir), attn_implementation=config.model.attn_implementation)
+        model = model.to(device)  # pyright: ignore[reportArgumentType]
         print(f"🔄 Resuming training from {save_dir}")
     else:
         # Create fresh model from config
         # create_model() syncs vocab_size and special token IDs from tokenizer
         model = create_model(config, tokenizer)
-        model = model.to(device)
+        model = model.to(device)  # pyright: ignore[reportArgumentType]
         if args.continue_train:
             print(f"⚠️  {save_dir} not found. Starting from scratch.")
 
+    # Auxiliary verdict classifier on the pooled encoder output
+    verdict_w = config.training.verdict_loss_weight
+    verdict_head = None
+    correct_prefix = tokenizer.encode(CORRECT_VERDICT, add_bos=False, add_eos=False)
+    if verdict_w > 0:
+        if args.continue_train:
+            verdict_head = load_verdict_head(save_dir, d_model_of(model.config))
+        if verdict_head is None:
+            verdict_head = VerdictHead(d_model_of(model.config))
+        verdict_head = verdict_head.to(device)
+
     # ── 5. Prepare Data ──
     train_ds = Seq2SeqDataset(config.data.train_path, tokenizer, config.model.max_seq_len, tokenizer.pad_id)
     validation_ds = Seq2SeqDataset(config.data.val_path, tokenizer, config.model.max_seq_len, tokenizer.pad_id)
@@ -127,7 +144,10 @@ def train():
     validation_loader = DataLoader(validation_ds, batch_size=config.training.batch_size)
 
     # ── 6. Optimizer & Loss ──
-    optimizer = torch.optim.AdamW(model.parameters(), lr=float(config.training.learning_rate))
+    params = list(model.parameters())
+    if verdict_head is not None:
+        params += list(verdict_head.parameters())
+    optimizer = torch.optim.AdamW(params, lr=float(config.training.learning_rate))
 
     # Decision tokens weighting for classification part (✅/❌)
     decision_w = config.training.decision_token_weight
@@ -154,6 +174,8 @@ def train():
 
     for epoch in range(epochs):
         model.train()
+        if verdict_head is not None:
+            verdict_head.train()
         total_loss = 0
         pbar = tqdm(train_loader, desc=f"Epoch {epoch+1}/{epochs}")
 
@@ -192,6 +214,14 @@ def train():
                 # HF-computed CrossEntropyLoss (ignore_index=pad automatically)
                 loss = outputs.loss
 
+            if verdict_head is not None:
+                # memory ∈ ℝ^{B×T×d} → P(✅ Correct.) — trained jointly with the seq2seq loss
+                verdict_logits = verdict_head(outputs.encoder_last_hidden_state, attn_mask)
+                verdict_loss = F.binary_cross_entropy_with_logits(
+                    verdict_logits, verdict_targets(labels, correct_prefix)
+                )
+                loss = loss + verdict_w * verdict_loss
+
             optimizer.zero_grad()
             loss.backward()
             optimizer.step()
@@ -203,7 +233,11 @@ def train():
 
         # ── Validation ──
         model.eval()
+        if verdict_head is not None:
+            verdict_head.eval()
         val_loss = 0
+        verdict_hits = 0
+        verdict_total = 0
         with torch.no_grad():
             for src_ids, attn_mask, tgt_ids, dec_attn_mask, labels in validation_loader:
                 src_ids = src_ids.to(device)
@@ -221,8 +255,16 @@ def train():
                 )
                 val_loss += outputs.loss.item()
 
+                if verdict_head is not None:
+                    verdict_logits = verdict_head(outputs.encoder_last_hidden_state, attn_mask)
+                    targets = verdict_targets(labels, correct_prefix)
+                    verdict_hits += ((verdict_logits > 0).float() == targets).sum().item()
+                    verdict_total += targets.numel()
+
         avg_val_loss = val_loss / len(validation_loader)
         print(f"✨ Epoch {epoch+1} finished. Train Loss: {avg_loss:.4f}, Val Loss: {avg_val_loss:.4f}")
+        if verdict_total:
+            print(f"   Verdict head val accuracy: {verdict_hits / verdict_total * 100:.2f}%")
 
         # ── Early Stopping ──
         if avg_val_loss < best_val_loss:
@@ -230,6 +272,8 @@ def train():
             best_epoch = epoch + 1
             # Save best model in HF format — directly loadable by from_pretrained()
             model.save_pretrained(str(save_dir))
+            if verdict_head is not None:
+                save_verdict_head(verdict_head, save_dir)
             epochs_without_improvement = 0
         else:
             epochs_without_improvement += 1
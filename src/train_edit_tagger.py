@@ -0,0 +1,186 @@
+"""
+train_edit_tagger.py — Train the non-autoregressive edit tagger (src/model/edit_tagger.py).
+
+The BART encoder of the trained model is frozen; only the tagger is trained on
+(input, ✅ Correct: …) pairs from the synthetic JSONL data. Correct examples
+("✅ Correct.") teach the all-$KEEP, in-order tagging.
+
+Per batch:
+  1. src_ids → frozen Encoder → memory ∈ ℝ^{B×T×d}
+  2. memory[word first tokens] → EditTagger → edit / append / slot logits
+  3. loss = CE(edit) + CE(append) + CE(slot)   (slot ignored for deleted words)
+
+Usage:
+    python -m src.train_edit_tagger
+    python -m src.train_edit_tagger --model model_final --epochs 5
+"""
+
+import argparse
+import json
+from collections import Counter
+
+import torch
+import torch.nn.functional as F
+from torch.utils.data import Dataset, DataLoader
+from tqdm import tqdm
+from transformers import BartForConditionalGeneration
+
+from src.config import load_config, get_device, get_project_root
+from src.model.edit_tagger import (
+    DELETE, KEEP, NO_APPEND, REPLACE, EditTagger, align_edits, extract_correction, save_edit_tagger,
+)
+from src.model.model import d_model_of
+from src.tokenizer.tokenizer import Tokenizer
+
+
+def load_pairs(data_path, tokenizer: Tokenizer, max_len: int) -> list[dict]:
+    """Tokenize and align every (input, corrected) pair of a JSONL file."""
+    pairs = []
+    with open(data_path, "r", encoding="utf-8") as f:
+        for line in f:
+            item = json.loads(line)
+            target = extract_correction(item["output"]) or item["input"]
+            src_ids, word_pos, src_words = tokenizer.encode_words(item["input"], max_len=max_len)
+            _, _, tgt_words = tokenizer.encode_words(target)
+            tags = align_edits(src_words, tgt_words)
+            if tags is None or not src_words:
+                continue
+            edits, appends, slots = tags
+            pairs.append({"src_ids": src_ids, "word_pos": word_pos, "edits": edits,
+                          "appends": appends, "slots": slots})
+    return pairs
+
+
+class EditTagDataset(Dataset):
+    """
+    Each example produces:
+      - src_ids, attention_mask: [T]       → frozen Encoder
+      - word_pos, word_mask:     [W]       → first-token index of each word
+      - edit, append, slot:      [W]       → targets (-100 = ignore)
+    """
+    def __init__(self, pairs, edit_labels, append_labels, max_len, pad_id):
+        self.pairs = pairs
+        self.edit_index = {label: i for i, label in enumerate(edit_labels)}
+        self.append_index = {label: i for i, label in enumerate(append_labels)}
+        self.max_len = max_len
+        self.pad_id = pad_id
+
+    def __len__(self):
+        return len(self.pairs)
+
+    def __getitem__(self, idx):
+        p = self.pairs[idx]
+        T = self.max_len
+        n = len(p["word_pos"])
+        W = T  # at most one word per token
+
+        src_ids = p["src_ids"] + [self.pad_id] * (T - len(p["src_ids"]))
+        attention_mask = [1] * len(p["src_ids"]) + [0] * (T - len(p["src_ids"]))
+        word_pos = p["word_pos"] + [0] * (W - n)
+        word_mask = [1] * n + [0] * (W - n)
+
+        edit = [self.edit_index.get(e, -100) for e in p["edits"]] + [-100] * (W - n)
+        append = [self.append_index.get(a, -100) for a in p["appends"]] + [-100] * (W - n)
+        slot = [s if e != DELETE and s < W else -100 for s, e in zip(p["slots"], p["edits"])] + [-100] * (W - n)
+
+        return tuple(torch.tensor(x, dtype=torch.long) for x in
+                     (src_ids, attention_mask, word_pos, word_mask, edit, append, slot))
+
+
+def train_edit_tagger():
+    # ── 0. Parse CLI Arguments ──
+    parser = argparse.ArgumentParser(description="Train the non-autoregressive edit tagger")
+    parser.add_argument("--model", type=str, default="model_final", help="Trained model directory (encoder is frozen)")
+    parser.add_argument("--epochs", type=int, default=5)
+    args = parser.parse_args()
+
+    # ── 1. Config, Device, Tokenizer, Frozen Encoder ──
+    config = load_config()
+    device = get_device(config.training.device)
+    project_root = get_project_root()
+    tokenizer = Tokenizer(project_root / "src/tokenizer/tokenizer.json")
+    max_len = config.model.max_seq_len
+
+    model_dir = project_root / args.model
+    if not model_dir.exists():
+        print(f"❌ Model not found at {model_dir}. Please run training first.")
+        return
+    model = BartForConditionalGeneration.from_pretrained(
+        str(model_dir), attn_implementation=config.model.attn_implementation).to(device)  # pyright: ignore[reportArgumentType]
+    model.eval()
+    encoder = model.get_encoder()
+    for p in encoder.parameters():
+        p.requires_grad_(False)
+    print(f"🏷️  Training edit tagger on device: {device} (encoder from {model_dir} frozen)")
+
+    # ── 2. Data + Label Vocabularies (from training pairs) ──
+    train_pairs = load_pairs(config.data.train_path, tokenizer, max_len)
+    val_pairs = load_pairs(config.data.val_path, tokenizer, max_len)
+    replace_counts = Counter(e for p in train_pairs for e in p["edits"] if e.startswith(REPLACE))
+    append_counts = Counter(a for p in train_pairs for a in p["appends"] if a != NO_APPEND)
+    edit_labels = [KEEP, DELETE] + sorted(replace_counts)
+    append_labels = [NO_APPEND] + sorted(append_counts)
+    print(f"   {len(train_pairs)} train / {len(val_pairs)} val pairs | "
+          f"{len(edit_labels)} edit labels, {len(append_labels)} append labels")
+
+    train_loader = DataLoader(EditTagDataset(train_pairs, edit_labels, append_labels, max_len, tokenizer.pad_id),
+                              batch_size=config.training.batch_size, shuffle=True)
+    val_loader = DataLoader(EditTagDataset(val_pairs, edit_labels, append_labels, max_len, tokenizer.pad_id),
+                            batch_size=config.training.batch_size)
+
+    tagger = EditTagger(d_model_of(model.config), edit_labels, append_labels, max_words=max_len).to(device)
+    optimizer = torch.optim.AdamW(tagger.parameters(), lr=float(config.training.learning_rate))
+
+    def batch_loss(batch):
+        src_ids, attn_mask, word_pos, word_mask, edit, append, slot = (x.to(device) for x in batch)
+        with torch.no_grad():
+            memory = encoder(input_ids=src_ids, attention_mask=attn_mask).last_hidden_state
+        edit_logits, append_logits, slot_logits = tagger(memory, word_pos, word_mask)
+        loss = (
+            F.cross_entropy(edit_logits.flatten(0, 1), edit.flatten(), ignore_index=-100)
+            + F.cross_entropy(append_logits.flatten(0, 1), append.flatten(), ignore_index=-100)
+            + F.cross_entropy(slot_logits.flatten(0, 1), slot.flatten(), ignore_index=-100)
+        )
+        # Sentence-level exact match: every real word fully right
+        ok = (
+            ((edit_logits.argmax(-1) == edit) | (edit == -100))
+            & ((append_logits.argmax(-1) == append) | (append == -100))
+            & ((slot_logits.argmax(-1) == slot) | (slot == -100))
+        ).all(dim=1)
+        return loss, ok
+
+    # ── 3. Training Loop ──
+    best_val_loss = float("inf")
+    for epoch in range(args.epochs):
+        tagger.train()
+        total_loss = 0
+        pbar = tqdm(train_loader, desc=f"Epoch {epoch+1}/{args.epochs}")
+        for batch in pbar:
+            loss, _ = batch_loss(batch)
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            total_loss += loss.item()
+            pbar.set_postfix({"loss": f"{loss.item():.4f}"})
+
+        tagger.eval()
+        val_loss = 0
+        exact = 0
+        with torch.no_grad():
+            for batch in val_loader:
+                loss, ok = batch_loss(batch)
+                val_loss += loss.item()
+                exact += ok.sum().item()
+        avg_val_loss = val_loss / max(len(val_loader), 1)
+        print(f"✨ Epoch {epoch+1} finished. Train Loss: {total_loss / len(train_loader):.4f}, "
+              f"Val Loss: {avg_val_loss:.4f}, Val exact tags: {exact / max(len(val_pairs), 1) * 100:.1f}%")
+
+        if avg_val_loss < best_val_loss:
+            best_val_loss = avg_val_loss
+            save_edit_tagger(tagger, model_dir)
+
+    print(f"📦 Edit tagger saved to {model_dir}/ (edit_tagger.safetensors, edit_tagger.json)")
+
+
+if __name__ == "__main__":
+    train_edit_tagger()
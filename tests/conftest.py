@@ -0,0 +1,33 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+@pytest.fixture(scope="session")
+def config():
+    from src.config import load_config
+
+    return load_config()
+
+
+@pytest.fixture(scope="session")
+def tokenizer():
+    from src.tokenizer.tokenizer import Tokenizer
+
+    return Tokenizer()
+
+
+@pytest.fixture(scope="session")
+def model(config, tokenizer):
+    # Random weights are enough for parity checks between decoding paths
+    import torch
+
+    from src.model.model import create_model
+
+    torch.manual_seed(0)
+    model = create_model(config, tokenizer)
+    model.eval()
+    return model
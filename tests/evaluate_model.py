@@ -1,6 +1,10 @@
 """
 Evaluation script for A2 Deutsch Grammar Tutor v2.1 (HF BART).
 Evaluates Detection & Correction accuracy with beautiful formatting and high speed.
+
+With --cache PATH, responses are stored in a persistent SQLite result cache
+(src/cache.py) keyed by the model's weight hash, so re-evaluating an unchanged
+model only decodes sentences it has never seen (and skips loading it when all hit).
 """
 
 import json
@@ -16,8 +20,10 @@ from transformers import BartForConditionalGeneration
 project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 
+from src.cache import create_cache, normalize_text
 from src.config import load_config, get_device
 from src.tokenizer.tokenizer import Tokenizer
+from src.evaluation import score_response
 
 class TestDataset(Dataset):
     def __init__(self, data, tokenizer, max_len):
@@ -34,22 +40,7 @@ class TestDataset(Dataset):
         src_ids = self.tokenizer.pad_sequence(src_ids, max_len=self.max_len)
         return torch.tensor(src_ids, dtype=torch.long), idx
 
-def normalize(text):
-    if text is None: return ""
-    return text.strip().rstrip(".").lower().strip()
-
-def parse_output(response):
-    detected_correct = "✅ Correct." in response and "❌" not in response
-    detected_incorrect = "❌ Incorrect" in response
-    correction = None
-    if "✅ Correct:" in response:
-        for line in response.split("\n"):
-            if "✅ Correct:" in line:
-                correction = line.split("✅ Correct:")[1].strip()
-                break
-    return detected_correct, detected_incorrect, correction
-
-def evaluate(model_path="model_final", batch_size=64, verbose=False):
+def evaluate(model_path="model_final", batch_size=64, verbose=False, cache_path=None):
     config = load_config()
     device = get_device("auto")
     tokenizer = Tokenizer(project_root / "src/tokenizer/tokenizer.json")
@@ -59,67 +50,88 @@ def evaluate(model_path="model_final", batch_size=64, verbose=False):
         print(f"❌ Model missing at {model_dir}")
         return
 
-    model = BartForConditionalGeneration.from_pretrained(str(model_dir))
-    model = model.to(device)
-    model.eval()
-
     with open(project_root / "tests/test_data.json", 'r', encoding='utf-8') as f:
         test_data = json.load(f)
 
-    dataset = TestDataset(test_data, tokenizer, config.model.max_seq_len)
-    loader = DataLoader(dataset, batch_size=batch_size, shuffle=False)
+    cache = None
+    if cache_path:
+        config.inference.cache_path = cache_path
+        cache = create_cache(config, model_dir)
 
     print(f"\n{'='*80}")
     print(f"🧪 A2 Deutsch Grammar Tutor (HF BART) — Batch Evaluation (BS={batch_size})")
     print(f"{'='*80}")
     
     results = [None] * len(test_data)
-    
-    with torch.no_grad():
-        for batch_src, indices in loader:
-            batch_src = batch_src.to(device)
-            attention_mask = (batch_src != tokenizer.pad_id).long()
-            
-            # Batch generate
-            generated_ids = model.generate(
-                input_ids=batch_src,
-                attention_mask=attention_mask,
-                max_length=config.model.max_seq_len,
-                num_beams=1,
-                do_sample=False
-            )
-            
-            for i, idx in enumerate(indices):
-                response = tokenizer.decode(generated_ids[i].tolist(), skip_special=True)
-                test_item = test_data[idx]
+    shown = 0
+
+    def record(idx, response):
+        nonlocal shown
+        test_item = test_data[idx]
+
+        det_ok, corr_ok, corr = score_response(test_item, response)
+        expected = test_item["expected_type"]
+
+        results[idx] = {
+            **test_item,
+            "det_ok": det_ok,
+            "corr_ok": corr_ok,
+            "output": response,
+            "model_corr": corr
+        }
+
+        # Instant feedback (Compact style)
+        mark = "✅" if det_ok else "❌"
+        c_mark = "✓" if corr_ok else "f" if expected == "incorrect" else " "
+        sys.stdout.write(f"{mark}{c_mark} ")
+        sys.stdout.flush()
+        shown += 1
+        if shown % 10 == 0: print()
+
+    pending = []
+    for idx, item in enumerate(test_data):
+        cached = cache.get(item['input']) if cache is not None else None
+        if cached is not None:
+            record(idx, cached)
+        else:
+            pending.append(idx)
+
+    if pending:
+        model = BartForConditionalGeneration.from_pretrained(str(model_dir))
+        model = model.to(device)
+        model.eval()
+
+        # With a cache the model sees the same normalized text the cache is keyed on
+        pending_data = [
+            {**test_data[idx], 'input': normalize_text(test_data[idx]['input'])} if cache is not None else test_data[idx]
+            for idx in pending
+        ]
+        dataset = TestDataset(pending_data, tokenizer, config.model.max_seq_len)
+        loader = DataLoader(dataset, batch_size=batch_size, shuffle=False)
+
+        with torch.no_grad():
+            for batch_src, positions in loader:
+                batch_src = batch_src.to(device)
+                attention_mask = (batch_src != tokenizer.pad_id).long()
                 
-                det_c, det_inc, corr = parse_output(response)
+                # Batch generate
+                generated_ids = model.generate(
+                    input_ids=batch_src,
+                    attention_mask=attention_mask,
+                    max_length=config.model.max_seq_len,
+                    num_beams=1,
+                    do_sample=False
+                )
                 
-                # Logic
-                expected = test_item["expected_type"]
-                det_ok = (expected == "correct" and det_c) or (expected == "incorrect" and det_inc)
-                
-                corr_ok = False
-                if expected == "incorrect" and test_item.get("expected_correction") and corr:
-                    if normalize(corr) == normalize(test_item["expected_correction"]):
-                        corr_ok = True
-                elif expected == "correct" and det_ok:
-                    corr_ok = True
-
-                results[idx] = {
-                    **test_item,
-                    "det_ok": det_ok,
-                    "corr_ok": corr_ok,
-                    "output": response,
-                    "model_corr": corr
-                }
-                
-                # Instant feedback (Compact style)
-                mark = "✅" if det_ok else "❌"
-                c_mark = "✓" if corr_ok else "f" if expected == "incorrect" else " "
-                sys.stdout.write(f"{mark}{c_mark} ")
-                sys.stdout.flush()
-                if (idx + 1) % 10 == 0: print()
+                for i, pos in enumerate(positions.tolist()):
+                    response = tokenizer.decode(generated_ids[i].tolist(), skip_special=True).strip()
+                    if cache is not None:
+                        cache.put(pending_data[pos]['input'], response)
+                    record(pending[pos], response)
+
+    if cache is not None:
+        stats = cache.stats()
+        print(f"\n⚡ Cache: {stats['hits']} hits / {stats['misses']} misses ({stats['hit_rate']*100:.1f}%) — {cache_path}")
 
     # --- Summary ---
     print(f"\n\n{'='*80}")
@@ -174,5 +186,6 @@ if __name__ == "__main__":
     parser.add_argument("--batch_size", type=int, default=64)
     parser.add_argument("--model", type=str, default="model_final")
     parser.add_argument("--verbose", action="store_true", help="Show detailed failure summary")
+    parser.add_argument("--cache", type=str, default=None, help="Persistent SQLite result cache (e.g. cache/results.sqlite)")
     args = parser.parse_args()
-    evaluate(model_path=args.model, batch_size=args.batch_size, verbose=args.verbose)
+    evaluate(model_path=args.model, batch_size=args.batch_size, verbose=args.verbose, cache_path=args.cache)
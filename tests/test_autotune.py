@@ -0,0 +1,45 @@
+import json
+import shutil
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.autotune import choose_runtime
+from src.config import TUNE_PROFILE_FILE, load_config, machine_fingerprint
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+def _row(threads, bs, ms, pin=False):
+    return {"pin": pin, "threads": threads, "batch_size": bs, "ms_per_sentence": ms, "sentences_per_s": 1000 / ms}
+
+
+def test_choose_runtime_prefers_fewest_threads_within_tolerance():
+    inference = [
+        _row(1, 1, 10.0), _row(2, 1, 9.8), _row(4, 1, 14.0),      # 2 threads is only noise-level faster
+        _row(1, 8, 4.0), _row(1, 32, 3.0), _row(2, 8, 3.0), _row(2, 32, 2.0),
+    ]
+    training = [{"threads": 1, "ms_per_step": 900.0}, {"threads": 2, "ms_per_step": 500.0},
+                {"threads": 4, "ms_per_step": 480.0}]
+    assert choose_runtime(inference, training) == {
+        "num_threads": 1, "pin_cpus": False, "batch_size": 32, "training_num_threads": 2,
+    }
+
+
+def test_load_config_applies_profile_from_this_machine_only(tmp_path):
+    shutil.copy(PROJECT_ROOT / "config.yaml", tmp_path / "config.yaml")
+    profile = {"machine": machine_fingerprint(), "runtime": {"num_threads": 3, "batch_size": 16}}
+    (tmp_path / TUNE_PROFILE_FILE).write_text(json.dumps(profile))
+    runtime = load_config(tmp_path / "config.yaml", apply=False).runtime
+    assert (runtime.num_threads, runtime.batch_size) == (3, 16)
+
+    # Explicit config.yaml values win over the measured profile
+    with open(tmp_path / "config.yaml", "a", encoding="utf-8") as f:
+        f.write("\nruntime:\n  num_threads: 2\n")
+    runtime = load_config(tmp_path / "config.yaml", apply=False).runtime
+    assert (runtime.num_threads, runtime.batch_size) == (2, 16)
+
+    profile["machine"] = dict(profile["machine"], cpu_count=-1)
+    (tmp_path / TUNE_PROFILE_FILE).write_text(json.dumps(profile))
+    assert load_config(tmp_path / "config.yaml", apply=False).runtime.batch_size == 0
@@ -0,0 +1,47 @@
+import io
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.batch import parse_line, stream_check
+from src.inference import generate_responses
+
+
+def test_parse_line():
+    assert parse_line("  \n") is None
+    assert parse_line("Ich bin müde.\n") == {"input": "Ich bin müde."}
+    assert parse_line('{"id": 7, "input": "Wo du wohnst?"}') == {"id": 7, "input": "Wo du wohnst?"}
+    assert parse_line('{"text": "Ich bin müde."}') == {"text": "Ich bin müde.", "input": "Ich bin müde."}
+    assert parse_line("{kein json") == {"input": "{kein json"}
+
+
+def test_stream_check_keeps_order_and_fields(model, tokenizer, config):
+    sentences = ["Ich habe den Auto.", "Wo du wohnst?", "Ich bin müde.", "Wo du wohnst?", "Er kommt."]
+    lines = [json.dumps({"id": i, "input": s}, ensure_ascii=False) for i, s in enumerate(sentences)]
+    out = io.StringIO()
+    stats = stream_check(io.StringIO("\n".join(lines) + "\n\n"), out, model, tokenizer, config, "cpu",
+                         batch_size=2, window=2)
+
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [r["id"] for r in records] == list(range(len(sentences)))
+    expected = generate_responses(sentences, model, tokenizer, config, "cpu", config.model.max_seq_len)
+    assert [r["output"] for r in records] == expected
+    assert stats["sentences"] == len(sentences)
+    assert stats["batches"] >= 3                       # batch_size=2 → at least ⌈5/2⌉ batches
+
+
+def test_stream_check_raises_reader_errors(model, tokenizer, config):
+    """A failing input stream surfaces as an exception instead of hanging the main loop."""
+    class BrokenInput(io.StringIO):
+        def __iter__(self):
+            yield "Ich bin müde.\n"
+            raise UnicodeDecodeError("utf-8", b"\xff", 0, 1, "invalid start byte")
+
+    out = io.StringIO()
+    with pytest.raises(UnicodeDecodeError):
+        stream_check(BrokenInput(), out, model, tokenizer, config, "cpu", batch_size=2, window=2)
+    assert json.loads(out.getvalue())["input"] == "Ich bin müde."
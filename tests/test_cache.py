@@ -0,0 +1,97 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.cache import ResultCache, normalize_text
+
+
+def test_normalize_text():
+    assert normalize_text("Ich habe  Zeit . ") == "Ich habe Zeit."
+    assert normalize_text("Wo du wohnst??") == "Wo du wohnst?"
+    # Decomposed ü (u + U+0308) and composed ü are the same sentence
+    assert normalize_text("Ich bin müde.") == normalize_text("Ich bin müde.")
+
+
+def test_lru_eviction_and_counters():
+    cache = ResultCache(max_size=2, version="v1")
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert cache.get("a") == "1"      # a is now most recently used
+    cache.put("c", "3")               # evicts b
+    assert cache.get("b") is None
+    assert cache.get("Ich habe Zeit .") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 2, 1)
+
+
+def test_ttl_expiry(monkeypatch):
+    import src.cache as cache_mod
+
+    now = [100.0]
+    monkeypatch.setattr(cache_mod.time, "monotonic", lambda: now[0])
+    cache = ResultCache(max_size=8, ttl=10.0)
+    cache.put("Ich habe Zeit.", "✅ Correct.")
+    now[0] += 5
+    assert cache.get("Ich  habe Zeit.") == "✅ Correct."
+    now[0] += 10
+    assert cache.get("Ich habe Zeit.") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_version_separates_entries():
+    a = ResultCache(version="model-a")
+    b = ResultCache(version="model-b")
+    assert a.key("Ich habe Zeit.") != b.key("Ich habe Zeit.")
+
+
+def _put_range(path, start, stop):
+    from src.cache import SQLiteResultCache
+
+    cache = SQLiteResultCache(path, version="v1")
+    for i in range(start, stop):
+        cache.put(f"Satz {i}.", f"✅ Correct. {i}")
+
+
+def test_sqlite_cache_persists_and_is_shared(tmp_path):
+    import multiprocessing
+
+    from src.cache import SQLiteResultCache
+
+    path = tmp_path / "results.sqlite"
+    workers = [multiprocessing.Process(target=_put_range, args=(path, k * 50, (k + 1) * 50)) for k in range(4)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+        assert w.exitcode == 0
+
+    # A fresh instance (= restarted process) sees every worker's entries
+    cache = SQLiteResultCache(path, version="v1")
+    assert len(cache) == 200
+    assert cache.get("Satz  123 .") == "✅ Correct. 123"
+    assert SQLiteResultCache(path, version="v2").get("Satz 123.") is None
+
+
+def test_sqlite_cache_eviction(tmp_path):
+    from src.cache import SQLiteResultCache
+
+    cache = SQLiteResultCache(tmp_path / "results.sqlite", max_size=10, evict_every=5)
+    for i in range(30):
+        cache.put(f"Satz {i}.", str(i))
+    assert len(cache) == 10
+    assert cache.get("Satz 29.") == "29"
+    assert cache.get("Satz 0.") is None
+    assert cache.stats()["evictions"] == 20
+
+
+def test_create_cache_sqlite_ttl_is_separate(tmp_path):
+    from src.cache import SQLiteResultCache, create_cache
+    from src.config import load_config
+
+    config = load_config()
+    config.inference.cache_path = str(tmp_path / "results.sqlite")
+    cache = create_cache(config, tmp_path)
+    assert isinstance(cache, SQLiteResultCache)
+    # The in-memory TTL does not apply: persistent entries only go stale with the weights
+    assert config.inference.cache_ttl and cache.ttl == config.inference.cache_db_ttl == 0
@@ -0,0 +1,55 @@
+import sys
+from pathlib import Path
+
+import pytest
+import torch
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.compiled import CompiledEngine, StaticDecoderStep, StaticEncoder
+from src.inference import generate_responses
+
+SENTENCES = [
+    "Ich habe den Auto.",
+    "Wo du wohnst?",
+    "Ich bin müde.",
+    "Er kommt.",
+    "Gestern bin ich mit meinem Bruder und meiner Schwester nach Berlin gefahren, weil wir Oma besuchen wollten.",
+]
+
+
+def test_static_step_matches_full_forward(model, tokenizer, config):
+    """Encoder + per-position decoder steps reproduce the teacher-forced logits of the HF model."""
+    max_len = config.model.max_seq_len
+    sources = [tokenizer.encode(t) for t in SENTENCES[:2]]
+    input_ids = torch.tensor([tokenizer.pad_sequence(s, 16) for s in sources])
+    mask = (input_ids != tokenizer.pad_id).long()
+    decoder_ids = torch.randint(4, config.model.vocab_size, (2, 6))
+    decoder_ids[:, 0] = model.config.decoder_start_token_id
+
+    encoder, step = StaticEncoder(model), StaticDecoderStep(model, max_len)
+    n_layers, n_heads = len(model.model.decoder.layers), model.config.decoder_attention_heads
+    self_k = torch.zeros(n_layers, 2, n_heads, max_len, config.model.d_model // n_heads)
+    self_v = torch.zeros_like(self_k)
+    with torch.no_grad():
+        expected = model(input_ids=input_ids, attention_mask=mask, decoder_input_ids=decoder_ids).logits
+        cross_k, cross_v, cross_mask = encoder(input_ids, mask)
+        for pos in range(decoder_ids.shape[1]):
+            logits = step(decoder_ids[:, pos], torch.tensor([pos]), self_k, self_v, cross_k, cross_v, cross_mask)
+            assert torch.allclose(logits, expected[:, pos], atol=1e-4)
+
+
+@pytest.mark.parametrize("backend", ["none", "eager"])
+def test_engine_matches_generate_responses(model, tokenizer, config, backend):
+    engine = CompiledEngine(model, tokenizer, config, backend=backend, src_buckets=[16], batch_buckets=[1, 2])
+    assert engine.src_buckets == [16, config.model.max_seq_len]        # every source fits the last bucket
+    assert engine.bucket_for(2, 17) == (2, 64)
+    with pytest.raises(ValueError):
+        engine.bucket_for(3, 8)
+
+    expected = generate_responses(SENTENCES, model, tokenizer, config, "cpu", config.model.max_seq_len)
+    assert engine.check(SENTENCES + SENTENCES[:1]) == expected + expected[:1]
+    assert engine.check_one(SENTENCES[1]) == expected[1]
+    stats = engine.stats()
+    assert stats["rows"] == 6                                            # duplicates decoded once
+    assert stats["bucket_hits"] == {"2x16": 2, "1x64": 1, "1x16": 1}
@@ -0,0 +1,259 @@
+import sys
+from pathlib import Path
+
+import torch
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.inference import generate_response
+from src.shortlist import ShortlistDecoder
+
+
+SENTENCES = ["Ich habe den Auto.", "Wo du wohnst?"]
+
+
+def test_shortlist_full_vocab_matches_generate(model, tokenizer, config):
+    """With S = whole vocabulary the shortlist decoder must reproduce model.generate()."""
+    decoder = ShortlistDecoder(model, tokenizer, list(range(tokenizer.vocab_size)))
+    for text in SENTENCES:
+        expected = generate_response(text, model, tokenizer, config, "cpu", max_len=16)
+        assert decoder.generate(text, config, "cpu", max_len=16) == expected
+    assert decoder.fallbacks == 0
+
+
+def test_shortlist_falls_back_on_disagreement(model, tokenizer, config):
+    """If the full argmax lies outside the shortlist, the parity check must fall back to generate()."""
+    forced = tokenizer.encode("❌", add_bos=False, add_eos=False)[0]
+    bias = model.final_logits_bias.clone()
+    model.final_logits_bias[0, forced] += 100.0   # full argmax is always ❌
+    try:
+        decoder = ShortlistDecoder(model, tokenizer, [tokenizer.eos_id])
+        expected = generate_response(SENTENCES[0], model, tokenizer, config, "cpu", max_len=8)
+        assert decoder.generate(SENTENCES[0], config, "cpu", max_len=8) == expected
+        assert decoder.fallbacks == 1
+
+        # verify_rate 0: the check (and its full-vocab GEMM) is skipped, the shortlist answer stands
+        unchecked = ShortlistDecoder(model, tokenizer, [tokenizer.eos_id], verify_rate=0.0)
+        assert unchecked.generate(SENTENCES[0], config, "cpu", max_len=8) == ""
+        assert (unchecked.verified, unchecked.fallbacks) == (0, 0)
+    finally:
+        model.final_logits_bias.copy_(bias)
+
+
+def test_knn_paths(model, tokenizer, config):
+    """Known inputs get the neighbours' verdict; novel inputs decode exactly like generate()."""
+    import numpy as np
+
+    from src.inference import generate_response_with_knn
+    from src.knn import KnnIndex, encode_texts
+
+    emb = encode_texts(model, tokenizer, SENTENCES, "cpu", config.model.max_seq_len)
+
+    correct = KnnIndex(emb[:1], np.array([1]))
+    assert generate_response_with_knn(SENTENCES[0], model, tokenizer, config, "cpu", correct) == "✅ Correct."
+
+    incorrect = KnnIndex(emb[:1], np.array([0]))
+    result = generate_response_with_knn(SENTENCES[0], model, tokenizer, config, "cpu", incorrect)
+    assert result.startswith("❌ Incorrect.\n✅ Correct:")
+
+    # Orthogonal neighbour → below any threshold → plain greedy decode
+    novel = KnnIndex(np.eye(1, emb.shape[1], dtype=np.float32), np.array([1]))
+    expected = generate_response(SENTENCES[1], model, tokenizer, config, "cpu", config.model.max_seq_len)
+    assert generate_response_with_knn(SENTENCES[1], model, tokenizer, config, "cpu", novel) == expected
+
+
+def test_knn_ivf_skips_empty_lists():
+    """An empty inverted list nearest to the query must not use up the only probe."""
+    import numpy as np
+
+    from src.knn import KnnIndex
+
+    rows = np.repeat(np.eye(2, 4, dtype=np.float32), 4, axis=0)           # 8 rows, 2 distinct
+    index = KnnIndex(rows, np.array([1, 1, 1, 1, 0, 0, 0, 0]))
+    index.build_ivf(n_lists=8)
+    assert index._lists is not None
+    assert sum(len(members) == 0 for members in index._lists) >= 6       # duplicates → empty lists
+
+    centroids = np.eye(3, 4, dtype=np.float32)                            # list 2 is empty
+    index = KnnIndex(rows, index.verdicts, centroids, np.repeat(np.array([0, 1], dtype=np.int32), 4))
+    query = np.array([0.6, 0.0, 0.8, 0.0], dtype=np.float32)             # nearest centroid: the empty one
+    is_correct, similarity, row = index.predict(query, k=3, n_probe=1)
+    assert is_correct and row < 4 and abs(similarity - 0.6) < 1e-6
+
+
+def test_batched_responses_match_single(model, tokenizer, config):
+    """Padding + attention mask must not change greedy outputs; repeats are checked once."""
+    from src.inference import generate_responses
+
+    texts = SENTENCES + ["Ich bin müde.", "Wo du  wohnst ?"]
+    batched = generate_responses(texts, model, tokenizer, config, "cpu", config.model.max_seq_len)
+    single = [generate_response(t, model, tokenizer, config, "cpu", config.model.max_seq_len) for t in texts[:3]]
+    assert batched[:3] == single
+    assert batched[3] == batched[1]
+
+
+def test_verdict_targets(tokenizer):
+    from src.metrics import CORRECT_VERDICT
+    from src.model.verdict_head import verdict_targets
+
+    prefix = tokenizer.encode(CORRECT_VERDICT, add_bos=False, add_eos=False)
+    incorrect = tokenizer.encode("❌ Incorrect.", add_bos=False, add_eos=False)
+    width = len(prefix) + 4
+    labels = torch.full((3, width), -100, dtype=torch.long)
+    labels[0, :len(prefix)] = torch.tensor(prefix)
+    labels[1, :len(incorrect)] = torch.tensor(incorrect)
+    labels[2, 1:len(prefix)] = torch.tensor(prefix[1:])   # prefix must start at position 0
+    assert verdict_targets(labels, prefix).tolist() == [1.0, 0.0, 0.0]
+
+
+def test_verdict_head_save_load(tmp_path, config):
+    from src.model.verdict_head import VerdictHead, load_verdict_head, save_verdict_head
+
+    assert load_verdict_head(tmp_path, config.model.d_model) is None
+    torch.manual_seed(0)
+    head = VerdictHead(config.model.d_model).eval()
+    save_verdict_head(head, tmp_path)
+    loaded = load_verdict_head(tmp_path, config.model.d_model)
+    assert loaded is not None
+    memory = torch.randn(2, 5, config.model.d_model)
+    mask = torch.tensor([[1, 1, 1, 1, 1], [1, 1, 1, 0, 0]])
+    assert not loaded.training
+    assert torch.equal(loaded(memory, mask), head(memory, mask))
+
+
+def test_verdict_paths(model, tokenizer, config):
+    """Confident head → "✅ Correct." without decoding; otherwise the reused memory decodes like generate()."""
+    import copy
+
+    from src.inference import generate_response_with_verdict
+    from src.model.verdict_head import VerdictHead
+
+    head = VerdictHead(config.model.d_model).eval()
+    cfg = copy.deepcopy(config)
+    max_len = config.model.max_seq_len
+
+    cfg.inference.verdict_threshold = 0.0            # any P(correct) clears the threshold
+    assert generate_response_with_verdict(SENTENCES[0], model, tokenizer, cfg, "cpu", head, max_len) == "✅ Correct."
+
+    cfg.inference.verdict_threshold = 1.1            # never confident → full greedy decode
+    for text in SENTENCES:
+        expected = generate_response(text, model, tokenizer, config, "cpu", max_len)
+        assert generate_response_with_verdict(text, model, tokenizer, cfg, "cpu", head, max_len) == expected
+
+
+def test_edit_tags_round_trip_generated_pairs(tokenizer):
+    """align_edits → apply_edits must rebuild every generated correction word for word."""
+    import random
+
+    from src.data.generator import MasterGenerator
+    from src.model.edit_tagger import align_edits, apply_edits, extract_correction, join_words
+
+    random.seed(0)
+    data = random.sample(MasterGenerator().generate_all(), 3000)
+    for item in data:
+        target = extract_correction(item["output"]) or item["input"]
+        _, word_pos, src = tokenizer.encode_words(item["input"])
+        _, _, tgt = tokenizer.encode_words(target)
+        assert len(word_pos) == len(src)
+        tags = align_edits(src, tgt)
+        assert tags is not None, item["input"]
+        assert apply_edits(src, *tags) == tgt, item["input"]
+        assert join_words(tgt) == target
+
+
+def test_tagger_without_explanation(model, tokenizer, config):
+    """explain=False returns the verdict or the correction prefix, never decoder output."""
+    from src.inference import generate_response_with_tagger
+    from src.model.edit_tagger import DELETE, KEEP, NO_APPEND, EditTagger
+
+    torch.manual_seed(0)
+    tagger = EditTagger(config.model.d_model, [KEEP, DELETE], [NO_APPEND], max_words=16).eval()
+    text = "Wir spielen heute Fußball."
+    with torch.no_grad():
+        tagger.slot_proj.weight.zero_()
+        tagger.slot_proj.bias.zero_()                                # equal slots → source order
+        tagger.edit_proj.weight.zero_()
+        tagger.edit_proj.bias.copy_(torch.tensor([1.0, 0.0]))        # KEEP everywhere
+        assert generate_response_with_tagger(
+            text, model, tokenizer, config, "cpu", tagger, explain=False) == "✅ Correct."
+
+        tagger.edit_proj.bias.copy_(torch.tensor([0.0, 1.0]))        # DELETE everywhere
+        result = generate_response_with_tagger(text, model, tokenizer, config, "cpu", tagger, explain=False)
+    assert result == "❌ Incorrect.\n✅ Correct: "
+
+
+def test_lazy_explanation_resumes_decoding(model, tokenizer, config):
+    """Lazy path stops after the correction line; explain() resumes to exactly generate_response()."""
+    import copy
+    from src.cache import ResultCache
+    from src.inference import EXPLANATION_MARKER, generate_response_lazy
+    from src.metrics import DECODE_STEPS
+
+    # Overfit a private copy on one target so the response has all three lines
+    tuned = copy.deepcopy(model).train()
+    source = "Ich habe den Auto."
+    target = "❌ Incorrect.\n✅ Correct: Ich habe das Auto.\n📝 Пояснення: Auto — середній рід, тому das."
+    x = torch.tensor([tokenizer.encode(source, add_bos=True, add_eos=True)])
+    y = torch.tensor([tokenizer.encode(target, add_bos=True, add_eos=True)])
+    optimizer = torch.optim.AdamW(tuned.parameters(), lr=1e-3)
+    torch.manual_seed(0)
+    for _ in range(100):
+        tuned(input_ids=x, decoder_input_ids=y[:, :-1], labels=y[:, 1:]).loss.backward()
+        optimizer.step()
+        optimizer.zero_grad()
+    tuned.eval()
+
+    full = generate_response(source, tuned, tokenizer, config, "cpu", config.model.max_seq_len)
+    assert full == target
+    steps = {path: DECODE_STEPS.summary(path=path)["sum"] for path in ("lazy", "explain")}
+    cache = ResultCache()
+    lazy = generate_response_lazy(source, tuned, tokenizer, config, "cpu", config.model.max_seq_len, cache=cache)
+    assert lazy.pending and lazy.text == "❌ Incorrect.\n✅ Correct: Ich habe das Auto."
+    assert cache.get(source) is None                                  # partial responses are never cached
+    lazy_steps = DECODE_STEPS.summary(path="lazy")["sum"] - steps["lazy"]
+    assert lazy.explain() == full and not lazy.pending
+    explain_steps = DECODE_STEPS.summary(path="explain")["sum"] - steps["explain"]
+    assert explain_steps > 0 and lazy_steps + explain_steps == len(y[0]) - 1        # no step decoded twice
+    assert cache.get(source) == full
+
+    hit = generate_response_lazy(source, tuned, tokenizer, config, "cpu", cache=cache)
+    assert not hit.pending and hit.text == full.split(EXPLANATION_MARKER)[0] and hit.explain() == full
+
+    # Responses without a correction line decode to the end at once
+    for text in SENTENCES:
+        done = generate_response_lazy(text, model, tokenizer, config, "cpu", config.model.max_seq_len)
+        assert not done.pending
+        assert done.text == done.explain() == generate_response(text, model, tokenizer, config, "cpu",
+                                                                config.model.max_seq_len)
+
+
+def test_n_best_ranks_candidates_by_sequence_log_prob(model, tokenizer, config):
+    import copy
+    from src.inference import generate_n_best
+
+    text = SENTENCES[0]
+    candidates = generate_n_best(text, model, tokenizer, config, "cpu", n=6, max_len=config.model.max_seq_len, seed=0)
+    assert sum(c["count"] for c in candidates) == 6
+    assert len({c["response"] for c in candidates}) == len(candidates)
+    assert [c["log_prob"] for c in candidates] == sorted((c["log_prob"] for c in candidates), reverse=True)
+    assert abs(sum(c["confidence"] for c in candidates) - 1.0) < 1e-5
+
+    # A seed reproduces the samples without reseeding the global RNG
+    torch.rand(1)                       # move off the state the first seeded call left behind
+    rng_state = torch.get_rng_state()
+    again = generate_n_best(text, model, tokenizer, config, "cpu", n=6, max_len=config.model.max_seq_len, seed=0)
+    assert again == candidates
+    assert torch.equal(torch.get_rng_state(), rng_state)
+
+    # top_k = 1 samples the greedy sequence; its score is the teacher-forced log-prob
+    greedy_config = copy.deepcopy(config)
+    greedy_config.generation.top_k = 1
+    [best] = generate_n_best(text, model, tokenizer, greedy_config, "cpu", n=3, max_len=config.model.max_seq_len)
+    assert best["response"] == generate_response(text, model, tokenizer, config, "cpu", config.model.max_seq_len)
+    assert best["count"] == 3 and best["confidence"] == 1.0
+    input_ids = torch.tensor([tokenizer.encode(text, add_bos=True, add_eos=True)])
+    with torch.no_grad():
+        output_ids = model.generate(input_ids=input_ids, max_length=config.model.max_seq_len, do_sample=False)
+        logits = model(input_ids=input_ids, decoder_input_ids=output_ids[:, :-1]).logits
+    expected = logits.log_softmax(-1).gather(-1, output_ids[:, 1:, None]).sum().item()
+    assert abs(best["log_prob"] - expected) < 1e-3
@@ -0,0 +1,47 @@
+import json
+import sys
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.lookup import LookupIndex, build_lookup_index, input_hash, save_lookup_index
+
+
+def _write_jsonl(path, items):
+    with open(path, "w", encoding="utf-8") as f:
+        for item in items:
+            f.write(json.dumps(item, ensure_ascii=False) + "\n")
+
+
+def test_build_save_load_and_lookup(tmp_path):
+    train = tmp_path / "train.jsonl"
+    val = tmp_path / "val.jsonl"
+    _write_jsonl(train, [
+        {"input": "Ihr habt einen Löffel.", "output": "✅ Correct."},
+        {"input": "Ich bin müde.", "output": "✅ Correct."},
+        {"input": "Wo du wohnst?", "output": "❌ Incorrect.\n✅ Correct: Wo wohnst du?"},
+    ])
+    _write_jsonl(val, [
+        {"input": "Ich bin  müde .", "output": "✅ Correct."},                       # duplicate after normalization
+        {"input": "Wo du wohnst?", "output": "❌ Incorrect.\n✅ Correct: Wohnst du?"},  # conflicting gold
+    ])
+
+    index, n_conflicts = build_lookup_index([train, val])
+    assert n_conflicts == 1
+    assert len(index) == 2
+    assert index.outputs == ["✅ Correct."]          # outputs are deduplicated
+
+    save_lookup_index(index, tmp_path / "lookup_index.json")
+    loaded = LookupIndex.load(tmp_path / "lookup_index.json")
+    assert loaded.get("Ihr  habt einen Löffel .") == "✅ Correct."
+    assert loaded.get("Wo du wohnst?") is None      # ambiguous inputs are never served
+    assert loaded.stats()["hit_rate"] == 0.5
+
+
+def test_generate_response_skips_model_on_hit():
+    from src.inference import generate_response
+
+    index = LookupIndex({input_hash("Ich bin müde."): 0}, ["✅ Correct."])
+    unused: Any = None                          # model / tokenizer / config are never touched on a lookup hit
+    assert generate_response("Ich bin  müde.", unused, unused, unused, "cpu", lookup=index) == "✅ Correct."
@@ -0,0 +1,71 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.inference import generate_response, generate_responses
+from src.metrics import METRICS, Registry
+
+
+def test_histogram_summary_and_prometheus_text():
+    registry = Registry()
+    latency = registry.histogram("t_seconds", "Test latency.", (0.1, 0.5, 1.0), ("path",))
+    for value in (0.05, 0.05, 0.3, 0.7, 2.0):
+        latency.observe(value, path="a")
+    registry.counter("t_total", "Test count.", ("verdict",)).inc(verdict="correct")
+
+    summary = latency.summary(path="a")
+    assert summary["count"] == 5 and summary["sum"] == pytest.approx(3.1)
+    assert summary["p50"] == 0.5 and summary["p99"] == 1.0      # +Inf reports the last finite bound
+    assert registry.snapshot()["t_total"] == {"verdict=correct": 1.0}
+
+    text = registry.to_prometheus()
+    assert "# TYPE t_seconds histogram" in text
+    assert 't_seconds_bucket{path="a",le="0.1"} 2' in text
+    assert 't_seconds_bucket{path="a",le="1"} 4' in text
+    assert 't_seconds_bucket{path="a",le="+Inf"} 5' in text
+    assert 't_seconds_count{path="a"} 5' in text
+    assert 't_total{verdict="correct"} 1' in text
+
+    with pytest.raises(ValueError):
+        latency.observe(1.0)                                      # missing label
+    with pytest.raises(ValueError):
+        registry.counter("t_seconds", "Wrong kind.")
+
+
+def test_inference_records_metrics(model, tokenizer, config):
+    def count(name, key):
+        return METRICS.snapshot()[name].get(key, {"count": 0})["count"]
+
+    before = {
+        "single": count("a2_request_seconds", "path=single"),
+        "batch": count("a2_batch_size", "path=batch"),
+        "encoder": count("a2_encoder_seconds", "path=single"),
+        "decoder": count("a2_decoder_seconds", "path=single"),
+        "inputs": METRICS.snapshot()["a2_input_tokens"].get("", {"count": 0})["count"],
+    }
+    responses = METRICS.snapshot()["a2_responses_total"]
+
+    generate_response("Ich bin müde.", model, tokenizer, config, "cpu", config.model.max_seq_len)
+    generate_responses(["Er kommt.", "Er kommt.", "Wo du wohnst?"], model, tokenizer, config, "cpu",
+                       config.model.max_seq_len)
+
+    assert count("a2_request_seconds", "path=single") == before["single"] + 1
+    assert count("a2_batch_size", "path=batch") == before["batch"] + 1
+    assert count("a2_encoder_seconds", "path=single") == before["encoder"] + 1
+    assert count("a2_decoder_seconds", "path=single") == before["decoder"] + 1
+    assert METRICS.snapshot()["a2_input_tokens"][""]["count"] == before["inputs"] + 3
+    after = METRICS.snapshot()["a2_responses_total"]
+    added = {k: v - responses.get(k, 0) for k, v in after.items() if v != responses.get(k, 0)}
+    assert sum(v for k, v in added.items() if k.startswith("source=model")) == 3
+    assert sum(v for k, v in added.items() if k.startswith("source=dedup")) == 1
+
+
+def test_batches_after_the_first_are_recorded(model, tokenizer, config):
+    texts = ["Er kommt.", "Wo du wohnst?", "Ich bin müde."]
+    before = METRICS.snapshot()["a2_batch_size"].get("path=batch", {"count": 0})["count"]
+    responses = generate_responses(texts, model, tokenizer, config, "cpu", config.model.max_seq_len, batch_size=1)
+    assert len(responses) == 3
+    assert METRICS.snapshot()["a2_batch_size"]["path=batch"]["count"] == before + 3
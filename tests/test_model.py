@@ -73,3 +73,31 @@ def test_config_mapping(model, config):
     # Custom tweaks for our training logic
     assert getattr(model.config, "scale_embedding", True) is False
     assert model.config.tie_word_embeddings is True
+    assert model.config._attn_implementation == config.model.attn_implementation
+
+
+def test_attention_backends_match(config, tmp_path):
+    """eager and sdpa run the same math; every loader applies the configured backend."""
+    import dataclasses
+
+    from src.inference import load_hf_model
+    from src.model.model import load_model_from_dir
+
+    eager_config = dataclasses.replace(config, model=dataclasses.replace(config.model, attn_implementation="eager"))
+    torch.manual_seed(0)
+    eager = create_model(eager_config).eval()
+    eager.save_pretrained(tmp_path)
+    sdpa = load_hf_model(tmp_path, "cpu", "sdpa")
+    assert eager.config._attn_implementation == "eager" and sdpa.config._attn_implementation == "sdpa"
+    assert load_model_from_dir(tmp_path, "eager").config._attn_implementation == "eager"
+
+    src = torch.randint(4, config.model.vocab_size, (2, 16))
+    mask = torch.ones_like(src)
+    mask[1, 10:] = 0
+    with torch.no_grad():
+        a = eager(input_ids=src, attention_mask=mask, decoder_input_ids=src).logits
+        b = sdpa(input_ids=src, attention_mask=mask, decoder_input_ids=src).logits
+    assert torch.allclose(a, b, atol=1e-4)
+
+    with pytest.raises(ValueError):
+        load_hf_model(tmp_path, "cpu", "flash")
@@ -0,0 +1,74 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+import torch
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.inference import generate_responses
+from src.numpy_model import NumpyBart
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+@pytest.fixture(scope="module")
+def test_inputs():
+    with open(PROJECT_ROOT / "tests/test_data.json", "r", encoding="utf-8") as f:
+        return list(dict.fromkeys(item["input"] for item in json.load(f)))
+
+
+@pytest.fixture(scope="module")
+def np_model(model, tmp_path_factory):
+    model_dir = tmp_path_factory.mktemp("numpy_model")
+    model.save_pretrained(model_dir)
+    return NumpyBart.from_dir(model_dir)
+
+
+def _batch(texts, tokenizer, max_len):
+    sources = [tokenizer.encode(t, add_bos=True, add_eos=True, max_len=max_len) for t in texts]
+    width = max(len(s) for s in sources)
+    return np.array([tokenizer.pad_sequence(s, width) for s in sources], dtype=np.int64)
+
+
+def test_weights_are_memory_mapped(np_model):
+    assert isinstance(np_model.embed.base, np.memmap) or isinstance(np_model.embed, np.memmap)
+    assert np_model.embed.dtype == np.float32
+
+
+def test_logits_match_hf_on_test_data(np_model, model, tokenizer, config, test_inputs):
+    input_ids = _batch(test_inputs, tokenizer, config.model.max_seq_len)
+    mask = input_ids != tokenizer.pad_id
+    decoder_ids = np.concatenate([np.full((len(input_ids), 1), np_model.start_id), input_ids[:, :-1]], axis=1)
+    with torch.no_grad():
+        expected = model(input_ids=torch.from_numpy(input_ids), attention_mask=torch.from_numpy(mask).long(),
+                         decoder_input_ids=torch.from_numpy(decoder_ids)).logits.numpy()
+    actual = np_model.forward(input_ids, mask, decoder_ids)
+    dec_mask = decoder_ids != tokenizer.pad_id                     # HF pads nothing on the decoder side either
+    assert np.abs(actual - expected)[dec_mask].max() < 1e-4
+
+
+def test_greedy_responses_match_hf_on_test_data(np_model, model, tokenizer, config, test_inputs):
+    max_len = config.model.max_seq_len
+    expected = generate_responses(test_inputs, model, tokenizer, config, "cpu", max_len, batch_size=len(test_inputs))
+    assert np_model.check(test_inputs, tokenizer, max_len) == expected
+
+    # Short max length: the forced-<EOS> stop rule of generate() is reproduced
+    input_ids = _batch(test_inputs[:8], tokenizer, max_len)
+    with torch.no_grad():
+        hf = model.generate(input_ids=torch.from_numpy(input_ids),
+                            attention_mask=torch.from_numpy(input_ids != tokenizer.pad_id).long(),
+                            max_length=6, num_beams=1, do_sample=False)
+    ours = np_model.generate(input_ids, input_ids != tokenizer.pad_id, max_length=6)
+    for row, ids in zip(hf.tolist(), ours):
+        content = [t for t in row[1:] if t != tokenizer.pad_id]
+        assert content[:len(ids)] == ids and len(ids) == min(len(content), 4)
+
+
+def test_import_is_torch_free():
+    probe = "import sys, src.numpy_model, src.tokenizer.tokenizer; print('torch' in sys.modules, 'transformers' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", probe], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.split() == ["False", "False"]
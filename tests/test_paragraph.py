@@ -0,0 +1,36 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.paragraph import split_sentences, verdict_of
+
+
+def _split(text):
+    return [text[s:e] for s, e in split_sentences(text)]
+
+
+def test_split_sentences_german_abbreviations_and_quotes():
+    text = ("Ich habe z.B. den Auto gekauft. Am 3. Mai war ich in Berlin! "
+            "Er fragt: „Kommst du?“, und lacht. Das kostet ca. 5 Euro. Wo du wohnst?")
+    assert _split(text) == [
+        "Ich habe z.B. den Auto gekauft.",
+        "Am 3. Mai war ich in Berlin!",
+        "Er fragt: „Kommst du?“, und lacht.",
+        "Das kostet ca. 5 Euro.",
+        "Wo du wohnst?",
+    ]
+
+
+def test_split_sentences_offsets_and_blank_lines():
+    text = "  Ich bin müde.  Du bist da\n\nEr kommt  "
+    spans = split_sentences(text)
+    assert [text[s:e] for s, e in spans] == ["Ich bin müde.", "Du bist da", "Er kommt"]
+    assert spans[0] == (2, 15)
+    assert split_sentences("   ") == []
+
+
+def test_verdict_of():
+    assert verdict_of("✅ Correct.") == "correct"
+    assert verdict_of("❌ Incorrect.\n✅ Correct: Wo wohnst du?") == "incorrect"
+    assert verdict_of("") == "unknown"
@@ -0,0 +1,46 @@
+import os
+import signal
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.cache import SQLiteResultCache
+from src.inference import generate_responses
+from src.pool import WorkerPool
+
+SENTENCES = ["Ich habe den Auto.", "Wo du wohnst?", "Ich bin müde.", "Er kommt.", "Wir spielen Fußball."] * 3
+
+
+@pytest.fixture(scope="module")
+def expected(model, tokenizer, config):
+    # Running the model here first is deliberate: workers must not inherit the parent's thread state
+    return generate_responses(SENTENCES, model, tokenizer, config, "cpu", config.model.max_seq_len)
+
+
+def test_pool_matches_in_process(model, tokenizer, config, expected):
+    with WorkerPool(model, tokenizer, config, n_workers=2, batch_size=4, health_interval=0.1) as pool:
+        assert pool.check(SENTENCES) == expected
+
+        # A killed worker is replaced and the pool keeps answering
+        os.kill(pool.health()["workers"][0]["pid"], signal.SIGKILL)
+        assert pool.check(SENTENCES) == expected
+        deadline = time.time() + 30
+        while pool.restarts < 1 and time.time() < deadline:
+            time.sleep(0.1)
+        assert pool.restarts >= 1
+
+        pool.restart()
+        health = pool.health()
+        assert health["healthy"] and all(w["alive"] for w in health["workers"])
+        assert pool.check(SENTENCES[:3]) == expected[:3]
+
+
+def test_pool_workers_share_sqlite_cache(model, tokenizer, config, expected, tmp_path):
+    cache = SQLiteResultCache(tmp_path / "results.sqlite", version="v")
+    with WorkerPool(model, tokenizer, config, n_workers=2, batch_size=4, cache=cache) as pool:
+        assert pool.check(SENTENCES) == expected
+    assert len(cache) == len(set(SENTENCES))
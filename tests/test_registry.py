@@ -0,0 +1,68 @@
+import sys
+import time
+from pathlib import Path
+
+import pytest
+import torch
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.inference import generate_response
+from src.registry import InferenceEngine, ModelRegistry, file_sha256
+
+SENTENCES = ["Ich habe den Auto.", "Wo du wohnst?", "Ich bin müde."]
+
+
+@pytest.fixture
+def registry(tmp_path, model):
+    model.save_pretrained(tmp_path / "src")
+    registry = ModelRegistry(tmp_path / "models")
+    registry.publish(tmp_path / "src", eval_scores={"det_acc": 50.0}, notes="first")
+    registry.publish(tmp_path / "src", notes="same weights, new version")
+    return registry
+
+
+def test_publish_manifest_and_activate(registry, tmp_path):
+    assert registry.versions() == ["v1", "v2"]
+    manifest = registry.manifest("v1")
+    assert manifest["weights_sha256"] == file_sha256(tmp_path / "src/model.safetensors")
+    assert manifest["config"]["d_model"] == 256 and manifest["eval"] == {"det_acc": 50.0}
+    assert registry.active() == "v2"                          # newest until one is activated
+    registry.activate("v1")
+    assert registry.active() == "v1"
+    assert registry.verify("v2")
+
+    with pytest.raises(KeyError):
+        registry.activate("v9")
+    with pytest.raises(FileNotFoundError):
+        registry.publish(tmp_path / "nowhere")
+
+
+def test_engine_swaps_after_draining_and_shadows(registry, model, tokenizer, config):
+    registry.activate("v1")
+    engine = InferenceEngine(registry, config, device="cpu", warmup_texts=SENTENCES[:1], drain_timeout=30)
+    expected = [generate_response(t, model, tokenizer, config, "cpu", config.model.max_seq_len) for t in SENTENCES]
+    assert engine.check_many(SENTENCES) == expected
+
+    # Shadow v2 on all traffic: the caller's answers are unchanged, the report compares both versions
+    engine.shadow("v2", rate=1.0).result()
+    assert engine.check_many(SENTENCES) == expected
+    report = engine.shadow_report()
+    assert report["current"] == "v1" and report["candidate"] == "v2"
+    assert report["requests"] == 3 and report["agreement"] == 1.0
+    assert report["candidate_p50_ms"] > 0
+
+    # A request still running on v1 holds the swap's drain, but new traffic goes to v2 at once
+    old = engine._current
+    old.acquire()
+    swap = engine.deploy("v2")
+    deadline = time.time() + 30
+    while engine.version != "v2" and time.time() < deadline:
+        time.sleep(0.01)
+    assert engine.version == "v2" and not swap.done()
+    assert engine.check(SENTENCES[0]) == expected[0]
+    old.release()
+    result = swap.result(timeout=30)
+    assert result["from"] == "v1" and result["to"] == "v2" and result["drained"]
+    assert old.model is None and engine.status()["shadow"] is None and engine.swaps == 1
+    engine.close()
@@ -0,0 +1,74 @@
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.data.generators.syntax import SyntaxGenerator
+from src.data.generators.verbs import VerbGenerator
+from src.rules import RuleChecker
+
+
+@pytest.fixture(scope="module")
+def checker():
+    return RuleChecker()
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Du spiele Fußball.", "❌ Incorrect.\n✅ Correct: Du spielst Fußball."),
+    ("Heute ich spiele Fußball.", "❌ Incorrect.\n✅ Correct: Heute spiele ich Fußball."),
+    ("Ich aufstehe um 7 Uhr.", "❌ Incorrect.\n✅ Correct: Ich stehe um 7 Uhr auf."),
+    ("Ich habe nach Hause gegangen.", "❌ Incorrect.\n✅ Correct: Ich bin nach Hause gegangen."),
+    ("Ich gehe mit den Freund.", "❌ Incorrect.\n✅ Correct: Ich gehe mit dem Freund."),
+    ("Er ist müde.", None),  # "müde" is not in the complement tables
+    ("Ich gehe mit dem Freund.", "✅ Correct."),
+    ("Am Montag lernen wir Deutsch.", "✅ Correct."),
+    ("Heute Sie spielen Fußball.", "❌ Incorrect.\n✅ Correct: Heute spielen Sie Fußball."),
+    ("Heute Sie spielt Fußball.", "❌ Incorrect.\n✅ Correct: Heute spielt sie Fußball."),
+    ("Wir fahren nach Berlin.", "✅ Correct."),
+    ("Ich habe Pizza gegessen.", "✅ Correct."),
+    # Complements are keyed by verb: no directional phrase without a motion verb,
+    # no sein / haben + arbitrary noun, no Perfekt auxiliary without a participle
+    ("Ich bin Pizza.", None),
+    ("Ich habe nach Hause.", None),
+    ("Wir trinken nach Berlin.", None),
+    ("Ich lerne nach Hause.", None),
+    ("Du hast gut.", None),
+    ("Ich habe Kaffee gegangen.", None),
+])
+def test_patterns(checker, text, expected):
+    result = checker.check(text)
+    if expected is None:
+        assert result is None
+    else:
+        assert result is not None and result.split("\n📝")[0] == expected
+
+
+def test_abstains_on_unrecognized(checker):
+    for text in ["Ich denke, dass du Zeit hast.", "Wo du wohnst?", "Das Wetter ist heute schön.", "Sie spielst Fußball."]:
+        assert checker.check(text) is None
+    assert checker.stats()["abstains"] >= 4
+
+
+def test_agrees_with_generators(checker):
+    """Whenever the checker answers a generated example, verdict and correction match the gold output.
+
+    "Sie" examples are skipped: the generators label sie (she) vs Sie (they/formal)
+    inconsistently, and the checker accepts both readings.
+    """
+    random.seed(0)
+    v_gen, s_gen = VerbGenerator(), SyntaxGenerator()
+    data = (v_gen.generate_perfekt_aux(300) + v_gen.generate_separable_verbs(300)
+            + s_gen.generate_inversion(300))
+    answered = 0
+    for item in data:
+        if "sie" in item["input"].lower().split():
+            continue
+        result = checker.check(item["input"])
+        if result is None:
+            continue
+        answered += 1
+        assert result.split("\n📝")[0] == item["output"].split("\n📝")[0], item["input"]
+    assert answered > 300
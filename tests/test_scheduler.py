@@ -0,0 +1,54 @@
+import sys
+from pathlib import Path
+
+import torch
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.inference import generate_responses
+from src.scheduler import ContinuousBatcher, SlotDecoder
+
+SENTENCES = ["Ich habe den Auto.", "Wo du wohnst?", "Ich bin müde.", "Er kommt.", "Wir spielen heute Fußball im Park."]
+
+
+def test_slot_step_matches_full_forward(model, tokenizer):
+    """Slots admitted at different steps (and a reused slot) give the logits of a full forward pass."""
+    decoder = SlotDecoder(model, max_slots=3, max_len=64)
+    src = [tokenizer.encode(s, add_bos=True, add_eos=True) for s in SENTENCES]
+    slot_src: dict[int, int] = {}
+    prefix: dict[int, list[int]] = {}
+
+    def admit(slots, items):
+        width = max(len(src[i]) for i in items)
+        ids = torch.tensor([tokenizer.pad_sequence(src[i], width) for i in items])
+        decoder.admit(torch.tensor(slots), ids, (ids != tokenizer.pad_id).long())
+        for slot, item in zip(slots, items):
+            slot_src[slot], prefix[slot] = item, [model.config.decoder_start_token_id]
+
+    g = torch.Generator().manual_seed(0)
+    admit([1], [0])
+    for step in range(8):
+        if step == 2:
+            admit([0, 2], [4, 1])
+        if step == 5:
+            admit([1], [3])
+        active = sorted(slot_src)
+        logits = decoder.step(torch.tensor(active), torch.tensor([prefix[s][-1] for s in active]))
+        for row, slot in enumerate(active):
+            with torch.no_grad():
+                expected = model(
+                    input_ids=torch.tensor([src[slot_src[slot]]]), decoder_input_ids=torch.tensor([prefix[slot]])
+                ).logits[0, -1]
+            assert torch.allclose(logits[row], expected, atol=1e-4)
+            prefix[slot].append(int(torch.randint(4, model.config.vocab_size, (1,), generator=g)))
+
+
+def test_batcher_matches_generate(model, tokenizer, config):
+    texts = SENTENCES * 3
+    expected = generate_responses(texts, model, tokenizer, config, "cpu", config.model.max_seq_len)
+    with ContinuousBatcher(model, tokenizer, config, max_slots=4) as batcher:
+        assert batcher.check(texts) == expected
+        stats = batcher.stats()
+    assert stats["admitted"] == stats["completed"] == len(texts)
+    assert stats["active"] == stats["waiting"] == 0
+    assert 0 < stats["mean_occupancy"] <= 4
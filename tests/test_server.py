@@ -0,0 +1,99 @@
+import json
+import sys
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.inference import generate_response, generate_responses
+from src.paragraph import check_paragraph
+from src.server import BackgroundServer, InferenceServer
+
+SENTENCES = ["Ich habe den Auto.", "Wo du wohnst?", "Ich bin müde."]
+
+
+def request(url: str, path: str, payload=None, method: str | None = None) -> tuple[int, Any, dict]:
+    """(status, body — parsed JSON or text, headers)"""
+    data = None if payload is None else (payload if isinstance(payload, bytes) else json.dumps(payload).encode())
+    req = urllib.request.Request(url + path, data=data, method=method)
+    try:
+        with urllib.request.urlopen(req, timeout=60) as resp:
+            status, body, headers = resp.status, resp.read().decode(), dict(resp.headers)
+    except urllib.error.HTTPError as e:
+        status, body, headers = e.code, e.read().decode(), dict(e.headers)
+    if headers.get("Content-Type", "").startswith("application/json"):
+        body = json.loads(body)
+    return status, body, headers
+
+
+@pytest.mark.parametrize("continuous", [False, True])
+def test_check_endpoints_match_inference(model, tokenizer, config, continuous):
+    with BackgroundServer(InferenceServer(model, tokenizer, config, continuous=continuous)) as srv:
+        status, body, _ = request(srv.url, "/check", {"text": SENTENCES[0]})
+        assert status == 200
+        assert body["response"] == generate_response(SENTENCES[0], model, tokenizer, config, "cpu",
+                                                     config.model.max_seq_len)
+
+        status, body, _ = request(srv.url, "/check", {"texts": SENTENCES})
+        assert status == 200
+        expected = generate_responses(SENTENCES, model, tokenizer, config, "cpu", config.model.max_seq_len)
+        assert [r["response"] for r in body["results"]] == expected
+
+        paragraph = " ".join(SENTENCES)
+        status, body, _ = request(srv.url, "/paragraph", {"text": paragraph})
+        assert status == 200
+        assert body["sentences"] == check_paragraph(paragraph, model, tokenizer, config, "cpu")
+
+        # Concurrent clients are all answered
+        results = []
+        threads = [threading.Thread(target=lambda t=t: results.append(request(srv.url, "/check", {"text": t})))
+                   for t in SENTENCES * 4]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert [r[0] for r in results] == [200] * len(threads)
+
+        status, body, _ = request(srv.url, "/healthz")
+        assert status == 200 and body["status"] == "ok" and body["continuous"] == continuous
+        status, body, _ = request(srv.url, "/metrics")
+        assert status == 200
+        assert 'a2_server_requests_total{endpoint="/check",status="200"} 14' in body
+        assert "a2_request_seconds_bucket" in body
+
+
+def test_continuous_batching_uses_the_result_cache(model, tokenizer, config):
+    from src.cache import ResultCache
+
+    cache = ResultCache()
+    server = InferenceServer(model, tokenizer, config, cache=cache, continuous=True)
+    with BackgroundServer(server) as srv:
+        status, body, _ = request(srv.url, "/check", {"text": SENTENCES[0]})
+        assert status == 200 and cache.get(SENTENCES[0]) == body["response"]
+        status, again, _ = request(srv.url, "/check", {"text": "  " + SENTENCES[0] + "  "})
+        assert status == 200 and again["response"] == body["response"]
+        status, batch, _ = request(srv.url, "/check", {"texts": SENTENCES[:2]})
+        assert status == 200 and batch["results"][0]["response"] == body["response"]
+        assert server._batcher is not None and server._batcher.stats()["admitted"] == 2                  # hits never take a slot
+
+
+def test_errors_backpressure_and_timeout(model, tokenizer, config):
+    server = InferenceServer(model, tokenizer, config, max_workers=1, max_pending=1, request_timeout=0.05)
+    with BackgroundServer(server) as srv:
+        assert request(srv.url, "/check", b"not json")[0] == 400
+        assert request(srv.url, "/check", {"text": ""})[0] == 400
+        assert request(srv.url, "/check", {"texts": ["x"] * (config.server.max_batch + 1)})[0] == 413
+        assert request(srv.url, "/nope")[0] == 404
+        assert request(srv.url, "/check", method="GET")[0] == 405
+
+        # A long batch times out but keeps the only executor slot busy → the next request is refused
+        status, body, _ = request(srv.url, "/check", {"texts": [f"Satz Nummer {i}." for i in range(32)]})
+        assert status == 504 and "error" in body
+        status, body, headers = request(srv.url, "/check", {"text": SENTENCES[0]})
+        assert status == 503 and headers["Retry-After"] == "1"
+        assert server.timeouts.value() == 1 and server.rejected.value() == 1
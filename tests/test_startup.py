@@ -0,0 +1,30 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import torch
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.inference import load_hf_model
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+def test_cli_import_is_light():
+    """--help and the no-model fast paths must not pay for torch / transformers."""
+    probe = "import sys, src.generate; print('torch' in sys.modules, 'transformers' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", probe], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.split() == ["False", "False"]
+
+
+def test_load_hf_model_matches_generate(tmp_path, model, tokenizer):
+    model.save_pretrained(tmp_path)
+
+    loaded = load_hf_model(tmp_path)
+    assert loaded.lm_head.weight is loaded.model.shared.weight
+    input_ids = torch.tensor([tokenizer.encode("Ich habe den Auto.", add_bos=True, add_eos=True)])
+    with torch.no_grad():
+        expected = model.generate(input_ids=input_ids, max_length=20, num_beams=1, do_sample=False)
+        actual = loaded.generate(input_ids=input_ids, max_length=20, num_beams=1, do_sample=False)  # pyright: ignore[reportAttributeAccessIssue]
+    assert torch.equal(expected, actual)